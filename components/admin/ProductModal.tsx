@@ -9,7 +9,7 @@ import { Input } from '@/components/ui/input';
 import { Label } from '@/components/ui/label';
 import { Tabs, TabsContent, TabsList, TabsTrigger } from '@/components/ui/tabs';
 import { Badge } from '@/components/ui/badge';
-import { Package, Plus, Edit2, Trash2, AlertTriangle } from 'lucide-react';
+import { Package, Plus, Edit2, Trash2, AlertTriangle, Search } from 'lucide-react';
 import {
   AlertDialog,
   AlertDialogAction,
@@ -27,23 +27,24 @@ export default function ProductModal() {
   const [newProduct, setNewProduct] = useState({ name: '', price: '' });
   const [editProduct, setEditProduct] = useState<{ name: string; price: string } | null>(null);
   const [showDeleteAllDialog, setShowDeleteAllDialog] = useState(false);
+  const [search, setSearch] = useState('');
 
-  const getProducts = useCallback(() => {
+  const getProducts = useCallback((query: string) => {
     if (socket?.getProducts) {
-      socket.getProducts();
+      socket.getProducts({ query });
     }
   }, [socket?.getProducts]);
 
   useEffect(() => {
     if (open) {
-      // Add delay to prevent rapid calls
+      // Debounce so typing a search only requests the final query
       const timer = setTimeout(() => {
-        getProducts();
-      }, 100);
+        getProducts(search);
+      }, 250);
       
       return () => clearTimeout(timer);
     }
-  }, [open]); // Remove getProducts from dependencies
+  }, [open, search]); // Remove getProducts from dependencies
 
   const handleAddProduct = () => {
     if (newProduct.name && newProduct.price) {
@@ -102,10 +103,19 @@ export default function ProductModal() {
 
           <TabsContent value="list" className="space-y-4">
             <div className="flex justify-between items-center mb-4">
-              <div>
-                <Badge variant="secondary">{productEntries.length} produk</Badge>
+              <div className="flex items-center gap-2">
+                <Badge variant="secondary">{socket.productTotal} produk</Badge>
+                <div className="relative">
+                  <Search className="h-4 w-4 absolute left-2 top-1/2 -translate-y-1/2 text-gray-400" />
+                  <Input
+                    value={search}
+                    onChange={(e) => setSearch(e.target.value)}
+                    placeholder="Cari produk"
+                    className="pl-8 h-8 w-48"
+                  />
+                </div>
               </div>
-              {productEntries.length > 0 && (
+              {productEntries.length > 0 && !search && (
                 <Button
                   variant="destructive"
                   size="sm"
@@ -198,6 +208,11 @@ export default function ProductModal() {
                   </Card>
                 ))
               )}
+              {socket.productNextPageToken && (
+                <Button variant="outline" size="sm" onClick={socket.loadMoreProducts}>
+                  Muat lebih banyak ({productEntries.length} dari {socket.productTotal})
+                </Button>
+              )}
             </div>
           </TabsContent>
 
@@ -249,7 +264,7 @@ export default function ProductModal() {
             <AlertDialogTitle>Hapus Semua Produk</AlertDialogTitle>
             <AlertDialogDescription asChild>
               <div className="space-y-2">
-                <span>Apakah Anda yakin ingin menghapus semua {productEntries.length} produk?</span>
+                <span>Apakah Anda yakin ingin menghapus semua {socket.productTotal} produk?</span>
                 <div className="bg-red-50 p-3 rounded-md mt-3">
                   <div className="text-sm font-medium text-red-600">Tindakan ini tidak dapat dibatalkan!</div>
                   <div className="text-sm text-red-500 mt-1">Semua data produk akan dihapus secara permanen.</div>
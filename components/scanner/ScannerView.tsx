@@ -102,6 +102,7 @@ export default function ScannerView() {
           <VideoPlayer
             isConnected={socket.isConnected}
             isScanning={socket.isScanning}
+            overlay={socket.overlay}
           />
           
           {socket.isSimulationMode && (
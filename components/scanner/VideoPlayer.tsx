@@ -2,29 +2,76 @@
 
 import { useRef, useEffect } from 'react';
 import { API_BASE_URL } from '@/lib/constants';
+import { DetectionOverlay } from '@/lib/types';
 
 interface VideoPlayerProps {
   isConnected: boolean;
   isScanning: boolean;
+  overlay?: DetectionOverlay | null;
   onLoad?: () => void;
   onError?: () => void;
 }
 
-export default function VideoPlayer({ isConnected, isScanning, onLoad, onError }: VideoPlayerProps) {
-  const iframeRef = useRef<HTMLIFrameElement>(null);
+const STREAM_WIDTH = 640;
+const STREAM_HEIGHT = 480;
+
+// Draws the zone and boxes the server sends as data in metadata overlay mode.
+// The SVG scales its viewBox exactly like object-fit: contain scales the stream.
+function OverlayLayer({ overlay }: { overlay: DetectionOverlay }) {
+  const zoneX = (overlay.width * overlay.zone.start) / 100;
+  const zoneWidth = (overlay.width * overlay.zone.width) / 100;
+
+  return (
+    <svg
+      viewBox={`0 0 ${overlay.width} ${overlay.height}`}
+      preserveAspectRatio="xMidYMid meet"
+      className="absolute inset-0 pointer-events-none"
+      style={{ width: STREAM_WIDTH, height: STREAM_HEIGHT }}
+    >
+      {overlay.zone.show && (
+        <g>
+          <rect x={zoneX} y={0} width={zoneWidth} height={overlay.height}
+                fill={overlay.zone.color} fillOpacity={overlay.zone.opacity}
+                stroke={overlay.zone.color} strokeWidth={2} />
+          <text x={zoneX + zoneWidth / 2} y={30} textAnchor="middle" fill="#fff"
+                fontSize={20} fontWeight="bold">
+            COUNTING ZONE
+          </text>
+        </g>
+      )}
+      {overlay.mode === 'scan' && overlay.boxes.show && overlay.detections.map((detection) => {
+        const [x1, y1, x2, y2] = detection.box;
+        return (
+          <g key={detection.id}>
+            <rect x={x1} y={y1} width={x2 - x1} height={y2 - y1} fill="none"
+                  stroke={overlay.boxes.color} strokeWidth={detection.in_zone ? 3 : 2} />
+            {overlay.boxes.labels && (
+              <text x={x1 + 4} y={Math.max(y1 - 6, 14)} fill={overlay.boxes.color} fontSize={16}>
+                {detection.counted ? `✓ ${detection.label}` : detection.label}
+              </text>
+            )}
+          </g>
+        );
+      })}
+    </svg>
+  );
+}
+
+export default function VideoPlayer({ isConnected, isScanning, overlay, onLoad, onError }: VideoPlayerProps) {
+  const imageRef = useRef<HTMLImageElement>(null);
   const streamUrl = `${API_BASE_URL}/video_feed`;
 
   useEffect(() => {
-    const iframe = iframeRef.current;
-    if (!iframe || !isConnected) return;
+    const image = imageRef.current;
+    if (!image || !isConnected) return;
+
+    // Force reload the stream with cache-busting
+    image.src = streamUrl + '?t=' + Date.now();
 
-    // Force reload iframe with cache-busting
-    iframe.src = streamUrl + '?t=' + Date.now();
-    
     // Simple load detection
     const loadTimer = setTimeout(() => {
       onLoad?.();
-      console.log('✅ MJPEG iframe loaded');
+      console.log('✅ MJPEG stream loaded');
     }, 1000);
 
     return () => clearTimeout(loadTimer);
@@ -43,22 +90,23 @@ export default function VideoPlayer({ isConnected, isScanning, onLoad, onError }
 
   return (
     <div className="relative w-full rounded-lg border bg-muted/50 overflow-hidden flex items-center justify-center" style={{ height: '500px' }}>
-      <iframe
-        ref={iframeRef}
-        src={streamUrl}
-        style={{
-          width: '640px',
-          height: '480px',
-          border: 'none',
-          background: 'var(--muted)',
-          borderRadius: '8px'
-        }}
-        title="Live Video Feed"
-        allow="camera"
-        sandbox="allow-same-origin"
-        scrolling="no"
-        frameBorder="0"
-      />
+      {/* An img (not an iframe) so the overlay can be aligned with the stream */}
+      <div className="relative" style={{ width: STREAM_WIDTH, height: STREAM_HEIGHT }}>
+        <img
+          ref={imageRef}
+          src={streamUrl}
+          alt="Live Video Feed"
+          onError={onError}
+          style={{
+            width: STREAM_WIDTH,
+            height: STREAM_HEIGHT,
+            objectFit: 'contain',
+            background: 'var(--muted)',
+            borderRadius: '8px'
+          }}
+        />
+        {overlay && <OverlayLayer overlay={overlay} />}
+      </div>
     </div>
   );
-}
\ No newline at end of file
+}
@@ -1,16 +1,25 @@
 'use client';
 
-import { useEffect, useState, useCallback } from 'react';
+import { useEffect, useState, useCallback, useRef } from 'react';
 import { io, Socket } from 'socket.io-client';
-import { SOCKET_URL } from '@/lib/constants';
-import { Cart, Product, Transaction, SimulatedObject, AppConfig } from '@/lib/types';
+import { SOCKET_URL, LANE_ID, PRODUCT_PAGE_SIZE } from '@/lib/constants';
+import { Cart, Product, Transaction, SimulatedObject, AppConfig, DetectionOverlay } from '@/lib/types';
 
 export function useSocket() {
   const [socket, setSocket] = useState<Socket | null>(null);
   const [isConnected, setIsConnected] = useState(false);
   const [cart, setCart] = useState<Cart>({});
   const [total, setTotal] = useState(0);
+  const cartVersionRef = useRef(0);
   const [products, setProducts] = useState<Record<string, number>>({});
+  const [productTotal, setProductTotal] = useState(0);
+  const [productNextPageToken, setProductNextPageToken] = useState<string | null>(null);
+  // The listing the loaded pages belong to, for follow-up pages and applying deltas
+  const productQueryRef = useRef<{ query: string; sort: string; nextPageToken: string | null }>({
+    query: '',
+    sort: 'name',
+    nextPageToken: null,
+  });
   const [transactions, setTransactions] = useState<Transaction[]>([]);
   const [simulatedObjects, setSimulatedObjects] = useState<Record<string, SimulatedObject>>({});
   const [isScanning, setIsScanning] = useState(false);
@@ -21,6 +30,8 @@ export function useSocket() {
   const [cameraAvailable, setCameraAvailable] = useState(false);
   const [yoloInitialized, setYoloInitialized] = useState(false);
   const [yoloInitializing, setYoloInitializing] = useState(false);
+  const [overlay, setOverlay] = useState<DetectionOverlay | null>(null);
+  const overlayTimerRef = useRef<ReturnType<typeof setTimeout> | null>(null);
 
   const showNotification = useCallback((message: string) => {
     setNotification(message);
@@ -38,6 +49,7 @@ export function useSocket() {
       forceNew: true,
       reconnection: true,
       timeout: 20000,
+      query: { lane: LANE_ID },
     });
     
     setSocket(socketInstance);
@@ -51,11 +63,32 @@ export function useSocket() {
     });
 
     socketInstance.on('cart_update', (data) => {
+      // Deltas must arrive in order; on a gap ask the server for the full cart
+      if (data.version !== cartVersionRef.current + 1) {
+        socketInstance.emit('get_cart');
+        return;
+      }
+      cartVersionRef.current = data.version;
+      setCart(prev => {
+        const next = { ...prev };
+        if (data.quantity > 0) {
+          next[data.item] = { price: data.price, quantity: data.quantity };
+        } else {
+          delete next[data.item];
+        }
+        return next;
+      });
+      setTotal(data.total);
+    });
+
+    socketInstance.on('cart_sync', (data) => {
+      cartVersionRef.current = data.version;
       setCart(data.cart);
       setTotal(data.total);
     });
 
     socketInstance.on('scanning_complete', (data) => {
+      cartVersionRef.current = data.version;
       setCart(data.cart);
       setTotal(data.total);
       setIsScanning(false);
@@ -65,6 +98,22 @@ export function useSocket() {
       setProducts(data);
     });
 
+    socketInstance.on('products_page', (data) => {
+      const page: Record<string, number> = {};
+      for (const product of data.products) {
+        page[product.name] = product.price;
+      }
+      // The first page replaces the list; later pages append to it
+      setProducts(prev => (data.request?.page_token ? { ...prev, ...page } : page));
+      setProductTotal(data.total);
+      setProductNextPageToken(data.next_page_token);
+      productQueryRef.current = {
+        query: data.request?.query || '',
+        sort: data.request?.sort || 'name',
+        nextPageToken: data.next_page_token,
+      };
+    });
+
     socketInstance.on('product_added', (data) => {
       setProducts(prev => ({ ...prev, [data.name]: data.price }));
       showNotification(`Product ${data.name} added successfully`);
@@ -84,10 +133,39 @@ export function useSocket() {
       showNotification(`Product ${data.name} deleted successfully`);
     });
 
+    socketInstance.on('catalog_changed', (data) => {
+      // Live catalog edits from any lane or the Firebase console. Only loaded rows are
+      // updated in place; new products show up directly once the last page is loaded
+      const { query, nextPageToken } = productQueryRef.current;
+      const search = query.trim().toLowerCase();
+      // Mirrors the server: short queries match a prefix, longer ones anywhere in the name
+      const matches = (name: string) => (search.length < 3 ? name.startsWith(search) : name.includes(search));
+      setProducts(prev => {
+        const next = { ...prev };
+        for (const change of data.changes) {
+          if (change.type === 'removed') {
+            delete next[change.name];
+          } else if (change.name in next || (!nextPageToken && matches(change.name))) {
+            next[change.name] = change.price;
+          }
+        }
+        return next;
+      });
+    });
+
     socketInstance.on('transaction_history', (data) => {
       setTransactions(data);
     });
 
+    socketInstance.on('transaction_history_page', (data) => {
+      // Date-range results arrive page by page; the first page replaces the list
+      if (data.page === 0) {
+        setTransactions(data.transactions);
+      } else if (data.transactions.length > 0) {
+        setTransactions((prev) => [...prev, ...data.transactions]);
+      }
+    });
+
     socketInstance.on('transaction_deleted', (data) => {
       if (data.success) {
         showNotification("Transaction deleted successfully");
@@ -148,6 +226,33 @@ export function useSocket() {
       }
     });
 
+    socketInstance.on('detection_overlay', (data) => {
+      // Only sent in metadata overlay mode; drop it once updates stop so no stale boxes linger
+      setOverlay(data);
+      if (overlayTimerRef.current) clearTimeout(overlayTimerRef.current);
+      overlayTimerRef.current = setTimeout(() => setOverlay(null), 1000);
+    });
+
+    socketInstance.on('camera_stall', (data) => {
+      showNotification(`Camera stalled (${data.reason}), reconnecting...`);
+    });
+
+    socketInstance.on('storage_complete', (data) => {
+      if (data.status !== 'success' && data.status !== 'cancelled') {
+        showNotification(`Storage ${data.operation} ${data.status}: ${data.error}`);
+      }
+    });
+
+    socketInstance.on('bulk_delete_progress', (data) => {
+      showNotification(`Deleting ${data.collection}: ${data.deleted_count} removed`);
+    });
+
+    socketInstance.on('bulk_delete_complete', (data) => {
+      showNotification(data.status === 'success'
+        ? `Deleted ${data.deleted_count} (${data.operation})`
+        : `${data.operation} failed: ${data.error}`);
+    });
+
     socketInstance.on('yolo_status', (data) => {
       setYoloInitialized(data.initialized);
       setYoloInitializing(data.initializing);
@@ -159,6 +264,7 @@ export function useSocket() {
     });
 
     return () => {
+      if (overlayTimerRef.current) clearTimeout(overlayTimerRef.current);
       socketInstance.disconnect();
     };
   }, [isClient, showNotification]);
@@ -185,8 +291,18 @@ export function useSocket() {
     socket?.emit('checkout_complete');
   }, [socket]);
 
-  const getProducts = useCallback(() => {
-    socket?.emit('get_products');
+  const getProducts = useCallback((options: { query?: string; sort?: string } = {}) => {
+    socket?.emit('get_products', {
+      query: options.query ?? productQueryRef.current.query,
+      sort: options.sort ?? productQueryRef.current.sort,
+      page_size: PRODUCT_PAGE_SIZE,
+    });
+  }, [socket]);
+
+  const loadMoreProducts = useCallback(() => {
+    const { query, sort, nextPageToken } = productQueryRef.current;
+    if (!nextPageToken) return;
+    socket?.emit('get_products', { query, sort, page_size: PRODUCT_PAGE_SIZE, page_token: nextPageToken });
   }, [socket]);
 
   const addProduct = useCallback((name: string, price: number) => {
@@ -209,6 +325,10 @@ export function useSocket() {
     socket?.emit('get_transaction_history');
   }, [socket]);
 
+  const getTransactionsByDate = useCallback((startDate: string, endDate: string) => {
+    socket?.emit('get_transactions_by_date', { start_date: startDate, end_date: endDate });
+  }, [socket]);
+
   const deleteTransaction = useCallback((id: string) => {
     socket?.emit('delete_transaction', { id });
   }, [socket]);
@@ -259,6 +379,8 @@ export function useSocket() {
     cart,
     total,
     products,
+    productTotal,
+    productNextPageToken,
     transactions,
     simulatedObjects,
     isScanning,
@@ -268,17 +390,20 @@ export function useSocket() {
     cameraAvailable,
     yoloInitialized,
     yoloInitializing,
+    overlay,
     startScanning,
     stopScanning,
     removeItem,
     clearCart,
     checkoutComplete,
     getProducts,
+    loadMoreProducts,
     addProduct,
     updateProduct,
     deleteProduct,
     deleteAllProducts,
     getTransactionHistory,
+    getTransactionsByDate,
     deleteTransaction,
     deleteAllTransactions,
     toggleSimulation,
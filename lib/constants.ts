@@ -24,6 +24,9 @@ const getApiBaseUrl = () => {
 
 export const API_BASE_URL = getApiBaseUrl();
 export const SOCKET_URL = API_BASE_URL;
+export const LANE_ID = process.env.NEXT_PUBLIC_LANE_ID || 'default';
+// Products fetched per page in the product manager; later pages load on demand
+export const PRODUCT_PAGE_SIZE = 50;
 
 export const DEFAULT_CONFIG = {
   detection: {
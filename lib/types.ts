@@ -36,6 +36,26 @@ export interface SimulatedObject {
   created_time: number;
 }
 
+export interface OverlayDetection {
+  id: string;
+  label: string;
+  box: [number, number, number, number];
+  in_zone: boolean;
+  counted: boolean;
+}
+
+// Detections sent as data when the server forwards the camera's JPEGs untouched
+export interface DetectionOverlay {
+  width: number;
+  height: number;
+  timestamp: number;
+  mode: 'scan' | 'ready';
+  simulation: boolean;
+  zone: { start: number; width: number; color: string; opacity: number; show: boolean };
+  boxes: { color: string; show: boolean; labels: boolean };
+  detections: OverlayDetection[];
+}
+
 export interface DetectionConfig {
   zoneStart: number;
   zoneWidth: number;
@@ -0,0 +1,147 @@
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+from Metrics import Histogram
+
+
+class BatchInferenceScheduler:
+    """Collects frames from several lanes and runs them through the detector as one batch"""
+
+    def __init__(self, detector, max_batch_size=4, max_wait_ms=10, lane_timeout=2.0):
+        self.detector = detector
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, max_wait_ms / 1000.0)
+        self.lane_timeout = lane_timeout
+
+        self.queue = deque()
+        self.condition = threading.Condition()
+        self.is_running = False
+        self.worker_thread = None
+
+        self.lane_last_seen = {}
+        self.lane_frame_counts = {}
+        self.batch_count = 0
+
+        self.batch_size_histogram = Histogram(range(1, self.max_batch_size + 1))
+        self.queue_wait_histogram = Histogram([1, 2, 5, 10, 20, 50, 100, 250])
+        self.inference_time_histogram = Histogram([10, 25, 50, 100, 200, 500, 1000])
+
+    def start(self):
+        with self.condition:
+            if self.is_running:
+                return
+            self.is_running = True
+
+        self.worker_thread = threading.Thread(target=self._worker_loop)
+        self.worker_thread.daemon = True
+        self.worker_thread.start()
+        print(f"Batch inference scheduler started (max batch: {self.max_batch_size}, "
+              f"max wait: {self.max_wait * 1000:.0f} ms)")
+
+    def stop(self):
+        with self.condition:
+            self.is_running = False
+            pending = list(self.queue)
+            self.queue.clear()
+            self.condition.notify_all()
+
+        for _, _, _, future in pending:
+            future.cancel()
+
+        if self.worker_thread:
+            self.worker_thread.join(timeout=1.0)
+            self.worker_thread = None
+
+    def submit(self, lane_id, frame):
+        """Queue a frame for detection and return a Future resolving to (frame, detected_objects)"""
+        if not self.is_running:
+            self.start()
+
+        future = Future()
+        now = time.monotonic()
+
+        with self.condition:
+            self.queue.append((lane_id, frame, now, future))
+            self.lane_last_seen[lane_id] = now
+            self.lane_frame_counts[lane_id] = self.lane_frame_counts.get(lane_id, 0) + 1
+            self.condition.notify_all()
+
+        return future
+
+    def detect(self, frame, lane_id='default', timeout=5.0):
+        return self.submit(lane_id, frame).result(timeout=timeout)
+
+    def _active_lane_count(self, now):
+        return sum(1 for last_seen in self.lane_last_seen.values()
+                   if now - last_seen <= self.lane_timeout)
+
+    def _collect_batch(self):
+        with self.condition:
+            while self.is_running and not self.queue:
+                self.condition.wait()
+
+            if not self.is_running:
+                return []
+
+            # Flush as soon as every active lane has a frame queued, so a single
+            # camera never pays the batching wait
+            deadline = self.queue[0][2] + self.max_wait
+            while self.is_running:
+                now = time.monotonic()
+                target_size = min(self.max_batch_size, max(1, self._active_lane_count(now)))
+                if len(self.queue) >= target_size or now >= deadline:
+                    break
+                self.condition.wait(deadline - now)
+
+            batch = []
+            while self.queue and len(batch) < self.max_batch_size:
+                batch.append(self.queue.popleft())
+            return batch
+
+    def _worker_loop(self):
+        while self.is_running:
+            batch = self._collect_batch()
+            if not batch:
+                continue
+
+            batch = [item for item in batch if item[3].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+
+            started = time.monotonic()
+            for _, _, enqueued, _ in batch:
+                self.queue_wait_histogram.observe((started - enqueued) * 1000)
+            self.batch_size_histogram.observe(len(batch))
+
+            try:
+                results = self.detector.detect_objects_batch([frame for _, frame, _, _ in batch])
+                for (_, _, _, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                print(f"Batch inference error: {e}")
+                for _, _, _, future in batch:
+                    future.set_exception(e)
+
+            self.inference_time_histogram.observe((time.monotonic() - started) * 1000)
+            self.batch_count += 1
+
+    def get_stats(self):
+        now = time.monotonic()
+        with self.condition:
+            queue_depth = len(self.queue)
+            active_lanes = self._active_lane_count(now)
+            lane_frames = dict(self.lane_frame_counts)
+
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'batches': self.batch_count,
+            'queue_depth': queue_depth,
+            'active_lanes': active_lanes,
+            'lane_frames': lane_frames,
+            'batch_size': self.batch_size_histogram.snapshot(),
+            'queue_wait_ms': self.queue_wait_histogram.snapshot(),
+            'inference_ms': self.inference_time_histogram.snapshot()
+        }
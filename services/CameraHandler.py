@@ -2,21 +2,56 @@ import cv2
 import threading
 import time
 import platform
+import numpy as np
+
+from FrameMonitor import FrameMonitor
 
 
 class Camera:
-    def __init__(self, camera_id=0):
+    JPEG_DECODE_FLAGS = {
+        1: cv2.IMREAD_COLOR,
+        2: cv2.IMREAD_REDUCED_COLOR_2,
+        4: cv2.IMREAD_REDUCED_COLOR_4,
+        8: cv2.IMREAD_REDUCED_COLOR_8
+    }
+
+    def __init__(self, camera_id=0, passthrough=False, decode_scale=1):
         self.camera_id = camera_id
         self.cap = None
         self.is_running = False
         self.frame = None
+        self.jpeg = None
+
+        # MJPEG passthrough keeps the camera's compressed bitstream and only
+        # decodes on demand, optionally at 1/2, 1/4 or 1/8 scale
+        self.passthrough = passthrough
+        self.passthrough_active = False
+        self.decode_scale = decode_scale if decode_scale in self.JPEG_DECODE_FLAGS else 1
         self.lock = threading.Lock()
+        self.frame_ready = threading.Condition(self.lock)
+        self.frame_seq = 0
+        self.last_read_seq = 0
+        self.is_stale = False
         self.frame_width = 640
         self.frame_height = 480
         self.last_frame_time = 0
         self.frame_timeout = 3.0
+        self.read_timeout = 0.1
         self.max_retries = 3
         self.retry_count = 0
+        self.capture_thread = None
+        self.reconnecting = False
+        self.reconnect_count = 0
+        self.reconnect_backoff = 0.2
+        self.max_reconnect_backoff = 2.0
+
+        # Backend and mode negotiated on the last successful open, tried first next time
+        self.preferred_backend = None
+        self.negotiated_mode = None
+
+        self.monitor = FrameMonitor()
+        self.stall_reported = False
+        self.on_stall = None  # Callback(reason, stats) invoked when the stream freezes or stops
 
     def start(self):
         if self.is_running:
@@ -26,7 +61,14 @@ class Camera:
             try:
                 if self._try_open_camera():
                     self.is_running = True
-                    self.last_frame_time = time.time()
+                    self.is_stale = False
+                    self.last_frame_time = time.monotonic()
+                    self.stall_reported = False
+                    self.monitor.reset()
+                    self.monitor.set_expected_fps(self.negotiated_mode['fps'])
+                    self.capture_thread = threading.Thread(target=self._capture_loop)
+                    self.capture_thread.daemon = True
+                    self.capture_thread.start()
                     print(f"Camera {self.camera_id} started: {self.frame_width}x{self.frame_height}")
                     return True
                 else:
@@ -39,41 +81,91 @@ class Camera:
         print(f"Failed to start camera after {self.max_retries} attempts")
         return False
 
-    def _try_open_camera(self):
+    def _get_backends(self):
         if platform.system() == "Windows":
             # Try different backends for Windows - MSMF first, then CAP_ANY (no backend), then DSHOW
             backends = [cv2.CAP_MSMF, cv2.CAP_ANY, cv2.CAP_DSHOW]
         else:
             backends = [cv2.CAP_V4L2, cv2.CAP_ANY]
 
-        for backend in backends:
+        if self.preferred_backend in backends:
+            backends.remove(self.preferred_backend)
+            backends.insert(0, self.preferred_backend)
+        return backends
+
+    def _configure_capture(self, backend):
+        mode = self.negotiated_mode if backend == self.preferred_backend else None
+
+        if mode:
+            # Re-apply the mode the driver accepted last time instead of re-negotiating
+            if mode['fourcc']:
+                self.cap.set(cv2.CAP_PROP_FOURCC, mode['fourcc'])
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, mode['width'])
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, mode['height'])
+            self.cap.set(cv2.CAP_PROP_FPS, mode['fps'])
+            self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+            self._configure_passthrough()
+            return
+
+        # Set camera properties
+        self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
+        self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
+        self.cap.set(cv2.CAP_PROP_FPS, 30)
+        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+
+        # Additional Windows-specific settings for better compatibility
+        if platform.system() == "Windows":
+            try:
+                self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M', 'J', 'P', 'G'))
+            except:
+                pass
+
+        self._configure_passthrough()
+
+    def _configure_passthrough(self):
+        if not self.passthrough:
+            return
+
+        try:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M', 'J', 'P', 'G'))
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        except Exception as e:
+            print(f"MJPEG passthrough not supported by backend: {e}")
+
+    @staticmethod
+    def _is_jpeg_buffer(frame):
+        # Backends that honour CONVERT_RGB=0 hand back the raw bitstream as a 1xN buffer
+        return (frame is not None and frame.dtype == np.uint8 and frame.ndim <= 2 and
+                frame.size > 2 and frame.reshape(-1)[0] == 0xFF and frame.reshape(-1)[1] == 0xD8)
+
+    def _remember_mode(self, backend):
+        self.preferred_backend = backend
+        self.negotiated_mode = {
+            'width': self.frame_width,
+            'height': self.frame_height,
+            'fps': self.cap.get(cv2.CAP_PROP_FPS) or 30,
+            'fourcc': int(self.cap.get(cv2.CAP_PROP_FOURCC))
+        }
+
+    def _try_open_camera(self):
+        for backend in self._get_backends():
+            is_cached = backend == self.preferred_backend and self.negotiated_mode is not None
             try:
-                print(f"Trying camera backend: {backend}")
-                
+                print(f"Trying camera backend: {backend}{' (cached)' if is_cached else ''}")
+
                 # For CAP_ANY, don't specify backend parameter
                 if backend == cv2.CAP_ANY:
                     self.cap = cv2.VideoCapture(self.camera_id)
                 else:
                     self.cap = cv2.VideoCapture(self.camera_id, backend)
-                
+
                 if not self.cap.isOpened():
                     print(f"Backend {backend} - Camera not opened")
                     if self.cap:
                         self.cap.release()
                     continue
 
-                # Set camera properties
-                self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
-                self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
-                self.cap.set(cv2.CAP_PROP_FPS, 30)
-                self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-                
-                # Additional Windows-specific settings for better compatibility
-                if platform.system() == "Windows":
-                    try:
-                        self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc('M', 'J', 'P', 'G'))
-                    except:
-                        pass
+                self._configure_capture(backend)
 
                 self.frame_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
                 self.frame_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
@@ -81,8 +173,17 @@ class Camera:
                 # Test read to ensure camera is working
                 ret, test_frame = self.cap.read()
                 if ret and test_frame is not None:
+                    self.passthrough_active = self.passthrough and self._is_jpeg_buffer(test_frame)
+                    if self.passthrough and not self.passthrough_active:
+                        print(f"Backend {backend} returned decoded frames, MJPEG passthrough disabled")
                     print(f"✓ Camera opened successfully with backend: {backend}")
                     print(f"  Resolution: {self.frame_width}x{self.frame_height}")
+
+                    # A backend that already proved stable only needs the single test read
+                    if is_cached:
+                        self._remember_mode(backend)
+                        return True
+
                     # Test a few more frames to ensure stability
                     for i in range(3):
                         ret, _ = self.cap.read()
@@ -92,6 +193,7 @@ class Camera:
                             break
                         time.sleep(0.1)
                     else:
+                        self._remember_mode(backend)
                         return True
                 else:
                     print(f"Backend {backend} - Test frame read failed")
@@ -109,77 +211,223 @@ class Camera:
 
     def stop(self):
         self.is_running = False
+        with self.frame_ready:
+            self.frame_ready.notify_all()
+
+        if self.capture_thread and self.capture_thread is not threading.current_thread():
+            self.capture_thread.join(timeout=2.0)
+        self.capture_thread = None
+
         if self.cap and self.cap.isOpened():
             self.cap.release()
-            self.cap = None
+        self.cap = None
+        with self.lock:
+            self.frame = None
+            self.jpeg = None
+            self.is_stale = False
         print("Camera stopped")
         return True
 
-    def read(self):
-        if not self.is_running or not self.cap or not self.cap.isOpened():
-            return False, None
+    def _capture_loop(self):
+        backoff = self.reconnect_backoff
 
-        try:
-            current_time = time.time()
-            
-            if current_time - self.last_frame_time > self.frame_timeout:
-                print("Camera timeout, attempting reconnect...")
-                if not self._reconnect():
-                    return False, None
-
-            ret, frame = self.cap.read()
-            
-            if ret and frame is not None:
-                self.last_frame_time = current_time
-                self.retry_count = 0
-                with self.lock:
-                    self.frame = frame.copy()
-                return True, frame
-            else:
-                self.retry_count += 1
-                if self.retry_count > 5:
-                    print("Multiple read failures, attempting reconnect...")
+        while self.is_running:
+            try:
+                if self.cap is None or not self.cap.isOpened():
                     self._reconnect()
-                return False, None
-                
+                    if self.cap is None or not self.cap.isOpened():
+                        time.sleep(backoff)
+                        backoff = min(backoff * 2, self.max_reconnect_backoff)
+                    else:
+                        backoff = self.reconnect_backoff
+                    continue
+
+                ret, frame = self.cap.read()
+                current_time = time.monotonic()
+
+                if ret and frame is not None:
+                    jpeg = frame.tobytes() if self.passthrough_active else None
+                    stall_reason = self.monitor.observe(jpeg if jpeg is not None else frame, current_time)
+                    if stall_reason:
+                        # Driver keeps handing back the same image - treat it like a lost camera
+                        self._report_stall(stall_reason)
+                        self._release_capture()
+                        continue
+                    if self.monitor.is_frozen:
+                        continue
+
+                    self.last_frame_time = current_time
+                    self.retry_count = 0
+                    self.stall_reported = False
+                    with self.frame_ready:
+                        self.frame = None if jpeg is not None else frame
+                        self.jpeg = jpeg
+                        self.frame_seq += 1
+                        self.is_stale = False
+                        self.frame_ready.notify_all()
+                    continue
+
+                self.retry_count += 1
+                if self.retry_count > 5 or current_time - self.last_frame_time > self.frame_timeout:
+                    print("Camera read failures, reconnecting in background...")
+                    self._report_stall('read_failures')
+                    self._release_capture()
+                else:
+                    time.sleep(0.01)
+
+            except Exception as e:
+                print(f"Camera capture error: {e}")
+                self._mark_stale()
+                self._release_capture()
+                time.sleep(backoff)
+
+    def _report_stall(self, reason):
+        self._mark_stale()
+        if self.stall_reported:
+            return
+        self.stall_reported = True
+
+        if reason != 'frozen':
+            self.monitor.record_stall(reason)
+        print(f"⚠️ Camera {self.camera_id} stalled ({reason})")
+
+        if self.on_stall:
+            try:
+                self.on_stall(reason, self.get_capture_stats())
+            except Exception as e:
+                print(f"Camera stall callback error: {e}")
+
+    def _mark_stale(self):
+        with self.frame_ready:
+            self.is_stale = True
+            self.frame_ready.notify_all()
+
+    def _release_capture(self):
+        try:
+            if self.cap:
+                self.cap.release()
         except Exception as e:
-            print(f"Camera read error: {e}")
+            print(f"Camera release error: {e}")
+        self.cap = None
+
+    def _next_capture(self):
+        with self.frame_ready:
+            if self.frame_seq == self.last_read_seq and not self.is_stale:
+                self.frame_ready.wait(self.read_timeout)
+
+            if self.frame is None and self.jpeg is None:
+                return None, None
+
+            stalled = False
+            if self.frame_seq == self.last_read_seq and not self.is_stale:
+                # No new frame within the read timeout, so the capture has stalled
+                stalled = time.monotonic() - self.last_frame_time > self.frame_timeout
+                self.is_stale = stalled
+
+            self.last_read_seq = self.frame_seq
+            frame = self.frame.copy() if self.frame is not None else None
+            jpeg = self.jpeg
+
+        # A driver blocked inside cap.read() never returns to the capture loop,
+        # so the consumer side is the only place that can notice it
+        if stalled:
+            self._report_stall('timeout')
+        return frame, jpeg
+
+    def read(self):
+        """Return the next captured frame, or the last good frame while reconnecting.
+
+        Check is_stale after a successful read to tell whether the frame is live.
+        """
+        if not self.is_running:
             return False, None
 
+        frame, jpeg = self._next_capture()
+        if frame is None and jpeg is not None:
+            frame = self.decode_jpeg(jpeg, scale=1)
+        if frame is None:
+            return False, None
+        return True, frame
+
+    def read_jpeg(self):
+        """Return the next frame as the camera's original JPEG bytes (passthrough mode only)"""
+        if not self.is_running or not self.passthrough_active:
+            return False, None
+
+        _, jpeg = self._next_capture()
+        if jpeg is None:
+            return False, None
+        return True, jpeg
+
+    def decode_jpeg(self, jpeg, scale=None):
+        scale = self.decode_scale if scale is None else scale
+        flag = self.JPEG_DECODE_FLAGS.get(scale, cv2.IMREAD_COLOR)
+        return cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), flag)
+
     def _reconnect(self):
+        self.reconnecting = True
         try:
-            if self.cap:
-                self.cap.release()
-            time.sleep(0.5)
-            return self._try_open_camera()
+            self._release_capture()
+            if self._try_open_camera():
+                if not self.is_running:
+                    self._release_capture()
+                    return False
+                self.reconnect_count += 1
+                self.retry_count = 0
+                self.last_frame_time = time.monotonic()
+                self.monitor.last_capture_time = None
+                print(f"Camera {self.camera_id} reconnected")
+                return True
+            self._release_capture()
+            return False
         except Exception as e:
             print(f"Reconnect error: {e}")
             return False
+        finally:
+            self.reconnecting = False
+
+    def get_capture_stats(self):
+        stats = self.monitor.get_stats()
+        stats.update({
+            'camera_id': self.camera_id,
+            'stale': self.is_stale,
+            'reconnect_count': self.reconnect_count
+        })
+        return stats
 
     def get_dimensions(self):
         return (self.frame_width, self.frame_height)
-    
+
     def get_latest_frame(self):
         with self.lock:
             if self.frame is not None:
                 return self.frame.copy()
-            return None
-    
+            jpeg = self.jpeg
+        if jpeg is not None:
+            return self.decode_jpeg(jpeg, scale=1)
+        return None
+
     def is_available(self):
-        return self.is_running and self.cap and self.cap.isOpened()
-    
+        # Stay available while reconnecting so consumers keep the last good frame
+        has_frame = self.frame is not None or self.jpeg is not None
+        return self.is_running and (has_frame or (self.cap is not None and self.cap.isOpened()))
+
     def get_camera_info(self):
         if not self.is_available():
             return None
-        
+
         try:
             return {
-                'width': int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
-                'height': int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
-                'fps': int(self.cap.get(cv2.CAP_PROP_FPS)),
-                'backend': self.cap.getBackendName() if hasattr(self.cap, 'getBackendName') else 'unknown',
-                'camera_id': self.camera_id
+                'width': self.frame_width,
+                'height': self.frame_height,
+                'fps': self.negotiated_mode['fps'] if self.negotiated_mode else None,
+                'backend': self.cap.getBackendName() if self.cap and hasattr(self.cap, 'getBackendName') else 'unknown',
+                'camera_id': self.camera_id,
+                'stale': self.is_stale,
+                'passthrough': self.passthrough_active,
+                'reconnecting': self.reconnecting,
+                'reconnect_count': self.reconnect_count
             }
         except Exception as e:
             print(f"Error getting camera info: {e}")
-            return None
\ No newline at end of file
+            return None
@@ -0,0 +1,239 @@
+import datetime
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from StorageBackend import InvalidCheckoutError
+
+
+class CheckoutQueue:
+    """Durable local queue of checkouts, replicated to the storage backend in the background.
+
+    Checkouts are committed and synced to a SQLite database in WAL mode before
+    the sale is acknowledged, so neither a slow or unreachable Firestore nor a
+    power loss loses a sale.
+    The replicator drains the queue in batches using the checkout ID as the
+    document key, which makes a replay after a crash idempotent.
+
+    Only an InvalidCheckoutError blames the checkouts: when it names more
+    than one, the next batch is halved until the bad checkout is alone, and
+    once a checkout has been rejected max_attempts times it is moved to the
+    dead_letters table so it no longer holds back the checkouts behind it.
+    Any other failure (an outage, revoked credentials, a locked database)
+    says nothing about the checkouts, so the batch is retried with backoff
+    and never dead-lettered.
+    """
+
+    def __init__(self, storage, path='checkout_queue.db', batch_size=50,
+                 retry_interval=2.0, max_retry_interval=60.0, max_attempts=5):
+        self.storage = storage
+        self.path = path
+        self.batch_size = batch_size
+        # Shrinks while batches fail, to isolate a bad checkout from the good ones
+        self.batch_limit = batch_size
+        self.max_attempts = max(1, max_attempts)
+        self.retry_interval = retry_interval
+        self.max_retry_interval = max_retry_interval
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.is_running = False
+        self.thread = None
+
+        self.replicated_count = 0
+        self.dead_lettered_count = 0
+        self.failed_attempts = 0
+        self.last_error = None
+        self.last_replicated_at = None
+        self.on_replicated = None
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        # synchronous=FULL syncs the WAL on every commit, so an acknowledged sale also
+        # survives an OS crash or power loss, not just a crash of this process
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=FULL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS checkouts (
+                seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                checkout_id TEXT UNIQUE NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                last_error TEXT
+            );
+            CREATE TABLE IF NOT EXISTS dead_letters (
+                checkout_id TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                attempts INTEGER NOT NULL,
+                last_error TEXT,
+                failed_at REAL NOT NULL
+            );
+        ''')
+
+    def enqueue(self, cart, total, lane_id='default'):
+        """Persist a checkout locally and return its checkout ID"""
+        checkout_id = uuid.uuid4().hex
+        created_at = time.time()
+        payload = json.dumps({
+            'cart': cart,
+            'total': total,
+            'lane': lane_id
+        })
+
+        with self.lock:
+            self.conn.execute(
+                'INSERT INTO checkouts (checkout_id, payload, created_at) VALUES (?, ?, ?)',
+                (checkout_id, payload, created_at)
+            )
+        self.wakeup.set()
+        return checkout_id
+
+    def start(self):
+        if self.is_running:
+            return
+
+        self.is_running = True
+        self.thread = threading.Thread(target=self._replication_loop, daemon=True)
+        self.thread.start()
+        depth = self.get_depth()
+        if depth:
+            print(f"Checkout queue has {depth} checkouts waiting for replication")
+
+    def stop(self):
+        self.is_running = False
+        self.wakeup.set()
+        if self.thread:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+    def _next_batch(self):
+        with self.lock:
+            rows = self.conn.execute(
+                'SELECT checkout_id, payload, created_at FROM checkouts ORDER BY seq LIMIT ?',
+                (self.batch_limit,)
+            ).fetchall()
+
+        checkouts = []
+        writes = 0
+        for checkout_id, payload, created_at in rows:
+            data = json.loads(payload)
+            # Stay inside Firestore's per-batch write limit, but always take at least one
+            writes += self.storage.count_checkout_writes(data['cart'])
+            if checkouts and writes > self.storage.MAX_BATCH_WRITES:
+                break
+            checkouts.append({
+                'checkout_id': checkout_id,
+                'cart': data['cart'],
+                'total': data['total'],
+                'lane': data.get('lane'),
+                # Keep the time of the sale, not the time it reached Firestore
+                'timestamp': datetime.datetime.fromtimestamp(created_at, tz=datetime.timezone.utc)
+            })
+        return checkouts
+
+    def _replication_loop(self):
+        delay = self.retry_interval
+
+        while self.is_running:
+            checkouts = self._next_batch() if self.storage.is_connected() else []
+            if not checkouts:
+                self.wakeup.wait(self.retry_interval)
+                self.wakeup.clear()
+                continue
+
+            rejected = {}
+            try:
+                written = self.storage.save_transactions(checkouts)
+                error = None if written is not None else f"Failed to replicate {len(checkouts)} checkouts"
+            except InvalidCheckoutError as e:
+                rejected = {checkout['checkout_id']: e.checkout_ids[checkout['checkout_id']]
+                            for checkout in checkouts if checkout['checkout_id'] in e.checkout_ids}
+                error = f"Invalid checkouts: {e}"
+            except Exception as e:
+                error = f"Storage error: {e}"
+
+            if rejected:
+                self.failed_attempts += 1
+                self.last_error = error
+                if len(rejected) > 1:
+                    # Storage could not say which one is bad: retry the front half alone
+                    self.batch_limit = max(1, len(checkouts) // 2)
+                else:
+                    for checkout_id, reason in rejected.items():
+                        self._record_failure(checkout_id, reason)
+                self.wakeup.wait(self.retry_interval)
+                self.wakeup.clear()
+                continue
+
+            if error is not None:
+                # Back off while storage is unhealthy; new checkouts keep queueing locally
+                self.failed_attempts += 1
+                self.last_error = error
+                self.wakeup.wait(delay)
+                self.wakeup.clear()
+                delay = min(delay * 2, self.max_retry_interval)
+                continue
+
+            delay = self.retry_interval
+            self.batch_limit = min(self.batch_limit * 2, self.batch_size)
+            with self.lock:
+                self.conn.executemany(
+                    'DELETE FROM checkouts WHERE checkout_id = ?',
+                    [(checkout_id,) for checkout_id in written]
+                )
+            self.replicated_count += len(written)
+            self.last_replicated_at = time.time()
+            self.last_error = None
+
+            if self.on_replicated is not None:
+                try:
+                    self.on_replicated(checkouts)
+                except Exception as e:
+                    print(f"Checkout replication callback error: {e}")
+
+    def _record_failure(self, checkout_id, error):
+        """Count a rejection of a checkout, dead-lettering it after max_attempts"""
+        with self.lock:
+            self.conn.execute(
+                'UPDATE checkouts SET attempts = attempts + 1, last_error = ? WHERE checkout_id = ?',
+                (error, checkout_id)
+            )
+            attempts = self.conn.execute(
+                'SELECT attempts FROM checkouts WHERE checkout_id = ?', (checkout_id,)
+            ).fetchone()[0]
+            if attempts < self.max_attempts:
+                return
+
+            self.conn.execute('BEGIN')
+            self.conn.execute(
+                '''INSERT OR REPLACE INTO dead_letters (checkout_id, payload, created_at, attempts, last_error, failed_at)
+                   SELECT checkout_id, payload, created_at, attempts, last_error, ? FROM checkouts
+                   WHERE checkout_id = ?''',
+                (time.time(), checkout_id)
+            )
+            self.conn.execute('DELETE FROM checkouts WHERE checkout_id = ?', (checkout_id,))
+            self.conn.execute('COMMIT')
+        self.dead_lettered_count += 1
+        print(f"Checkout {checkout_id} rejected {attempts} times ({error}), moved to dead_letters")
+
+    def get_depth(self):
+        with self.lock:
+            return self.conn.execute('SELECT COUNT(*) FROM checkouts').fetchone()[0]
+
+    def get_stats(self):
+        with self.lock:
+            depth, oldest = self.conn.execute('SELECT COUNT(*), MIN(created_at) FROM checkouts').fetchone()
+            dead_letters = self.conn.execute('SELECT COUNT(*) FROM dead_letters').fetchone()[0]
+
+        return {
+            'depth': depth,
+            'lag_seconds': round(time.time() - oldest, 3) if oldest else 0.0,
+            'replicated': self.replicated_count,
+            'dead_letters': dead_letters,
+            'failed_attempts': self.failed_attempts,
+            'last_error': self.last_error,
+            'last_replicated_at': self.last_replicated_at,
+            'running': self.is_running
+        }
@@ -5,13 +5,30 @@ import numpy as np
 import json
 import os
 
+from ShoppingCart import ShoppingCart
+
 
 class DetectorManager:
-    def __init__(self, model_path, product_manager):
+    def __init__(self, model_path, product_manager, inference_batch_size=1, inference_batch_wait_ms=0):
         from ProductDetector import ProductDetector
+        from BatchInferenceScheduler import BatchInferenceScheduler
         self.detector = ProductDetector(model_path=model_path)
+        self.inference_scheduler = BatchInferenceScheduler(
+            self.detector,
+            max_batch_size=inference_batch_size,
+            max_wait_ms=inference_batch_wait_ms
+        )
         self.product_manager = product_manager
+        # The catalog is pushed on change instead of being copied every frame
+        self.detector.product_catalog = product_manager.get_products()
+        product_manager.subscribe(self._on_catalog_change)
+        # One cart per checkout lane; the default lane shares the detector's own cart
+        self.default_lane = 'default'
+        self.carts = {self.default_lane: self.detector.cart}
+        self.carts_lock = threading.Lock()
         self.is_scanning = False
+        # Zone tracking below belongs to the lane being scanned
+        self.scanning_lane = self.default_lane
         self.lock = threading.Lock()
         self.zone_start_percent = 70
         self.zone_width_percent = 20
@@ -129,10 +146,11 @@ class DetectorManager:
     def get_simulated_objects(self):
         return self.simulated_objects.copy()
 
-    def start_scanning(self):
+    def start_scanning(self, lane_id='default'):
         with self.lock:
-            self.detector.clear_cart()
+            self.get_lane_cart(lane_id).clear()
             self.is_scanning = True
+            self.scanning_lane = lane_id
             self.objects_in_zone.clear()
             self.counted_objects.clear()
             self.last_detections.clear()
@@ -332,7 +350,7 @@ class DetectorManager:
             self.last_detections.pop(obj_id, None)
             self.objects_in_zone.pop(obj_id, None)
 
-    def _process_simulated_objects(self, frame, frame_width, frame_height):
+    def _process_simulated_objects(self, frame, frame_width, frame_height, lane_id='default'):
         current_time = time.time()
         detected_objects = []
 
@@ -353,7 +371,7 @@ class DetectorManager:
             center_x = (x1 + x2) // 2
             center_y = (y1 + y2) // 2
 
-            is_valid_product = label in self.product_manager.get_products()
+            is_valid_product = label in self.detector.product_catalog
 
             if self.config['visual']['showBoxes']:
                 color = self._hex_to_bgr(self.config['visual']['boxColor']) if is_valid_product else (0, 165, 255)
@@ -388,7 +406,7 @@ class DetectorManager:
 
             if in_zone:
                 if not was_in_zone and not already_counted and is_valid_product and self.config['detection']['autoCount']:
-                    self.detector.add_to_cart(label)
+                    self.detector.add_to_cart(label, cart=self.get_lane_cart(lane_id))
                     self.counted_objects[obj_id] = True
                     print(f"🎯 SIMULATED COUNT: {label} (ID: {obj_id})")
 
@@ -440,7 +458,7 @@ class DetectorManager:
 
         return frame
 
-    def process_frame(self, frame, frame_width, frame_height):
+    def process_frame(self, frame, frame_width, frame_height, lane_id='default'):
         if frame is None:
             blank = np.zeros((480, 640, 3), dtype=np.uint8)
             blank[:] = [30, 30, 30]  # Dark gray
@@ -461,12 +479,10 @@ class DetectorManager:
                        (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
             
             if self.is_scanning:
-                self.detector.product_catalog = self.product_manager.get_products()
-
                 if self.simulation_mode:
-                    processed_frame, detected_objects = self._process_simulated_objects(debug_frame, frame_width, frame_height)
+                    processed_frame, detected_objects = self._process_simulated_objects(debug_frame, frame_width, frame_height, lane_id)
                 else:
-                    processed_frame, detected_objects = self.detector.detect_objects(debug_frame)
+                    processed_frame, detected_objects = self.inference_scheduler.detect(debug_frame, lane_id=lane_id)
 
                 current_time = time.time()
                 current_detections = {}
@@ -501,7 +517,7 @@ class DetectorManager:
 
                     if in_zone:
                         if not was_in_zone and not already_counted and self.config['detection']['autoCount']:
-                            self.detector.add_to_cart(label)
+                            self.detector.add_to_cart(label, cart=self.get_lane_cart(lane_id))
                             self.counted_objects[obj_id] = True
                             print(f"🎯 REAL COUNT: {label} (ID: {obj_id})")
 
@@ -519,7 +535,7 @@ class DetectorManager:
                 processed_frame = debug_frame.copy()
 
                 if self.simulation_mode:
-                    self._process_simulated_objects(processed_frame, frame_width, frame_height)
+                    self._process_simulated_objects(processed_frame, frame_width, frame_height, lane_id)
 
             processed_frame = self._draw_zone_overlay(processed_frame, frame_width, frame_height)
             
@@ -544,31 +560,92 @@ class DetectorManager:
                        (10, 100), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 255), 2)
             return error_frame
 
-    def get_cart(self):
-        return self.detector.get_cart()
+    def get_overlay_metadata(self, scale=1.0):
+        """Detection overlay as data, for clients drawing on top of the passthrough stream"""
+        detections = []
+        for obj_id, obj in self.last_detections.items():
+            detections.append({
+                'id': obj_id,
+                'label': obj['label'],
+                'box': [int(v * scale) for v in obj['box']],
+                'in_zone': obj['in_zone'],
+                'counted': self.counted_objects.get(obj_id, False)
+            })
+
+        return {
+            'mode': 'scan' if self.is_scanning else 'ready',
+            'simulation': self.simulation_mode,
+            'zone': {
+                'start': self.zone_start_percent,
+                'width': self.zone_width_percent,
+                'color': self.config['visual']['zoneColor'],
+                'opacity': self.config['visual']['zoneOpacity'],
+                'show': self.config['detection']['showZone']
+            },
+            'boxes': {
+                'color': self.config['visual']['boxColor'],
+                'show': self.config['visual']['showBoxes'],
+                'labels': self.config['visual']['showLabels']
+            },
+            'detections': detections
+        }
 
-    def calculate_total(self):
-        return self.detector.calculate_total()
+    def get_inference_stats(self):
+        return self.inference_scheduler.get_stats()
 
-    def clear_cart(self):
-        self.detector.clear_cart()
-        self.objects_in_zone.clear()
-        self.counted_objects.clear()
-        self.last_detections.clear()
+    def _on_catalog_change(self, products, version, changes):
+        self.detector.product_catalog = products
 
-    def remove_item(self, product_name):
-        with self.lock:
-            cart = self.detector.get_cart()
-            product_lower = product_name.lower()
-
-            if product_lower in cart:
-                if cart[product_lower]["quantity"] > 1:
-                    cart[product_lower]["quantity"] -= 1
-                    print(f"Decreased quantity of {product_name} in cart")
-                    return True
-                else:
-                    del cart[product_lower]
-                    print(f"Removed {product_name} from cart")
-                    return True
+    def get_lane_cart(self, lane_id='default'):
+        cart = self.carts.get(lane_id)
+        if cart is None:
+            with self.carts_lock:
+                cart = self.carts.setdefault(lane_id, ShoppingCart())
+        return cart
 
-            return False
+    def get_lanes(self):
+        return list(self.carts.keys())
+
+    def get_cart(self, lane_id='default'):
+        return self.get_lane_cart(lane_id).items
+
+    def calculate_total(self, lane_id='default'):
+        return self.get_lane_cart(lane_id).total
+
+    def get_cart_version(self, lane_id='default'):
+        return self.get_lane_cart(lane_id).version
+
+    def get_cart_snapshot(self, lane_id='default'):
+        snapshot = self.get_lane_cart(lane_id).snapshot()
+        snapshot['lane'] = lane_id
+        return snapshot
+
+    def get_cart_changes_since(self, version, lane_id='default'):
+        return self.get_lane_cart(lane_id).changes_since(version)
+
+    def _reset_tracking(self, lane_id):
+        if lane_id == self.scanning_lane:
+            self.objects_in_zone.clear()
+            self.counted_objects.clear()
+            self.last_detections.clear()
+
+    def clear_cart(self, lane_id='default'):
+        self.get_lane_cart(lane_id).clear()
+        self._reset_tracking(lane_id)
+        print(f"Shopping cart cleared (lane: {lane_id}).")
+
+    def take_cart(self, lane_id='default'):
+        """Snapshot and clear a lane's cart atomically, for checkout"""
+        snapshot = self.get_lane_cart(lane_id).take()
+        snapshot['lane'] = lane_id
+        self._reset_tracking(lane_id)
+        print(f"Shopping cart taken for checkout (lane: {lane_id}).")
+        return snapshot
+
+    def restore_cart(self, snapshot, lane_id='default'):
+        """Put a taken cart back, e.g. when its checkout could not be recorded"""
+        self.get_lane_cart(lane_id).restore(snapshot)
+        print(f"Shopping cart restored (lane: {lane_id}).")
+
+    def remove_item(self, product_name, lane_id='default'):
+        return self.detector.remove_from_cart(product_name, cart=self.get_lane_cart(lane_id))
@@ -4,20 +4,43 @@ from firebase_admin import firestore
 import os
 import datetime
 import uuid
-import json
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from google.api_core import exceptions as google_exceptions
 
+from StorageBackend import InvalidCheckoutError, StorageBackend, TransientStorageError, normalize_name
 
-class FirestoreManager:
-    def __init__(self, credentials_path="firebase-credentials.json"):
+# Errors a retry may fix; anything else (AlreadyExists, NotFound, PermissionDenied...) is final
+TRANSIENT_ERRORS = (
+    google_exceptions.ServiceUnavailable,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    google_exceptions.Aborted,
+    google_exceptions.TooManyRequests,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.RetryError
+)
+
+
+class FirestoreManager(StorageBackend):
+    name = 'firestore'
+
+    def __init__(self, credentials_path="firebase-credentials.json", history_cache_ttl=30.0,
+                 history_cache_size=128, rollup_shards=4, bulk_delete_workers=4):
+        super().__init__(history_cache_ttl, history_cache_size, rollup_shards, bulk_delete_workers)
         self.credentials_path = credentials_path
         self.db = None
         self.initialize_firestore()
 
     def initialize_firestore(self):
+        emulator_host = os.getenv('FIRESTORE_EMULATOR_HOST')
+        if emulator_host:
+            self._connect_emulator(emulator_host)
+            return
+
         if not os.path.exists(self.credentials_path):
-            print(f"Firebase credentials file {self.credentials_path} not found.")
-            print("Creating a sample credentials file. Please replace with your actual credentials.")
-            self._create_sample_credentials()
+            print(f"Firebase credentials file {self.credentials_path} not found. "
+                  "Set STORAGE_BACKEND=sqlite or memory to run without Firebase.")
+            return
 
         try:
             cred = credentials.Certificate(self.credentials_path)
@@ -28,22 +51,25 @@ class FirestoreManager:
             print(f"Error initializing Firestore: {e}")
             self.db = None
 
-    def _create_sample_credentials(self):
-        sample_credentials = {
-            "type": "service_account",
-            "project_id": "your-project-id",
-            "private_key_id": "your-private-key-id",
-            "private_key": "your-private-key",
-            "client_email": "your-client-email",
-            "client_id": "your-client-id",
-            "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-            "token_uri": "https://oauth2.googleapis.com/token",
-            "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-            "client_x509_cert_url": "your-client-cert-url"
-        }
+    def _connect_emulator(self, emulator_host):
+        """The emulator accepts any project and needs no credentials file"""
+        try:
+            from google.auth.credentials import AnonymousCredentials
+            from google.cloud import firestore as cloud_firestore
+
+            self.db = cloud_firestore.Client(
+                project=os.getenv('FIREBASE_PROJECT_ID', 'demo-self-checkout'),
+                credentials=AnonymousCredentials()
+            )
+            print(f"Firestore emulator connection initialized at {emulator_host}")
+        except Exception as e:
+            print(f"Error connecting to the Firestore emulator: {e}")
+            self.db = None
 
-        with open(self.credentials_path, 'w') as f:
-            json.dump(sample_credentials, f, indent=2)
+    def _raise_if_transient(self, error):
+        """Re-raise an error a retry may fix as TransientStorageError"""
+        if isinstance(error, TRANSIENT_ERRORS):
+            raise TransientStorageError(str(error)) from error
 
     def is_connected(self):
         return self.db is not None
@@ -59,32 +85,99 @@ class FirestoreManager:
 
             for doc in docs:
                 product_data = doc.to_dict()
-                products[product_data['name'].lower()] = product_data['price']
+                products[normalize_name(product_data['name'])] = product_data['price']
 
             return products
         except Exception as e:
             print(f"Error retrieving products from Firestore: {e}")
             return {}
 
+    def get_product_documents(self):
+        """Every product document as {'id', 'data'}, or None when the read fails"""
+        if not self.is_connected():
+            return None
+
+        try:
+            return [{'id': doc.id, 'data': doc.to_dict()} for doc in self.db.collection('products').stream()]
+        except Exception as e:
+            print(f"Error retrieving product documents from Firestore: {e}")
+            return None
+
+    def latest_product_update(self):
+        if not self.is_connected():
+            return None
+
+        try:
+            query = (self.db.collection('products')
+                     .order_by('updated_at', direction=firestore.Query.DESCENDING).limit(1))
+            for doc in query.stream():
+                return doc.to_dict().get('updated_at')
+            return None
+        except Exception as e:
+            print(f"Error retrieving latest product update from Firestore: {e}")
+            return None
+
+    def count_products(self):
+        """Server-side count of product documents, or None when unavailable"""
+        if not self.is_connected():
+            return None
+
+        try:
+            # Aggregation queries are billed per 1000 index entries, not per document
+            result = self.db.collection('products').count().get()
+            return int(result[0][0].value)
+        except Exception as e:
+            print(f"Error counting products in Firestore: {e}")
+            return None
+
+    def watch_products(self, on_changes, updated_after=None):
+        """Listen to the products collection and report only what changed.
+
+        on_changes receives a list of {'type', 'id', 'data'} dicts, where type
+        is ADDED, MODIFIED or REMOVED. The first call delivers the current
+        matching documents as ADDED changes; with updated_after only products
+        modified after that watermark are delivered. Returns the watch; call
+        unsubscribe() on it to stop listening.
+        """
+        if not self.is_connected():
+            return None
+
+        def on_snapshot(col_snapshot, changes, read_time):
+            try:
+                on_changes([{
+                    'type': change.type.name,
+                    'id': change.document.id,
+                    'data': change.document.to_dict()
+                } for change in changes])
+            except Exception as e:
+                print(f"Error applying product changes: {e}")
+
+        try:
+            query = self.db.collection('products')
+            if updated_after is not None:
+                query = query.where('updated_at', '>', updated_after)
+            return query.on_snapshot(on_snapshot)
+        except Exception as e:
+            print(f"Error watching products in Firestore: {e}")
+            return None
+
     def add_product(self, name, price):
         if not self.is_connected():
             return None
 
         try:
-            product_id = str(uuid.uuid4())
+            product_id = self.product_id_for(name)
             product_ref = self.db.collection('products').document(product_id)
 
             product_data = {
-                'name': name.lower(),
+                'name': normalize_name(name),
                 'price': price,
                 'created_at': firestore.SERVER_TIMESTAMP,
                 'updated_at': firestore.SERVER_TIMESTAMP
             }
 
-            product_ref.set(product_data)
-
-            product_doc = product_ref.get()
-            product_data = product_doc.to_dict()
+            # create() fails if the document exists, so the name stays unique server-side
+            product_ref.create(product_data)
 
             return {
                 'id': product_id,
@@ -93,118 +186,360 @@ class FirestoreManager:
             }
         except Exception as e:
             print(f"Error adding product to Firestore: {e}")
+            self._raise_if_transient(e)
             return None
 
-    def update_product(self, name, price):
+    def _find_product_id(self, name):
+        """Fallback lookup for products created before IDs were derived from names"""
+        docs = self.db.collection('products').where('name', '==', normalize_name(name)).limit(1).stream()
+        for doc in docs:
+            return doc.id
+        return None
+
+    def update_product(self, name, price, product_id=None):
         if not self.is_connected():
             return None
 
         try:
-            products_ref = self.db.collection('products')
-            query = products_ref.where('name', '==', name.lower())
-            docs = query.stream()
-
-            updated = False
-            product_id = None
-
-            for doc in docs:
-                product_id = doc.id
-                product_ref = products_ref.document(product_id)
-                product_ref.update({
-                    'price': price,
-                    'updated_at': firestore.SERVER_TIMESTAMP
-                })
-                updated = True
-                break
-
-            if updated:
-                return {
-                    'id': product_id,
-                    'name': name.lower(),
-                    'price': price
-                }
-            else:
+            product_id = product_id or self._find_product_id(name)
+            if product_id is None:
                 print(f"Product {name} not found in Firestore")
                 return None
+
+            # update() fails if the document does not exist
+            self.db.collection('products').document(product_id).update({
+                'price': price,
+                'updated_at': firestore.SERVER_TIMESTAMP
+            })
+
+            return {
+                'id': product_id,
+                'name': normalize_name(name),
+                'price': price
+            }
         except Exception as e:
             print(f"Error updating product in Firestore: {e}")
+            self._raise_if_transient(e)
             return None
 
-    def delete_product(self, name):
+    def delete_product(self, name, product_id=None):
         if not self.is_connected():
             return None
 
         try:
-            products_ref = self.db.collection('products')
-            query = products_ref.where('name', '==', name.lower())
-            docs = query.stream()
-
-            deleted = False
-            product_id = None
-
-            for doc in docs:
-                product_id = doc.id
-                products_ref.document(product_id).delete()
-                deleted = True
-                break
-
-            if deleted:
-                return {
-                    'id': product_id,
-                    'name': name.lower()
-                }
-            else:
+            product_id = product_id or self._find_product_id(name)
+            if product_id is None:
                 print(f"Product {name} not found in Firestore")
                 return None
+
+            self.db.collection('products').document(product_id).delete()
+
+            return {
+                'id': product_id,
+                'name': normalize_name(name)
+            }
         except Exception as e:
             print(f"Error deleting product from Firestore: {e}")
+            self._raise_if_transient(e)
             return None
 
-    def delete_all_products(self):
+    def write_products(self, products, max_workers=4):
+        """Upsert products in parallel batches of up to MAX_BATCH_WRITES documents.
+
+        products is a list of {'id', 'name', 'price', 'created'}; created marks
+        documents that do not exist yet. Returns {'written': [ids], 'failed':
+        {id: error}} so callers can report errors per row.
+        """
+        if not self.is_connected():
+            return {'written': [], 'failed': {product['id']: 'Firestore not connected' for product in products}}
+
+        def commit(chunk):
+            batch = self.db.batch()
+            for product in chunk:
+                data = {
+                    'name': product['name'],
+                    'price': product['price'],
+                    'updated_at': firestore.SERVER_TIMESTAMP
+                }
+                if product.get('created'):
+                    data['created_at'] = firestore.SERVER_TIMESTAMP
+                batch.set(self.db.collection('products').document(product['id']), data, merge=True)
+            batch.commit()
+
+        chunks = [products[start:start + self.MAX_BATCH_WRITES]
+                  for start in range(0, len(products), self.MAX_BATCH_WRITES)]
+        written = []
+        failed = {}
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {pool.submit(commit, chunk): chunk for chunk in chunks}
+            for future in futures:
+                chunk = futures[future]
+                try:
+                    future.result()
+                    written.extend(product['id'] for product in chunk)
+                except Exception as e:
+                    print(f"Error writing {len(chunk)} products to Firestore: {e}")
+                    failed.update({product['id']: str(e) for product in chunk})
+
+        return {'written': written, 'failed': failed}
+
+    def iter_product_documents(self, page_size=500):
+        """Yield product documents as {'id', 'data'} a page at a time, ordered by ID"""
+        if not self.is_connected():
+            return
+
+        query = self.db.collection('products').order_by(firestore.FieldPath.document_id()).limit(page_size)
+        last_doc = None
+        while True:
+            page = query.start_after(last_doc) if last_doc is not None else query
+            docs = list(page.stream())
+            for doc in docs:
+                yield {'id': doc.id, 'data': doc.to_dict()}
+            if len(docs) < page_size:
+                return
+            last_doc = docs[-1]
+
+    def _delete_references(self, references):
+        batch = self.db.batch()
+        for reference in references:
+            batch.delete(reference)
+        batch.commit()
+        return len(references)
+
+    def delete_collection(self, collection_name, page_size=500, max_workers=None, on_progress=None,
+                          should_stop=None):
+        """Delete every document of a collection in parallel batches.
+
+        Pages are read by document ID (names only, no fields) and each page is
+        deleted as one batch while the next page is fetched, with at most
+        max_workers batches in flight. Deleting is idempotent, so an
+        interrupted run is resumed by simply running it again.
+        Returns {'deleted_count', 'completed'}.
+        """
+        page_size = min(page_size, self.MAX_BATCH_WRITES)
+        max_workers = max_workers or self.bulk_delete_workers
+        collection = self.db.collection(collection_name)
+        deleted_count = 0
+        completed = False
+        last_doc = None
+        in_flight = set()
+
+        def collect(done):
+            nonlocal deleted_count
+            for future in done:
+                deleted_count += future.result()
+            if done and on_progress is not None:
+                on_progress({'collection': collection_name, 'deleted_count': deleted_count})
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            try:
+                while True:
+                    if should_stop is not None and should_stop():
+                        break
+
+                    query = collection.order_by(firestore.FieldPath.document_id()).select([]).limit(page_size)
+                    if last_doc is not None:
+                        # Skip past the IDs already handed out instead of re-scanning tombstones
+                        query = query.start_after(last_doc)
+                    docs = list(query.stream())
+                    if not docs:
+                        completed = True
+                        break
+
+                    last_doc = docs[-1]
+                    in_flight.add(pool.submit(self._delete_references, [doc.reference for doc in docs]))
+                    if len(in_flight) >= max_workers:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(done)
+            finally:
+                done, in_flight = wait(in_flight)
+                collect(done)
+
+        return {'deleted_count': deleted_count, 'completed': completed}
+
+    def delete_all_products(self, on_progress=None, page_size=500, max_workers=None):
         if not self.is_connected():
             return {'deleted_count': 0}
 
         try:
-            products_ref = self.db.collection('products')
-            docs = products_ref.stream()
-            
-            deleted_count = 0
-            for doc in docs:
-                doc.reference.delete()
-                deleted_count += 1
-            
-            print(f"Deleted {deleted_count} products from Firestore")
-            return {'deleted_count': deleted_count}
+            result = self.delete_collection('products', page_size, max_workers, on_progress)
+            print(f"Deleted {result['deleted_count']} products from Firestore")
+            return {'deleted_count': result['deleted_count'], 'completed': result['completed']}
         except Exception as e:
             print(f"Error deleting all products from Firestore: {e}")
-            return {'deleted_count': 0}
+            # Some batches may have been committed before the failure
+            return {'deleted_count': 0, 'completed': False, 'error': str(e)}
+
+    def _add_transaction_writes(self, batch, cart, total, checkout_id=None, timestamp=None, lane=None):
+        """Queue an order document and one document per cart line on the batch.
+
+        The order document is keyed by checkout_id and carries the items, so
+        history reads one document per order. Line documents keep the
+        checkout_id for per-product queries. The order is written with
+        create(), so replaying a checkout with the same caller-supplied
+        checkout_id fails the whole batch with AlreadyExists instead of
+        counting it into the rollups twice. Returns (checkout_id, line IDs).
+        """
+        checkout_id = checkout_id or uuid.uuid4().hex
+        timestamp = timestamp or firestore.SERVER_TIMESTAMP
+        transaction_ids = []
+        items = []
+
+        for index, (product_name, details) in enumerate(cart.items()):
+            transaction_id = f"{checkout_id}_{index:03d}"
+            transaction_ref = self.db.collection('transactions').document(transaction_id)
+
+            item = {
+                'name': product_name,
+                'price': details['price'],
+                'quantity': details['quantity'],
+                'subtotal': details['price'] * details['quantity']
+            }
+            items.append(item)
 
-    def save_transaction(self, cart, total):
+            transaction_data = dict(item)
+            transaction_data.update({
+                'total': total,
+                'timestamp': timestamp,
+                'checkout_id': checkout_id
+            })
+
+            batch.set(transaction_ref, transaction_data)
+            transaction_ids.append(transaction_id)
+
+        rollup_key = self.rollup_key(checkout_id, timestamp)
+        self._add_rollup_writes(batch, rollup_key, items, total)
+
+        order_data = {
+            'checkout_id': checkout_id,
+            'items': items,
+            'item_count': sum(item['quantity'] for item in items),
+            'total': total,
+            'timestamp': timestamp,
+            'rollup': rollup_key
+        }
+        if lane:
+            order_data['lane'] = lane
+        batch.create(self.db.collection('orders').document(checkout_id), order_data)
+
+        return checkout_id, transaction_ids
+
+    def _add_rollup_writes(self, batch, rollup_key, items, total, sign=1):
+        """Increment (or with sign=-1, decrement) the day/hour/product counters of one shard"""
+        units = sum(item['quantity'] for item in items)
+        products = {}
+        for item in items:
+            products[item['name']] = {
+                'revenue': firestore.Increment(sign * item['subtotal']),
+                'units': firestore.Increment(sign * item['quantity'])
+            }
+
+        rollup_ref = self.db.collection('sales_rollups').document(
+            f"{rollup_key['date']}_{rollup_key['shard']}"
+        )
+        batch.set(rollup_ref, {
+            'date': rollup_key['date'],
+            'shard': rollup_key['shard'],
+            'revenue': firestore.Increment(sign * total),
+            'units': firestore.Increment(sign * units),
+            'orders': firestore.Increment(sign),
+            'hours': {
+                str(rollup_key['hour']): {
+                    'revenue': firestore.Increment(sign * total),
+                    'units': firestore.Increment(sign * units),
+                    'orders': firestore.Increment(sign)
+                }
+            },
+            'products': products
+        }, merge=True)
+
+    def get_sales_summary(self, start_date, end_date):
+        """Sum the rollup shards for an inclusive range of YYYY-MM-DD dates"""
         if not self.is_connected():
             return None
 
         try:
-            # Create separate transaction documents for each item
-            transaction_ids = []
-            
-            for product_name, details in cart.items():
-                transaction_id = str(uuid.uuid4())
-                transaction_ref = self.db.collection('transactions').document(transaction_id)
-                
-                transaction_data = {
-                    'name': product_name,
-                    'price': details['price'],
-                    'quantity': details['quantity'],
-                    'subtotal': details['price'] * details['quantity'],
-                    'total': total,
-                    'timestamp': firestore.SERVER_TIMESTAMP
-                }
-                
-                transaction_ref.set(transaction_data)
-                transaction_ids.append(transaction_id)
+            if isinstance(start_date, datetime.date):
+                start_date = start_date.strftime('%Y-%m-%d')
+            if isinstance(end_date, datetime.date):
+                end_date = end_date.strftime('%Y-%m-%d')
+
+            query = (self.db.collection('sales_rollups')
+                     .where('date', '>=', start_date)
+                     .where('date', '<=', end_date))
+
+            days = {}
+            hours = {hour: {'revenue': 0, 'units': 0, 'orders': 0} for hour in range(24)}
+            products = {}
+            documents = 0
+
+            for doc in query.stream():
+                data = doc.to_dict()
+                documents += 1
+
+                day = days.setdefault(data['date'], {'date': data['date'], 'revenue': 0, 'units': 0, 'orders': 0})
+                for field in ('revenue', 'units', 'orders'):
+                    day[field] += data.get(field, 0)
+
+                for hour, counters in data.get('hours', {}).items():
+                    for field in ('revenue', 'units', 'orders'):
+                        hours[int(hour)][field] += counters.get(field, 0)
+
+                for name, counters in data.get('products', {}).items():
+                    product = products.setdefault(name, {'revenue': 0, 'units': 0})
+                    product['revenue'] += counters.get('revenue', 0)
+                    product['units'] += counters.get('units', 0)
+
+            daily = sorted(days.values(), key=lambda day: day['date'])
+            return {
+                'start_date': start_date,
+                'end_date': end_date,
+                'totals': {
+                    'revenue': sum(day['revenue'] for day in daily),
+                    'units': sum(day['units'] for day in daily),
+                    'orders': sum(day['orders'] for day in daily)
+                },
+                'days': daily,
+                'hours': [dict(hours[hour], hour=hour) for hour in range(24)],
+                'products': products,
+                'documents_read': documents
+            }
+        except Exception as e:
+            print(f"Error retrieving sales summary from Firestore: {e}")
+            self._raise_if_transient(e)
+            return None
+
+    def _order_from_doc(self, doc):
+        data = doc.to_dict()
+        return {
+            'id': doc.id,
+            'items': data.get('items', []),
+            'total': data.get('total', 0),
+            'timestamp': data.get('timestamp')
+        }
+
+    def save_transaction(self, cart, total, checkout_id=None, timestamp=None):
+        if not self.is_connected():
+            return None
+
+        if self.count_checkout_writes(cart) > self.MAX_BATCH_WRITES:
+            print(f"Transaction has {len(cart)} lines, more than one batch allows")
+            return None
+
+        try:
+            # The order and its lines are committed together in a single atomic
+            # round-trip and share the same server timestamp
+            batch = self.db.batch()
+            checkout_id, transaction_ids = self._add_transaction_writes(batch, cart, total, checkout_id, timestamp)
+            try:
+                batch.commit()
+            except google_exceptions.AlreadyExists:
+                print(f"Transaction {checkout_id} was already saved")
+            self.history_cache.invalidate_order_added(timestamp)
             
-            # Return the list of created transaction IDs
+            # Return the order ID and the list of created line IDs
             return {
+                'checkout_id': checkout_id,
                 'transaction_ids': transaction_ids,
                 'total': total,
                 'timestamp': datetime.datetime.now()
@@ -213,99 +548,190 @@ class FirestoreManager:
             print(f"Error saving transaction to Firestore: {e}")
             return None
 
+    def save_transactions(self, checkouts):
+        """Write several queued checkouts in one batch.
+
+        Each checkout is a dict with checkout_id, cart, total, timestamp and
+        optionally lane. Returns the list of checkout IDs written, or None on
+        failure. Checkouts that were already saved count as written and are
+        not counted into the rollups again.
+        """
+        if not self.is_connected():
+            return None
+
+        self.validate_checkouts(checkouts)
+        writes = sum(self.count_checkout_writes(checkout['cart']) for checkout in checkouts)
+        if writes > self.MAX_BATCH_WRITES:
+            print(f"{len(checkouts)} checkouts need {writes} writes, more than one batch allows")
+            return None
+
+        try:
+            try:
+                self._commit_checkouts(checkouts)
+            except google_exceptions.AlreadyExists:
+                # A replay: the batch was rejected as a whole, so write only the orders still missing
+                refs = [self.db.collection('orders').document(checkout['checkout_id']) for checkout in checkouts]
+                existing = {doc.id for doc in self.db.get_all(refs) if doc.exists}
+                print(f"{len(existing)} of {len(checkouts)} checkouts were already saved, skipping them")
+                remaining = [checkout for checkout in checkouts if checkout['checkout_id'] not in existing]
+                if remaining:
+                    self._commit_checkouts(remaining)
+            return [checkout['checkout_id'] for checkout in checkouts]
+        except google_exceptions.InvalidArgument as e:
+            # Firestore does not say which document it rejected
+            print(f"Firestore rejected queued transactions: {e}")
+            raise InvalidCheckoutError({checkout['checkout_id']: str(e) for checkout in checkouts})
+        except Exception as e:
+            print(f"Error saving queued transactions to Firestore: {e}")
+            self._raise_if_transient(e)
+            return None
+
+    def _commit_checkouts(self, checkouts):
+        batch = self.db.batch()
+        for checkout in checkouts:
+            self._add_transaction_writes(
+                batch, checkout['cart'], checkout['total'],
+                checkout['checkout_id'], checkout.get('timestamp'), checkout.get('lane')
+            )
+        batch.commit()
+        for checkout in checkouts:
+            self.history_cache.invalidate_order_added(checkout.get('timestamp'))
+
     def get_transactions(self, limit=20):
         if not self.is_connected():
             return []
 
-        try:
-            transactions_ref = self.db.collection('transactions')
-            query = transactions_ref.order_by('timestamp', direction=firestore.Query.DESCENDING).limit(limit)
-            docs = query.stream()
+        def load():
+            # One document per order, so the limit counts orders rather than lines
+            orders_ref = self.db.collection('orders')
+            query = orders_ref.order_by('timestamp', direction=firestore.Query.DESCENDING).limit(limit)
+            transactions = [self._order_from_doc(doc) for doc in query.stream()]
+            return transactions, [transaction['id'] for transaction in transactions]
 
-            # Group transactions by timestamp and total to reconstruct cart transactions
-            grouped_transactions = {}
-            
-            for doc in docs:
-                data = doc.to_dict()
-                timestamp = data.get('timestamp')
-                total = data.get('total', 0)
-                
-                # Create a key from timestamp and total to group items
-                if timestamp:
-                    key = f"{timestamp}_{total}"
-                    
-                    if key not in grouped_transactions:
-                        grouped_transactions[key] = {
-                            'id': doc.id,  # Use first doc id as transaction id
-                            'items': [],
-                            'total': total,
-                            'timestamp': timestamp
-                        }
-                    
-                    # Add item to the transaction
-                    grouped_transactions[key]['items'].append({
-                        'name': data.get('name', ''),
-                        'price': data.get('price', 0),
-                        'quantity': data.get('quantity', 0),
-                        'subtotal': data.get('subtotal', 0)
-                    })
-            
-            # Convert to list and sort by timestamp
-            transactions = list(grouped_transactions.values())
-            transactions.sort(key=lambda x: x['timestamp'] if x['timestamp'] else datetime.datetime.min, reverse=True)
-            
-            return transactions[:limit]
+        try:
+            return self.history_cache.get_or_load(('latest', limit), load)
         except Exception as e:
             print(f"Error retrieving transactions from Firestore: {e}")
+            self._raise_if_transient(e)
             return []
 
-    def get_transactions_by_date_range(self, start_date, end_date):
+    def _orders_query(self, start=None, end=None):
+        query = self.db.collection('orders')
+        if start is not None and end is not None:
+            query = query.where('timestamp', '>=', start).where('timestamp', '<', end)
+        return query.order_by('timestamp', direction=firestore.Query.DESCENDING)
+
+    def get_transactions_page(self, page_size=20, start_after=None, start_date=None, end_date=None):
+        """One page of orders, newest first.
+
+        start_after is the next_page_token of the previous page (an order ID).
+        next_page_token is None once the last page has been returned.
+        """
+        empty_page = {'transactions': [], 'next_page_token': None}
         if not self.is_connected():
-            return []
+            return empty_page
 
         try:
-            transactions_ref = self.db.collection('transactions')
+            start, end = self._parse_date_range(start_date, end_date)
+        except ValueError as e:
+            print(f"Invalid date range: {e}")
+            return empty_page
+
+        def load():
+            query = self._orders_query(start, end)
+            if start_after:
+                cursor = self.db.collection('orders').document(start_after).get()
+                if not cursor.exists:
+                    print(f"Page token {start_after} no longer exists")
+                    return empty_page, []
+                query = query.start_after(cursor)
+
+            # Fetch one extra order to know whether another page follows
+            docs = list(query.limit(page_size + 1).stream())
+            transactions = [self._order_from_doc(doc) for doc in docs[:page_size]]
+            next_page_token = transactions[-1]['id'] if len(docs) > page_size else None
+            page = {'transactions': transactions, 'next_page_token': next_page_token}
+            return page, [transaction['id'] for transaction in transactions]
 
-            if isinstance(start_date, str):
-                start_date = datetime.datetime.fromisoformat(start_date)
-            if isinstance(end_date, str):
-                end_date = datetime.datetime.fromisoformat(end_date)
+        try:
+            return self.history_cache.get_or_load(
+                ('page', page_size, start_after, start, end), load,
+                start_date=start, end_date=end, start_after=start_after
+            )
+        except Exception as e:
+            print(f"Error retrieving transaction page from Firestore: {e}")
+            self._raise_if_transient(e)
+            return empty_page
+
+    def iter_transaction_pages(self, page_size=100, start_date=None, end_date=None, start_after=None):
+        """Yield pages of orders until the range is exhausted.
+
+        Only one page is held at a time, so memory does not grow with the
+        size of the range. The cursor snapshot is carried between pages, so
+        no extra read is needed per page. start_after is an order ID or a
+        (timestamp, order ID) pair, which still works once the order is
+        deleted; a missing order ID raises ValueError.
+        """
+        if not self.is_connected():
+            return
+
+        start, end = self._parse_date_range(start_date, end_date)
+        query = self._orders_query(start, end)
+        if start_after:
+            pair = isinstance(start_after, (tuple, list))
+            cursor = self.db.collection('orders').document(start_after[1] if pair else start_after).get()
+            if cursor.exists:
+                query = query.start_after(cursor)
+            elif pair:
+                # Orders tie-break on document ID in the direction of the last ordering
+                document_id = firestore.FieldPath.document_id()
+                query = query.order_by(document_id, direction=firestore.Query.DESCENDING).start_after(
+                    {'timestamp': start_after[0], document_id: cursor.reference}
+                )
+            else:
+                raise ValueError(f"Cursor order {start_after} no longer exists")
 
-            end_date = end_date + datetime.timedelta(days=1)
+        while True:
+            docs = list(query.limit(page_size).stream())
+            if not docs:
+                return
 
-            query = transactions_ref.where('timestamp', '>=', start_date).where('timestamp', '<', end_date)
-            docs = query.stream()
+            yield [self._order_from_doc(doc) for doc in docs]
+            if len(docs) < page_size:
+                return
+            query = self._orders_query(start, end).start_after(docs[-1])
 
-            # Group transactions by timestamp and total
-            grouped_transactions = {}
-            
-            for doc in docs:
-                data = doc.to_dict()
-                timestamp = data.get('timestamp')
-                total = data.get('total', 0)
-                
-                if timestamp:
-                    key = f"{timestamp}_{total}"
-                    
-                    if key not in grouped_transactions:
-                        grouped_transactions[key] = {
-                            'id': doc.id,
-                            'items': [],
-                            'total': total,
-                            'timestamp': timestamp
-                        }
-                    
-                    grouped_transactions[key]['items'].append({
-                        'name': data.get('name', ''),
-                        'price': data.get('price', 0),
-                        'quantity': data.get('quantity', 0),
-                        'subtotal': data.get('subtotal', 0)
-                    })
-            
-            transactions = list(grouped_transactions.values())
-            transactions.sort(key=lambda x: x['timestamp'] if x['timestamp'] else datetime.datetime.min, reverse=True)
-            
-            return transactions
+    def get_transactions_by_date_range(self, start_date, end_date):
+        if not self.is_connected():
+            return []
+
+        page_size = 100
+        try:
+            start, end = self._parse_date_range(start_date, end_date)
+            transactions = []
+            cursor_id = None
+            last_doc = None
+            while True:
+                # A range is unbounded in size, so it is cached one bounded page at a time
+                def load(last_doc=last_doc):
+                    query = self._orders_query(start, end)
+                    if last_doc is not None:
+                        query = query.start_after(last_doc)
+                    docs = list(query.limit(page_size).stream())
+                    orders = [self._order_from_doc(doc) for doc in docs]
+                    # Keep the last snapshot so the next page needs no cursor read
+                    page = {'transactions': orders, 'last_doc': docs[-1] if len(docs) == page_size else None}
+                    return page, [order['id'] for order in orders]
+
+                page = self.history_cache.get_or_load(
+                    ('range', start, end, cursor_id, page_size), load,
+                    start_date=start, end_date=end, start_after=cursor_id
+                )
+                transactions.extend(page['transactions'])
+                last_doc = page['last_doc']
+                if last_doc is None:
+                    return transactions
+                cursor_id = page['transactions'][-1]['id']
         except Exception as e:
             print(f"Error retrieving transactions by date range from Firestore: {e}")
             return []
@@ -315,76 +741,61 @@ class FirestoreManager:
             return False
 
         try:
-            transaction_ref = self.db.collection('transactions').document(transaction_id)
-            transaction_doc = transaction_ref.get()
+            order_ref = self.db.collection('orders').document(transaction_id)
+            order_doc = order_ref.get()
 
-            if not transaction_doc.exists:
+            if not order_doc.exists:
                 print(f"Transaction {transaction_id} not found in Firestore")
                 return False
 
-            transaction_ref.delete()
+            # The order, its line documents and its rollup counts go in one atomic batch
+            batch = self.db.batch()
+            lines = self.db.collection('transactions').where('checkout_id', '==', transaction_id).stream()
+            for line in lines:
+                batch.delete(line.reference)
+            order_data = order_doc.to_dict()
+            if order_data.get('rollup'):
+                self._add_rollup_writes(batch, order_data['rollup'], order_data.get('items', []),
+                                        order_data.get('total', 0), sign=-1)
+            batch.delete(order_ref)
+            batch.commit()
+            self.history_cache.invalidate_order_removed(transaction_id)
             return True
         except Exception as e:
             print(f"Error deleting transaction from Firestore: {e}")
+            self._raise_if_transient(e)
             return False
 
-    def delete_all_transactions(self):
+    def delete_all_transactions(self, on_progress=None, page_size=500, max_workers=None):
         if not self.is_connected():
             return {'deleted_count': 0}
 
         try:
-            transactions_ref = self.db.collection('transactions')
-            docs = transactions_ref.stream()
-            
-            deleted_count = 0
-            for doc in docs:
-                doc.reference.delete()
-                deleted_count += 1
-            
-            print(f"Deleted {deleted_count} transactions from Firestore")
-            return {'deleted_count': deleted_count}
+            deleted_count = self.delete_collection('orders', page_size, max_workers, on_progress)['deleted_count']
+            deleted_lines = self.delete_collection('transactions', page_size, max_workers, on_progress)['deleted_count']
+            self.delete_collection('sales_rollups', page_size, max_workers, on_progress)
+
+            print(f"Deleted {deleted_count} orders ({deleted_lines} lines) from Firestore")
+            return {'deleted_count': deleted_count, 'deleted_lines': deleted_lines}
         except Exception as e:
             print(f"Error deleting all transactions from Firestore: {e}")
             return {'deleted_count': 0}
+        finally:
+            # Even a partial delete leaves every cached listing stale
+            self.history_cache.clear()
 
     def get_transaction_by_id(self, transaction_id):
         if not self.is_connected():
             return None
 
         try:
-            # First, try to get the specific document
-            transaction_ref = self.db.collection('transactions').document(transaction_id)
-            transaction_doc = transaction_ref.get()
+            order_doc = self.db.collection('orders').document(transaction_id).get()
 
-            if not transaction_doc.exists:
+            if not order_doc.exists:
                 print(f"Transaction {transaction_id} not found in Firestore")
                 return None
 
-            data = transaction_doc.to_dict()
-            timestamp = data.get('timestamp')
-            total = data.get('total', 0)
-            
-            # Find all items with the same timestamp and total
-            transactions_ref = self.db.collection('transactions')
-            query = transactions_ref.where('timestamp', '==', timestamp).where('total', '==', total)
-            docs = query.stream()
-            
-            items = []
-            for doc in docs:
-                item_data = doc.to_dict()
-                items.append({
-                    'name': item_data.get('name', ''),
-                    'price': item_data.get('price', 0),
-                    'quantity': item_data.get('quantity', 0),
-                    'subtotal': item_data.get('subtotal', 0)
-                })
-            
-            return {
-                'id': transaction_id,
-                'items': items,
-                'total': total,
-                'timestamp': timestamp
-            }
+            return self._order_from_doc(order_doc)
         except Exception as e:
             print(f"Error retrieving transaction from Firestore: {e}")
             return None
@@ -0,0 +1,93 @@
+import cv2
+import time
+import zlib
+from collections import deque
+
+
+class FrameMonitor:
+    """Tracks capture health: frozen frames, delivered vs expected FPS and dropped frames"""
+
+    def __init__(self, expected_fps=30, freeze_timeout=2.0, window=2.0):
+        self.expected_fps = expected_fps
+        self.freeze_timeout = freeze_timeout
+        self.window = window
+        self.fingerprint_size = (32, 24)
+        self.reset()
+
+    def reset(self):
+        self.timestamps = deque()
+        self.last_fingerprint = None
+        self.last_change_time = None
+        self.last_capture_time = None
+        self.frames = 0
+        self.dropped_frames = 0
+        self.frozen_frames = 0
+        self.is_frozen = False
+        self.stall_count = 0
+        self.last_stall = None
+
+    def set_expected_fps(self, fps):
+        if fps and fps > 0:
+            self.expected_fps = fps
+
+    def _fingerprint(self, frame):
+        if isinstance(frame, bytes):
+            # Compressed passthrough frames: identical bitstreams mean a frozen sensor
+            return zlib.crc32(frame)
+        thumb = cv2.resize(frame, self.fingerprint_size, interpolation=cv2.INTER_AREA)
+        return zlib.crc32(thumb.tobytes())
+
+    def observe(self, frame, capture_time=None):
+        """Record a captured frame. Returns a stall reason string when the stream has frozen."""
+        now = capture_time if capture_time is not None else time.monotonic()
+        self.frames += 1
+
+        if self.last_capture_time is not None and self.expected_fps > 0:
+            # Gaps longer than one and a half periods mean the driver skipped frames
+            period = 1.0 / self.expected_fps
+            interval = now - self.last_capture_time
+            if interval > period * 1.5:
+                self.dropped_frames += int(round(interval / period)) - 1
+        self.last_capture_time = now
+
+        self.timestamps.append(now)
+        while self.timestamps and now - self.timestamps[0] > self.window:
+            self.timestamps.popleft()
+
+        fingerprint = self._fingerprint(frame)
+        if fingerprint != self.last_fingerprint or self.last_change_time is None:
+            self.last_fingerprint = fingerprint
+            self.last_change_time = now
+            self.is_frozen = False
+            return None
+
+        self.frozen_frames += 1
+        if now - self.last_change_time >= self.freeze_timeout:
+            # Re-arm so a camera that stays frozen keeps triggering reconnects
+            self.is_frozen = True
+            self.last_change_time = now
+            return self.record_stall('frozen')
+        return None
+
+    def record_stall(self, reason):
+        self.stall_count += 1
+        self.last_stall = {'reason': reason, 'time': time.time()}
+        return reason
+
+    def get_delivered_fps(self):
+        if len(self.timestamps) < 2:
+            return 0.0
+        span = self.timestamps[-1] - self.timestamps[0]
+        return (len(self.timestamps) - 1) / span if span > 0 else 0.0
+
+    def get_stats(self):
+        return {
+            'expected_fps': self.expected_fps,
+            'delivered_fps': round(self.get_delivered_fps(), 2),
+            'frames': self.frames,
+            'dropped_frames': self.dropped_frames,
+            'frozen_frames': self.frozen_frames,
+            'is_frozen': self.is_frozen,
+            'stall_count': self.stall_count,
+            'last_stall': self.last_stall
+        }
@@ -0,0 +1,93 @@
+import time
+from contextlib import contextmanager
+
+from Metrics import Histogram
+
+
+class FrameScheduler:
+    """Paces a loop against monotonic deadlines, dropping frames instead of drifting"""
+
+    DURATION_BUCKETS_MS = [1, 2, 5, 10, 20, 33, 50, 100, 250]
+    JITTER_BUCKETS_MS = [0.5, 1, 2, 5, 10, 20, 50]
+
+    def __init__(self, target_fps=30):
+        self.set_target_fps(target_fps)
+        self.next_deadline = None
+        self.frame_start = None
+
+        self.frames = 0
+        self.overruns = 0
+        self.dropped_frames = 0
+        self.frame_time_histogram = Histogram(self.DURATION_BUCKETS_MS)
+        self.jitter_histogram = Histogram(self.JITTER_BUCKETS_MS)
+        self.stage_histograms = {}
+        self.stage_overruns = {}
+
+    def set_target_fps(self, target_fps):
+        # A target of 0 (or less) runs the loop as fast as possible
+        self.target_fps = target_fps
+        self.period = 1.0 / target_fps if target_fps and target_fps > 0 else 0.0
+
+    def reset(self):
+        """Forget the current deadline, e.g. after the loop was idle"""
+        self.next_deadline = None
+        self.frame_start = None
+
+    def begin_frame(self):
+        now = time.monotonic()
+        if self.next_deadline is not None and self.period > 0:
+            self.jitter_histogram.observe(abs(now - self.next_deadline) * 1000)
+        if self.next_deadline is None:
+            self.next_deadline = now
+        self.frame_start = now
+
+    @contextmanager
+    def stage(self, name):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            if name not in self.stage_histograms:
+                self.stage_histograms[name] = Histogram(self.DURATION_BUCKETS_MS)
+                self.stage_overruns[name] = 0
+            self.stage_histograms[name].observe(elapsed * 1000)
+            if self.period > 0 and elapsed > self.period:
+                self.stage_overruns[name] += 1
+
+    def wait_for_next_frame(self):
+        now = time.monotonic()
+        self.frames += 1
+        if self.frame_start is not None:
+            self.frame_time_histogram.observe((now - self.frame_start) * 1000)
+
+        if self.period <= 0:
+            self.next_deadline = now
+            return
+
+        self.next_deadline += self.period
+        if now > self.next_deadline:
+            # Behind schedule: skip the missed slots so the cadence stays aligned
+            self.overruns += 1
+            missed = int((now - self.next_deadline) / self.period) + 1
+            self.dropped_frames += missed
+            self.next_deadline += missed * self.period
+
+        time.sleep(max(0.0, self.next_deadline - time.monotonic()))
+
+    def get_stats(self):
+        return {
+            'target_fps': self.target_fps,
+            'frames': self.frames,
+            'overruns': self.overruns,
+            'dropped_frames': self.dropped_frames,
+            'frame_time_ms': self.frame_time_histogram.snapshot(),
+            'jitter_ms': self.jitter_histogram.snapshot(),
+            'stages': {
+                name: {
+                    'duration_ms': histogram.snapshot(),
+                    'overruns': self.stage_overruns[name]
+                }
+                for name, histogram in self.stage_histograms.items()
+            }
+        }
@@ -0,0 +1,265 @@
+import cv2
+import os
+import re
+import threading
+import time
+import numpy as np
+
+from CameraHandler import Camera
+
+
+class FrameSource:
+    """Base class for non-device frame sources exposing the same interface as Camera"""
+
+    def __init__(self, source_id, fps=30, pacing='realtime', frame_size=(640, 480)):
+        self.camera_id = source_id
+        self.fps = fps
+        self.pacing = pacing
+        self.is_running = False
+        self.is_stale = False
+        self.frame = None
+        self.lock = threading.Lock()
+        self.frame_width, self.frame_height = frame_size
+        self.frame_index = 0
+        self.next_frame_time = 0
+        self.on_stall = None
+
+    def _open(self):
+        return True
+
+    def _close(self):
+        pass
+
+    def _next_frame(self):
+        raise NotImplementedError
+
+    def start(self):
+        if self.is_running:
+            return True
+
+        try:
+            if not self._open():
+                print(f"Failed to open frame source {self.camera_id}")
+                return False
+        except Exception as e:
+            print(f"Frame source start error: {e}")
+            return False
+
+        self.is_running = True
+        self.frame_index = 0
+        self.next_frame_time = time.monotonic()
+        print(f"Frame source {self.camera_id} started: {self.frame_width}x{self.frame_height} "
+              f"({self.pacing} pacing)")
+        return True
+
+    def stop(self):
+        self.is_running = False
+        self._close()
+        print(f"Frame source {self.camera_id} stopped")
+        return True
+
+    def _wait_for_next_frame(self):
+        if self.pacing != 'realtime' or self.fps <= 0:
+            return
+
+        now = time.monotonic()
+        if self.next_frame_time > now:
+            time.sleep(self.next_frame_time - now)
+        # Never let the schedule fall more than one frame behind
+        self.next_frame_time = max(self.next_frame_time, now - 1.0 / self.fps) + 1.0 / self.fps
+
+    def read(self):
+        if not self.is_running:
+            return False, None
+
+        try:
+            self._wait_for_next_frame()
+            frame = self._next_frame()
+            if frame is None:
+                return False, None
+
+            self.frame_index += 1
+            with self.lock:
+                self.frame = frame
+            return True, frame
+        except Exception as e:
+            print(f"Frame source read error: {e}")
+            return False, None
+
+    def get_dimensions(self):
+        return (self.frame_width, self.frame_height)
+
+    def get_latest_frame(self):
+        with self.lock:
+            if self.frame is not None:
+                return self.frame.copy()
+            return None
+
+    def is_available(self):
+        return self.is_running
+
+    def get_capture_stats(self):
+        return {
+            'camera_id': self.camera_id,
+            'expected_fps': self.fps if self.pacing == 'realtime' else None,
+            'frames': self.frame_index,
+            'stale': False
+        }
+
+    def get_camera_info(self):
+        if not self.is_available():
+            return None
+
+        return {
+            'width': self.frame_width,
+            'height': self.frame_height,
+            'fps': self.fps,
+            'backend': type(self).__name__,
+            'camera_id': self.camera_id
+        }
+
+
+class VideoFileSource(FrameSource):
+    """Loops a video file, paced at the file's frame rate or as fast as possible"""
+
+    def __init__(self, path, fps=None, pacing='realtime', loop=True):
+        super().__init__(f"video:{path}", fps=fps or 30, pacing=pacing)
+        self.path = path
+        self.loop = loop
+        self.fixed_fps = fps
+        self.cap = None
+
+    def _open(self):
+        self.cap = cv2.VideoCapture(self.path)
+        if not self.cap.isOpened():
+            self.cap = None
+            return False
+
+        self.frame_width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.frame_height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        if not self.fixed_fps:
+            file_fps = self.cap.get(cv2.CAP_PROP_FPS)
+            self.fps = file_fps if file_fps and file_fps > 0 else 30
+        return True
+
+    def _close(self):
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+    def _next_frame(self):
+        if self.cap is None:
+            return None
+
+        ret, frame = self.cap.read()
+        if not ret and self.loop:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ret, frame = self.cap.read()
+        return frame if ret else None
+
+
+class ImageDirectorySource(FrameSource):
+    """Cycles through the images of a directory in name order"""
+
+    IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+
+    def __init__(self, directory, fps=30, pacing='realtime', loop=True):
+        super().__init__(f"images:{directory}", fps=fps, pacing=pacing)
+        self.directory = directory
+        self.loop = loop
+        self.images = []
+
+    def _open(self):
+        if not os.path.isdir(self.directory):
+            return False
+
+        paths = sorted(
+            os.path.join(self.directory, name) for name in os.listdir(self.directory)
+            if name.lower().endswith(self.IMAGE_EXTENSIONS)
+        )
+
+        # Decode once up front so reads measure the pipeline, not disk I/O
+        self.images = [image for image in (cv2.imread(path) for path in paths) if image is not None]
+        if not self.images:
+            return False
+
+        self.frame_height, self.frame_width = self.images[0].shape[:2]
+        return True
+
+    def _close(self):
+        self.images = []
+
+    def _next_frame(self):
+        if not self.images:
+            return None
+        if self.frame_index >= len(self.images) and not self.loop:
+            return None
+        return self.images[self.frame_index % len(self.images)].copy()
+
+
+class SyntheticSource(FrameSource):
+    """Generates deterministic frames with boxes moving across the conveyor"""
+
+    def __init__(self, fps=30, pacing='realtime', frame_size=(640, 480), num_objects=3, seed=0):
+        super().__init__('synthetic', fps=fps, pacing=pacing, frame_size=frame_size)
+        rng = np.random.default_rng(seed)
+        self.objects = [{
+            'y': int(rng.integers(40, max(41, frame_size[1] - 140))),
+            'size': int(rng.integers(60, 120)),
+            'speed': int(rng.integers(3, 12)),
+            'offset': int(rng.integers(0, frame_size[0])),
+            'color': tuple(int(c) for c in rng.integers(60, 255, size=3))
+        } for _ in range(num_objects)]
+        self.background = np.full((frame_size[1], frame_size[0], 3), (45, 45, 45), dtype=np.uint8)
+
+    def _next_frame(self):
+        frame = self.background.copy()
+        span = self.frame_width + 200
+
+        for obj in self.objects:
+            x = (obj['offset'] + self.frame_index * obj['speed']) % span - 100
+            cv2.rectangle(frame, (x, obj['y']), (x + obj['size'], obj['y'] + obj['size']), obj['color'], -1)
+
+        cv2.putText(frame, f"SYNTHETIC #{self.frame_index}", (10, 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, (255, 255, 255), 2)
+        return frame
+
+
+def parse_synthetic_spec(spec):
+    """(frame_size, fps) from the part after "synthetic:", e.g. "1280x720@15", "1280x720" or "@15".
+
+    Either part may be omitted (None); anything else raises ValueError.
+    """
+    match = re.fullmatch(r'(?:(\d+)x(\d+))?(?:@(\d+(?:\.\d+)?))?', spec.strip())
+    if not spec.strip() or match is None:
+        raise ValueError(f"Invalid synthetic source spec '{spec}', expected WIDTHxHEIGHT@FPS")
+    width, height, fps = match.groups()
+    frame_size = (int(width), int(height)) if width else None
+    if frame_size is not None and min(frame_size) <= 0:
+        raise ValueError(f"Invalid synthetic frame size {width}x{height}")
+    fps = float(fps) if fps else None
+    if fps is not None and fps <= 0:
+        raise ValueError(f"Invalid synthetic frame rate {fps}")
+    return frame_size, fps
+
+
+def create_camera(source, fps=None, pacing='realtime', passthrough=False, decode_scale=1):
+    """Build a camera from a CAMERA_ID-style spec.
+
+    Supported forms: a device index ("0"), "video:<path>", "images:<directory>"
+    and "synthetic[:WIDTHxHEIGHT][@FPS]", e.g. "synthetic:1280x720@15". A rate
+    in the spec overrides fps.
+    """
+    source = str(source).strip()
+
+    if source.startswith('video:'):
+        return VideoFileSource(source[len('video:'):], fps=fps, pacing=pacing)
+    if source.startswith('images:'):
+        return ImageDirectorySource(source[len('images:'):], fps=fps or 30, pacing=pacing)
+    if source == 'synthetic':
+        return SyntheticSource(fps=fps or 30, pacing=pacing)
+    if source.startswith('synthetic:'):
+        frame_size, spec_fps = parse_synthetic_spec(source[len('synthetic:'):])
+        return SyntheticSource(fps=spec_fps or fps or 30, pacing=pacing, frame_size=frame_size or (640, 480))
+
+    return Camera(int(source), passthrough=passthrough, decode_scale=decode_scale)
@@ -0,0 +1,136 @@
+import datetime
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+def _as_utc(value):
+    if value is None or not isinstance(value, datetime.datetime):
+        return value
+    if value.tzinfo is None:
+        return value.replace(tzinfo=datetime.timezone.utc)
+    return value.astimezone(datetime.timezone.utc)
+
+
+class HistoryCache:
+    """Read-through TTL/LRU cache for transaction history queries.
+
+    Entries remember which orders they hold, which order they start after and
+    which date range they cover, so a new or deleted order only evicts the
+    entries it can actually change. Identical concurrent misses share a
+    single backend query.
+    """
+
+    def __init__(self, ttl=30.0, max_entries=128):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.in_flight = {}
+        self.lock = threading.Lock()
+        # Bumped by every invalidation so loads that raced with it are not stored
+        self.generation = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.invalidations = 0
+
+    def get_or_load(self, key, loader, start_date=None, end_date=None, start_after=None):
+        """Return the cached value for key, or run loader() once for all concurrent callers.
+
+        loader must return (value, order_ids). start_date/end_date describe the
+        range a date query covers; start_after is the order a page starts
+        after, so deleting that order evicts the page.
+        """
+        now = time.monotonic()
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry['expires'] > now:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry['value']
+
+            future = self.in_flight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                owner = False
+            else:
+                self.misses += 1
+                future = Future()
+                self.in_flight[key] = future
+                generation = self.generation
+                owner = True
+
+        if not owner:
+            return future.result()
+
+        try:
+            value, order_ids = loader()
+        except Exception as e:
+            with self.lock:
+                self.in_flight.pop(key, None)
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            self.in_flight.pop(key, None)
+            if generation == self.generation:
+                self.entries[key] = {
+                    'value': value,
+                    'expires': time.monotonic() + self.ttl,
+                    'order_ids': set(order_ids),
+                    'start_after': start_after,
+                    'start_date': _as_utc(start_date),
+                    'end_date': _as_utc(end_date)
+                }
+                self.entries.move_to_end(key)
+                while len(self.entries) > self.max_entries:
+                    self.entries.popitem(last=False)
+        future.set_result(value)
+        return value
+
+    def _evict(self, predicate):
+        with self.lock:
+            self.generation += 1
+            stale = [key for key, entry in self.entries.items() if predicate(entry)]
+            for key in stale:
+                del self.entries[key]
+            self.invalidations += len(stale)
+        return len(stale)
+
+    def invalidate_order_added(self, timestamp=None):
+        """A new order can appear in any entry whose range covers its timestamp.
+
+        Queued checkouts are replicated with the time of the sale, so a new
+        order may land on any page, not just the head of a listing; entries
+        without a date range are always evicted.
+        """
+        timestamp = _as_utc(timestamp or datetime.datetime.now(datetime.timezone.utc))
+
+        def affected(entry):
+            if entry['start_date'] is None or entry['end_date'] is None:
+                return True
+            return entry['start_date'] <= timestamp < entry['end_date']
+
+        return self._evict(affected)
+
+    def invalidate_order_removed(self, order_id):
+        """A deleted order changes the entries holding it and pages that start after it"""
+        return self._evict(
+            lambda entry: order_id in entry['order_ids'] or entry['start_after'] == order_id
+        )
+
+    def clear(self):
+        return self._evict(lambda entry: True)
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'in_flight': len(self.in_flight),
+                'hits': self.hits,
+                'misses': self.misses,
+                'coalesced': self.coalesced,
+                'invalidations': self.invalidations
+            }
@@ -0,0 +1,47 @@
+import threading
+
+
+class Histogram:
+    """Fixed-bucket histogram for latency and size measurements"""
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+        self.lock = threading.Lock()
+
+    def observe(self, value):
+        with self.lock:
+            index = len(self.buckets)
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    index = i
+                    break
+
+            self.counts[index] += 1
+            self.count += 1
+            self.total += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def reset(self):
+        with self.lock:
+            self.counts = [0] * (len(self.buckets) + 1)
+            self.count = 0
+            self.total = 0.0
+            self.min = None
+            self.max = None
+
+    def snapshot(self):
+        with self.lock:
+            labels = [f"<={bound}" for bound in self.buckets] + [f">{self.buckets[-1]}"]
+            return {
+                'buckets': dict(zip(labels, self.counts)),
+                'count': self.count,
+                'mean': self.total / self.count if self.count else 0,
+                'min': self.min,
+                'max': self.max
+            }
@@ -8,6 +8,8 @@ import os
 import warnings
 import sys
 
+from ShoppingCart import ShoppingCart
+
 warnings.filterwarnings("ignore", category=FutureWarning)
 
 
@@ -18,7 +20,7 @@ class ProductDetector:
         self.model = None
         self.is_running = False
         self.detection_thread = None
-        self.cart = {}
+        self.cart = ShoppingCart()
         self.frame = None
         self.product_catalog = {}  # Will be updated by DetectorManager
         self.frame_width = 0
@@ -140,45 +142,42 @@ class ProductDetector:
         if 'model' in config:
             self.set_model(config['model'])
 
-    def add_to_cart(self, product_name):
+    def add_to_cart(self, product_name, cart=None):
         product_lower = product_name.lower()
         if product_lower in self.product_catalog:
-            price = self.product_catalog[product_lower]
-            if product_lower in self.cart:
-                self.cart[product_lower]["quantity"] += 1
-            else:
-                self.cart[product_lower] = {
-                    "price": price,
-                    "quantity": 1
-                }
+            (cart if cart is not None else self.cart).add(product_lower, self.product_catalog[product_lower])
             print(f"Added {product_name} to cart")
             return True
         return False
 
+    def remove_from_cart(self, product_name, cart=None):
+        removed, quantity = (cart if cart is not None else self.cart).remove(product_name.lower())
+        if removed:
+            if quantity > 0:
+                print(f"Decreased quantity of {product_name} in cart")
+            else:
+                print(f"Removed {product_name} from cart")
+        return removed
+
     def get_cart(self):
-        return self.cart
+        return self.cart.items
+
+    def get_cart_snapshot(self):
+        return self.cart.snapshot()
+
+    def get_cart_changes_since(self, version):
+        return self.cart.changes_since(version)
 
     def clear_cart(self):
-        self.cart = {}
+        self.cart.clear()
         self.counted_objects = {}
         print("Shopping cart cleared.")
 
     def calculate_total(self):
-        total = 0
-        for product, details in self.cart.items():
-            total += details["price"] * details["quantity"]
-        return total
+        return self.cart.total
 
     def format_cart_for_display(self):
-        display_items = []
-        for product, details in self.cart.items():
-            display_items.append({
-                "name": product,
-                "price": details["price"],
-                "quantity": details["quantity"],
-                "subtotal": details["price"] * details["quantity"]
-            })
-        return display_items
+        return self.cart.format_for_display()
 
     def _get_box_color(self, label_lower):
         if label_lower in self.product_catalog:
@@ -206,22 +205,17 @@ class ProductDetector:
             cv2.rectangle(frame, (text_bg_x1, text_bg_y1), (text_bg_x2, text_bg_y2), color, -1)
             cv2.putText(frame, text, (x1 + 5, y1 - 8), cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
 
-    def detect_objects(self, frame):
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        img = Image.fromarray(rgb_frame)
-
+    def _get_inference_size(self):
         if self.processing_speed == 'fast':
-            size = 320
+            return 320
         elif self.processing_speed == 'accurate':
-            size = 1280
-        else:
-            size = 640
-
-        results = self.model(img, size=size)
+            return 1280
+        return 640
 
+    def _collect_detections(self, frame, detections):
         detected_objects = []
 
-        for i, row in results.pandas().xyxy[0].iterrows():
+        for i, row in detections.iterrows():
             label = row['name']
             label_lower = label.lower()
             confidence = row['confidence']
@@ -240,6 +234,20 @@ class ProductDetector:
 
         return frame, detected_objects
 
+    def detect_objects(self, frame):
+        return self.detect_objects_batch([frame])[0]
+
+    def detect_objects_batch(self, frames):
+        """Run a single batched forward pass over several frames"""
+        images = [Image.fromarray(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)) for frame in frames]
+
+        results = self.model(images, size=self._get_inference_size())
+
+        return [
+            self._collect_detections(frame, detections)
+            for frame, detections in zip(frames, results.pandas().xyxy)
+        ]
+
     def start_detection(self):
         if self.is_running:
             return False
@@ -402,6 +410,6 @@ class ProductDetector:
             'processing_speed': self.processing_speed,
             'detection_threshold': self.detection_threshold,
             'total_products': len(self.product_catalog),
-            'cart_items': len(self.cart),
+            'cart_items': len(self.cart.items),
             'cart_total': self.calculate_total()
         }
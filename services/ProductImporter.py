@@ -0,0 +1,195 @@
+import csv
+import io
+import json
+
+from StorageBackend import normalize_name
+
+
+class ProductImporter:
+    """Bulk product import from CSV/JSON and streaming export.
+
+    Rows are validated and de-duplicated by normalized name before anything
+    is written; the first occurrence of a name wins. Valid rows are compared
+    with the current catalog so unchanged products cost no writes, and the
+    rest are upserted in parallel batches. Every rejected row is reported
+    with its row number (the line number for CSV, the 1-based index for JSON).
+    """
+
+    FORMATS = ('csv', 'json')
+    EXPORT_CHUNK_ROWS = 500
+
+    def __init__(self, storage, product_manager=None, max_workers=4):
+        self.storage = storage
+        self.product_manager = product_manager
+        self.max_workers = max_workers
+
+    def parse(self, text, fmt='csv'):
+        """Return ([(row_number, record)], errors) for CSV or JSON text"""
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported format {fmt}, expected one of {', '.join(self.FORMATS)}")
+        if fmt == 'csv':
+            return self._parse_csv(text)
+        return self._parse_json(text)
+
+    def _parse_csv(self, text):
+        reader = csv.DictReader(io.StringIO(text))
+        if reader.fieldnames is None:
+            return [], []
+
+        reader.fieldnames = [field.strip().lower() for field in reader.fieldnames]
+        missing = {'name', 'price'} - set(reader.fieldnames)
+        if missing:
+            return [], [{'row': 1, 'name': None, 'error': f"Missing column(s): {', '.join(sorted(missing))}"}]
+
+        return [(reader.line_num, record) for record in reader], []
+
+    def _parse_json(self, text):
+        try:
+            data = json.loads(text)
+        except ValueError:
+            # Fall back to one JSON object per line
+            records = []
+            errors = []
+            for row, line in enumerate(text.splitlines(), start=1):
+                if not line.strip():
+                    continue
+                try:
+                    records.append((row, json.loads(line)))
+                except ValueError as e:
+                    errors.append({'row': row, 'name': None, 'error': f"Invalid JSON: {e}"})
+            return records, errors
+
+        if isinstance(data, dict):
+            data = data.get('products', [])
+        if not isinstance(data, list):
+            return [], [{'row': 1, 'name': None, 'error': 'Expected a list of products'}]
+        return list(enumerate(data, start=1)), []
+
+    def validate(self, records):
+        """Return ({normalized name: {'row', 'name', 'price'}}, errors)"""
+        products = {}
+        errors = []
+        for row, record in records:
+            if not isinstance(record, dict):
+                errors.append({'row': row, 'name': None, 'error': 'Expected an object with name and price'})
+                continue
+
+            name = normalize_name(record.get('name') or '')
+            if not name:
+                errors.append({'row': row, 'name': None, 'error': 'Name is required'})
+                continue
+
+            price = self._parse_price(record.get('price'))
+            if price is None:
+                errors.append({'row': row, 'name': name, 'error': f"Invalid price {record.get('price')!r}"})
+                continue
+
+            if name in products:
+                errors.append({'row': row, 'name': name,
+                               'error': f"Duplicate of row {products[name]['row']}"})
+                continue
+
+            products[name] = {'row': row, 'name': name, 'price': price}
+        return products, errors
+
+    def _parse_price(self, value):
+        if isinstance(value, bool) or value is None:
+            return None
+        try:
+            price = float(str(value).strip())
+        except ValueError:
+            return None
+        if price != price or price < 0 or price == float('inf'):
+            return None
+        return int(price) if price.is_integer() else price
+
+    def _existing_products(self):
+        """Normalized name -> (document ID, price) for the current catalog"""
+        if self.product_manager is not None:
+            documents = self.product_manager.get_documents()
+            return {normalize_name(doc['name']): (doc_id, doc['price']) for doc_id, doc in documents.items()}
+
+        existing = {}
+        for doc in self.storage.iter_product_documents():
+            data = doc['data']
+            if 'name' in data:
+                existing[normalize_name(data['name'])] = (doc['id'], data.get('price'))
+        return existing
+
+    def import_text(self, text, fmt='csv', dry_run=False):
+        records, errors = self.parse(text, fmt)
+        report = self.import_records(records, dry_run=dry_run)
+        report['errors'] = sorted(errors + report['errors'], key=lambda error: error['row'])
+        report['rows'] += len(errors)
+        report['failed'] = len(report['errors'])
+        return report
+
+    def import_records(self, records, dry_run=False):
+        products, errors = self.validate(records)
+        existing = self._existing_products()
+
+        writes = []
+        unchanged = 0
+        for name, product in products.items():
+            doc_id, price = existing.get(name, (None, None))
+            if doc_id is not None and price == product['price']:
+                unchanged += 1
+                continue
+            writes.append({
+                'id': doc_id or self.storage.product_id_for(name),
+                'name': name,
+                'price': product['price'],
+                'created': doc_id is None,
+                'row': product['row']
+            })
+
+        failed = {}
+        if writes and not dry_run:
+            result = self.storage.write_products(writes, max_workers=self.max_workers)
+            failed = result['failed']
+            for write in writes:
+                if write['id'] in failed:
+                    errors.append({'row': write['row'], 'name': write['name'], 'error': failed[write['id']]})
+
+        succeeded = [write for write in writes if write['id'] not in failed]
+        errors.sort(key=lambda error: error['row'])
+        return {
+            'rows': len(records),
+            'created': sum(1 for write in succeeded if write['created']),
+            'updated': sum(1 for write in succeeded if not write['created']),
+            'unchanged': unchanged,
+            'failed': len(errors),
+            'dry_run': dry_run,
+            'errors': errors
+        }
+
+    def iter_export(self, fmt='csv'):
+        """Yield the catalog as CSV or JSON text in chunks of EXPORT_CHUNK_ROWS products"""
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported format {fmt}, expected one of {', '.join(self.FORMATS)}")
+
+        if self.product_manager is not None:
+            products = iter(sorted(self.product_manager.get_products().items()))
+        else:
+            products = ((normalize_name(doc['data']['name']), doc['data'].get('price'))
+                        for doc in self.storage.iter_product_documents()
+                        if 'name' in doc['data'])
+
+        yield 'name,price\r\n' if fmt == 'csv' else '['
+        first = True
+        while True:
+            chunk = [product for _, product in zip(range(self.EXPORT_CHUNK_ROWS), products)]
+            if not chunk:
+                break
+
+            if fmt == 'csv':
+                buffer = io.StringIO()
+                csv.writer(buffer).writerows(chunk)
+                yield buffer.getvalue()
+            else:
+                rows = ',\n'.join(json.dumps({'name': name, 'price': price}) for name, price in chunk)
+                yield ('\n' if first else ',\n') + rows
+            first = False
+
+        if fmt == 'json':
+            yield '\n]\n'
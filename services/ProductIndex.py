@@ -0,0 +1,145 @@
+import base64
+import bisect
+import json
+import threading
+
+
+class ProductIndex:
+    """Sorted, searchable view of the catalog for paginated listings.
+
+    Names are kept in a sorted list (and (price, name) pairs in another) so a
+    page is a bisect plus a slice, and prefix queries only touch matching
+    names. Queries of three or more characters also match anywhere in the
+    name by intersecting trigram posting sets before confirming each
+    candidate; shorter queries match as a prefix only. Page tokens hold the last
+    sort key of the previous page, so pages stay consistent while the
+    catalog changes underneath them.
+    """
+
+    SORTS = ('name', 'name_desc', 'price', 'price_desc')
+    MAX_PAGE_SIZE = 500
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.prices = {}
+        self.names = []
+        self.by_price = []
+        self.trigrams = {}
+
+    def _trigrams(self, text):
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def rebuild(self, products):
+        with self.lock:
+            self.prices = dict(products)
+            self.names = sorted(self.prices)
+            self.by_price = sorted((price, name) for name, price in self.prices.items())
+            self.trigrams = {}
+            for name in self.names:
+                for trigram in self._trigrams(name):
+                    self.trigrams.setdefault(trigram, set()).add(name)
+
+    def apply(self, changes):
+        """Apply catalog deltas ({'type': 'upserted'|'removed', 'name', 'price'})"""
+        with self.lock:
+            for change in changes:
+                self._remove(change['name'])
+                if change['type'] == 'upserted':
+                    self._insert(change['name'], change['price'])
+
+    def _insert(self, name, price):
+        self.prices[name] = price
+        bisect.insort(self.names, name)
+        bisect.insort(self.by_price, (price, name))
+        for trigram in self._trigrams(name):
+            self.trigrams.setdefault(trigram, set()).add(name)
+
+    def _remove(self, name):
+        if name not in self.prices:
+            return
+        price = self.prices.pop(name)
+
+        position = bisect.bisect_left(self.names, name)
+        if position < len(self.names) and self.names[position] == name:
+            del self.names[position]
+        position = bisect.bisect_left(self.by_price, (price, name))
+        if position < len(self.by_price) and self.by_price[position] == (price, name):
+            del self.by_price[position]
+        for trigram in self._trigrams(name):
+            postings = self.trigrams.get(trigram)
+            if postings is not None:
+                postings.discard(name)
+                if not postings:
+                    del self.trigrams[trigram]
+
+    def _matches(self, query):
+        """Names matching query, or None when every name matches"""
+        if not query:
+            return None
+
+        # Names starting with the query sit next to each other in sorted order
+        start = bisect.bisect_left(self.names, query)
+        end = bisect.bisect_left(self.names, query + '\uffff')
+        matches = set(self.names[start:end])
+
+        if len(query) < 3:
+            # Too short for trigrams; one or two characters only match as a prefix
+            return matches
+
+        postings = sorted((self.trigrams.get(trigram, set()) for trigram in self._trigrams(query)), key=len)
+        matches.update(name for name in set.intersection(*postings) if query in name)
+        return matches
+
+    def page(self, query=None, sort='name', page_size=50, page_token=None):
+        """Return {'products', 'total', 'next_page_token'} for one page of the listing"""
+        if sort not in self.SORTS:
+            raise ValueError(f"Unsupported sort {sort}, expected one of {', '.join(self.SORTS)}")
+        page_size = max(1, min(int(page_size), self.MAX_PAGE_SIZE))
+        query = ' '.join((query or '').split()).lower()
+        after = self.decode_token(page_token, query, sort)
+
+        by_price = sort.startswith('price')
+        with self.lock:
+            matches = self._matches(query)
+            if matches is None:
+                keys = self.by_price if by_price else self.names
+            elif by_price:
+                keys = sorted((self.prices[name], name) for name in matches)
+            else:
+                keys = sorted(matches)
+
+            if sort.endswith('_desc'):
+                end = len(keys) if after is None else bisect.bisect_left(keys, after)
+                page_keys = keys[max(0, end - page_size):end][::-1]
+                has_more = end - page_size > 0
+            else:
+                start = 0 if after is None else bisect.bisect_right(keys, after)
+                page_keys = keys[start:start + page_size]
+                has_more = start + page_size < len(keys)
+
+            names = [key[1] for key in page_keys] if by_price else page_keys
+            products = [{'name': name, 'price': self.prices[name]} for name in names]
+            total = len(keys)
+
+        last_key = page_keys[-1] if page_keys else None
+        return {
+            'products': products,
+            'total': total,
+            'next_page_token': self.encode_token(last_key, query, sort) if has_more and last_key is not None else None
+        }
+
+    def encode_token(self, key, query, sort):
+        payload = json.dumps({'k': list(key) if isinstance(key, tuple) else key, 'q': query, 's': sort})
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_token(self, token, query, sort):
+        if not token:
+            return None
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+        except (ValueError, UnicodeDecodeError):
+            raise ValueError('Invalid page token')
+        if payload.get('q') != query or payload.get('s') != sort:
+            raise ValueError('Page token belongs to a different query or sort')
+        key = payload.get('k')
+        return tuple(key) if isinstance(key, list) else key
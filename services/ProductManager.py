@@ -1,67 +1,376 @@
+import datetime
+import json
+import os
+import threading
+import time
+
+from ProductIndex import ProductIndex
+from StorageBackend import normalize_name
+
+
 class ProductManager:
-    def __init__(self, firestore_manager):
-        self.firestore_manager = firestore_manager
+    def __init__(self, storage, sync_timeout=5.0, snapshot_path='catalog_snapshot.json',
+                 reconcile_interval=300.0):
+        self.storage = storage
+        # Replaced, never mutated in place, so readers can hold on to a snapshot
         self.products = {}
+        self.version = 0
+        self.lock = threading.Lock()
+        # Serializes snapshot writes so an older snapshot never replaces a newer one
+        self.snapshot_lock = threading.Lock()
+        self.listeners = []
+        # Sorted/searchable copy of products for paginated listings
+        self.index = ProductIndex()
+        # Storage document ID -> {'name', 'price', 'updated_at'}
+        self.documents = {}
+        # Normalized name -> document ID, so edits are a single direct write
+        self.product_ids = {}
+        self.watermark = None
+        self.watch = None
+        self.synced = threading.Event()
+        self.sync_timeout = sync_timeout
+        self.snapshot_path = snapshot_path
+        self.snapshot_saved_at = None
+        self.reconcile_interval = reconcile_interval
+        self.sync_state = 'starting'
+        self.last_sync = None
+        self.sync_thread = None
+        self.stop_event = threading.Event()
         self.load_products()
 
     def load_products(self):
-        if self.firestore_manager.is_connected():
-            self.products = self.firestore_manager.get_products()
-            print(f"Loaded {len(self.products)} products from Firestore")
-        else:
-            self.products = {}
-            print("Firestore not connected, using empty product catalog")
+        started = time.monotonic()
+        if self._load_snapshot():
+            print(f"Loaded {len(self.products)} products from local snapshot in "
+                  f"{(time.monotonic() - started) * 1000:.1f} ms")
+
+        if not self.storage.is_connected():
+            self.sync_state = 'offline'
+            print("Storage not connected, using "
+                  f"{'the local snapshot' if self.products else 'an empty product catalog'}")
+            return
+
+        self.sync_thread = threading.Thread(target=self._sync_loop, daemon=True)
+        self.sync_thread.start()
+
+        # With a snapshot the kiosk can sell right away; otherwise give the first sync a moment
+        if not self.products and self.synced.wait(self.sync_timeout):
+            print(f"Loaded {len(self.products)} products from {self.storage.name}")
+
+    def _load_snapshot(self):
+        if not self.snapshot_path or not os.path.exists(self.snapshot_path):
+            return False
+
+        try:
+            with open(self.snapshot_path) as f:
+                snapshot = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable catalog snapshot: {e}")
+            return False
+
+        self.documents = {
+            doc_id: {
+                'name': doc['name'],
+                'price': doc['price'],
+                'updated_at': self._parse_time(doc.get('updated_at'))
+            }
+            for doc_id, doc in snapshot.get('documents', {}).items()
+        }
+        self.products = {doc['name']: doc['price'] for doc in self.documents.values()}
+        self.product_ids = {doc['name']: doc_id for doc_id, doc in self.documents.items()}
+        self.index.rebuild(self.products)
+        self.watermark = self._parse_time(snapshot.get('watermark'))
+        self.snapshot_saved_at = snapshot.get('saved_at')
+        self.version = snapshot.get('version', 0)
+        self.sync_state = 'snapshot'
+        return True
+
+    def _save_snapshot(self):
+        if not self.snapshot_path:
+            return
+
+        with self.snapshot_lock:
+            with self.lock:
+                snapshot = {
+                    'version': self.version,
+                    'watermark': self.watermark.isoformat() if self.watermark else None,
+                    'saved_at': time.time(),
+                    'documents': {
+                        doc_id: {
+                            'name': doc['name'],
+                            'price': doc['price'],
+                            'updated_at': doc['updated_at'].isoformat() if doc['updated_at'] else None
+                        }
+                        for doc_id, doc in self.documents.items()
+                    }
+                }
+
+            try:
+                # Write then rename so a crash never leaves a half-written snapshot
+                temp_path = f"{self.snapshot_path}.tmp"
+                with open(temp_path, 'w') as f:
+                    json.dump(snapshot, f)
+                os.replace(temp_path, self.snapshot_path)
+                self.snapshot_saved_at = snapshot['saved_at']
+            except OSError as e:
+                print(f"Error saving catalog snapshot: {e}")
+
+    def _parse_time(self, value):
+        if not value:
+            return None
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+
+    def _sync_loop(self):
+        self.sync_state = 'syncing'
+        # Only documents changed since the snapshot's watermark are read, then kept live
+        self.watch = self.storage.watch_products(self._apply_changes, updated_after=self.watermark)
+        if self.watch is None:
+            self.sync_state = 'error'
+            return
+
+        self.synced.wait(self.sync_timeout)
+        while not self.stop_event.is_set():
+            self._reconcile()
+            self.stop_event.wait(self.reconcile_interval)
+
+    def _reconcile(self):
+        """Catch changes the watermark query cannot see by comparing document counts and latest updates.
+
+        A deletion changes the count; an update the watch missed changes the
+        latest updated_at, so a delete plus an add cannot hide behind an
+        unchanged count.
+        """
+        remote_count = self.storage.count_products()
+        remote_latest = self.storage.latest_product_update() if remote_count else None
+        with self.lock:
+            local_count = len(self.documents)
+            local_latest = max((doc['updated_at'] for doc in self.documents.values() if doc['updated_at']),
+                               default=None)
+        if remote_count is not None and remote_count == local_count and remote_latest == local_latest:
+            self.sync_state = 'live'
+            self.last_sync = time.time()
+            return
+
+        self._resync()
+
+    def _resync(self):
+        """Replace the local catalog with a full read of the product documents"""
+        documents = self.storage.get_product_documents()
+        if documents is None:
+            self.sync_state = 'error'
+            return False
+
+        remote_ids = {doc['id'] for doc in documents}
+        changes = [{'type': 'REMOVED', 'id': doc_id, 'data': None}
+                   for doc_id in list(self.documents) if doc_id not in remote_ids]
+        changes += [{'type': 'MODIFIED', 'id': doc['id'], 'data': doc['data']} for doc in documents]
+        self._apply_changes(changes)
+        print(f"Product catalog resynced: {len(documents)} products")
+        self.sync_state = 'live'
+        self.last_sync = time.time()
+        return True
+
+    def stop_sync(self):
+        self.stop_event.set()
+        if self.watch is not None:
+            self.watch.unsubscribe()
+            self.watch = None
+
+    def subscribe(self, callback):
+        """callback(products, version, changes) runs after every catalog change"""
+        self.listeners.append(callback)
 
+    def _apply_changes(self, changes):
+        applied = []
+        documents_changed = False
+        with self.lock:
+            products = dict(self.products)
+            for change in changes:
+                data = change['data'] or {}
+                previous = self.documents.get(change['id'])
+                previous_name = previous['name'] if previous else None
+
+                if change['type'] == 'REMOVED':
+                    if self.documents.pop(change['id'], None) is not None:
+                        documents_changed = True
+                    if previous_name is not None and self.product_ids.get(previous_name) == change['id']:
+                        del self.product_ids[previous_name]
+                    if previous_name is not None and products.pop(previous_name, None) is not None:
+                        applied.append({'type': 'removed', 'name': previous_name})
+                    continue
+
+                if 'name' not in data or 'price' not in data:
+                    continue
+
+                name = normalize_name(data['name'])
+                updated_at = data.get('updated_at')
+                if not isinstance(updated_at, datetime.datetime):
+                    updated_at = None
+                if previous_name is not None and previous_name != name:
+                    products.pop(previous_name, None)
+                    self.product_ids.pop(previous_name, None)
+                    applied.append({'type': 'removed', 'name': previous_name})
+
+                existing_id = self.product_ids.get(name)
+                if existing_id is not None and existing_id != change['id']:
+                    print(f"Duplicate product name '{name}' in documents {existing_id} and {change['id']}")
+                self.product_ids[name] = change['id']
+
+                document = {'name': name, 'price': data['price'], 'updated_at': updated_at}
+                if previous != document:
+                    self.documents[change['id']] = document
+                    documents_changed = True
+                if updated_at and (self.watermark is None or updated_at > self.watermark):
+                    self.watermark = updated_at
+
+                if products.get(name) != data['price']:
+                    products[name] = data['price']
+                    applied.append({'type': 'upserted', 'name': name, 'price': data['price']})
+
+            if applied:
+                self.products = products
+                self.index.apply(applied)
+                self.version += 1
+            version = self.version
+
+        self.synced.set()
+        self.last_sync = time.time()
+        if documents_changed:
+            self._save_snapshot()
+        if applied:
+            self._notify(version, applied)
+
+    def _set_local(self, name, price=None, product_id=None):
+        """Apply our own write immediately; the listener's echo is then a no-op"""
+        with self.lock:
+            products = dict(self.products)
+            if price is None:
+                self.product_ids.pop(name, None)
+                if products.pop(name, None) is None:
+                    return
+                change = {'type': 'removed', 'name': name}
+            else:
+                if product_id is not None:
+                    self.product_ids[name] = product_id
+                if products.get(name) == price:
+                    return
+                products[name] = price
+                change = {'type': 'upserted', 'name': name, 'price': price}
+            self.products = products
+            self.index.apply([change])
+            self.version += 1
+            version = self.version
+        self._notify(version, [change])
+
+    def _notify(self, version, changes):
+        products = self.products
+        for callback in self.listeners:
+            try:
+                callback(products, version, changes)
+            except Exception as e:
+                print(f"Catalog listener error: {e}")
 
     def get_products(self):
         return self.products
 
+    def list_products(self, query=None, sort='name', page_size=50, page_token=None):
+        """One page of the catalog with its version, so clients can apply later deltas on top"""
+        # Read the version first: a delta racing with the page is then re-applied, never missed
+        version = self.version
+        page = self.index.page(query, sort, page_size, page_token)
+        page['version'] = version
+        return page
+
+    def get_documents(self):
+        """Copy of document ID -> {'name', 'price', 'updated_at'} for the current catalog"""
+        with self.lock:
+            return dict(self.documents)
+
+    def get_version(self):
+        return self.version
+
+    def get_sync_status(self):
+        return {
+            'state': self.sync_state,
+            'version': self.version,
+            'products': len(self.products),
+            'watermark': self.watermark.isoformat() if self.watermark else None,
+            'snapshot_age_seconds': round(time.time() - self.snapshot_saved_at, 1)
+            if self.snapshot_saved_at else None,
+            'last_sync_age_seconds': round(time.time() - self.last_sync, 1) if self.last_sync else None
+        }
+
+    def has_product(self, name):
+        return normalize_name(name) in self.products
+
     def add_product(self, name, price):
-        name_lower = name.lower()
+        name_lower = normalize_name(name)
+        if name_lower in self.products:
+            print(f"Product {name_lower} already exists")
+            return None
 
-        if not self.firestore_manager.is_connected():
+        if not self.storage.is_connected():
             return None
-            
-        result = self.firestore_manager.add_product(name_lower, price)
+
+        result = self.storage.add_product(name_lower, price)
         if result:
-            self.products[name_lower] = price
+            self._set_local(name_lower, price, result['id'])
             return {"name": name_lower, "price": price}
         return None
 
     def update_product(self, name, price):
-        name_lower = name.lower()
+        name_lower = normalize_name(name)
         if name_lower not in self.products:
             return None
 
-        if not self.firestore_manager.is_connected():
+        if not self.storage.is_connected():
             return None
-            
-        result = self.firestore_manager.update_product(name_lower, price)
+
+        result = self.storage.update_product(name_lower, price, self.product_ids.get(name_lower))
         if result:
-            self.products[name_lower] = price
+            self._set_local(name_lower, price, result['id'])
             return {"name": name_lower, "price": price}
         return None
 
     def delete_product(self, name):
-        name_lower = name.lower()
+        name_lower = normalize_name(name)
         if name_lower not in self.products:
             return None
 
-        if not self.firestore_manager.is_connected():
+        if not self.storage.is_connected():
             return None
-            
-        result = self.firestore_manager.delete_product(name_lower)
+
+        result = self.storage.delete_product(name_lower, self.product_ids.get(name_lower))
         if result:
-            del self.products[name_lower]
+            self._set_local(name_lower)
             return {"name": name_lower}
         return None
 
-    def delete_all_products(self):
-        if not self.firestore_manager.is_connected():
+    def delete_all_products(self, on_progress=None):
+        if not self.storage.is_connected():
             return {"deleted_count": 0}
-            
-        result = self.firestore_manager.delete_all_products()
-        deleted_count = len(self.products)
-        self.products = {}
-        
-        return {"deleted_count": deleted_count}
+
+        result = self.storage.delete_all_products(on_progress=on_progress)
+        if not result.get('completed', True):
+            # Some products may survive a delete that stopped partway, so keep what storage still has
+            print(f"Deleting all products did not complete, resyncing the catalog: {result.get('error')}")
+            self._resync()
+            return {"deleted_count": result.get("deleted_count", 0),
+                    "error": result.get("error") or "Delete did not complete"}
+
+        with self.lock:
+            removed = [{'type': 'removed', 'name': name} for name in self.products]
+            self.products = {}
+            self.documents = {}
+            self.product_ids = {}
+            self.index.rebuild({})
+            self.version += 1
+            version = self.version
+        self._save_snapshot()
+        if removed:
+            self._notify(version, removed)
+
+        return {"deleted_count": result.get("deleted_count", 0)}
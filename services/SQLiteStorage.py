@@ -0,0 +1,500 @@
+import datetime
+import json
+import sqlite3
+import threading
+import time
+import uuid
+
+from StorageBackend import StorageBackend, normalize_name
+
+
+def _to_epoch(value):
+    """Seconds since the epoch; naive datetimes are taken as UTC, as Firestore does"""
+    if value is None:
+        return time.time()
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=datetime.timezone.utc)
+    return value.timestamp()
+
+
+def _from_epoch(value):
+    return datetime.datetime.fromtimestamp(value, tz=datetime.timezone.utc) if value is not None else None
+
+
+class ProductWatch:
+    def __init__(self, storage, callback):
+        self.storage = storage
+        self.callback = callback
+
+    def unsubscribe(self):
+        with self.storage.lock:
+            if self in self.storage.watches:
+                self.storage.watches.remove(self)
+
+
+class SQLiteStorage(StorageBackend):
+    """Storage backend on a local SQLite database, for single-store kiosks and offline use.
+
+    Orders are indexed on timestamp and checkout ID and lines on checkout ID,
+    name and timestamp, so history pages and lookups stay well under a
+    millisecond. Sales summaries are aggregated from the orders with SQL
+    instead of maintained counters, so replaying a checkout never double
+    counts it.
+    """
+
+    name = 'sqlite'
+    # An indexed local query is as cheap as a cache lookup
+    caches_history = False
+
+    def __init__(self, path='store.db', history_cache_ttl=30.0, history_cache_size=128, rollup_shards=4,
+                 bulk_delete_workers=4):
+        super().__init__(history_cache_ttl, history_cache_size, rollup_shards, bulk_delete_workers)
+        self.path = path
+        self.lock = threading.RLock()
+        self.watches = []
+
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ':memory:':
+            self.conn.execute('PRAGMA journal_mode=WAL')
+            self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS products (
+                id TEXT PRIMARY KEY,
+                name TEXT UNIQUE NOT NULL,
+                price NUMERIC NOT NULL,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS products_updated_at ON products (updated_at);
+
+            CREATE TABLE IF NOT EXISTS orders (
+                checkout_id TEXT PRIMARY KEY,
+                items TEXT NOT NULL,
+                item_count INTEGER NOT NULL,
+                total NUMERIC NOT NULL,
+                timestamp REAL NOT NULL,
+                date TEXT NOT NULL,
+                hour INTEGER NOT NULL,
+                lane TEXT
+            );
+            CREATE INDEX IF NOT EXISTS orders_timestamp ON orders (timestamp, checkout_id);
+            CREATE INDEX IF NOT EXISTS orders_date ON orders (date);
+
+            CREATE TABLE IF NOT EXISTS transactions (
+                id TEXT PRIMARY KEY,
+                checkout_id TEXT NOT NULL,
+                name TEXT NOT NULL,
+                price NUMERIC NOT NULL,
+                quantity INTEGER NOT NULL,
+                subtotal NUMERIC NOT NULL,
+                total NUMERIC NOT NULL,
+                timestamp REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS transactions_checkout_id ON transactions (checkout_id);
+            CREATE INDEX IF NOT EXISTS transactions_name ON transactions (name);
+            CREATE INDEX IF NOT EXISTS transactions_timestamp ON transactions (timestamp);
+        ''')
+        print(f"SQLite storage initialized at {path}")
+
+    def is_connected(self):
+        return self.conn is not None
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def _query(self, sql, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params).fetchall()
+
+    def _write(self, statements):
+        """Run (sql, params) pairs in one transaction"""
+        with self.lock:
+            self.conn.execute('BEGIN')
+            try:
+                for sql, params in statements:
+                    self.conn.execute(sql, params)
+                self.conn.execute('COMMIT')
+            except Exception:
+                self.conn.execute('ROLLBACK')
+                raise
+
+    # Products
+
+    def _product_data(self, row):
+        _, name, price, created_at, updated_at = row
+        return {
+            'name': name,
+            'price': price,
+            'created_at': _from_epoch(created_at),
+            'updated_at': _from_epoch(updated_at)
+        }
+
+    def _notify_products(self, changes):
+        if not changes:
+            return
+        with self.lock:
+            watches = list(self.watches)
+        for watch in watches:
+            try:
+                watch.callback(changes)
+            except Exception as e:
+                print(f"Error applying product changes: {e}")
+
+    def _product_rows(self, ids):
+        rows = []
+        for start in range(0, len(ids), self.MAX_BATCH_WRITES):
+            chunk = ids[start:start + self.MAX_BATCH_WRITES]
+            rows += self._query(
+                f"SELECT * FROM products WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            )
+        return rows
+
+    def get_products(self):
+        return {name: price for name, price in self._query('SELECT name, price FROM products')}
+
+    def get_product_documents(self):
+        return [{'id': row[0], 'data': self._product_data(row)} for row in self._query('SELECT * FROM products')]
+
+    def iter_product_documents(self, page_size=500):
+        last_id = ''
+        while True:
+            rows = self._query('SELECT * FROM products WHERE id > ? ORDER BY id LIMIT ?', (last_id, page_size))
+            for row in rows:
+                yield {'id': row[0], 'data': self._product_data(row)}
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1][0]
+
+    def count_products(self):
+        return self._query('SELECT COUNT(*) FROM products')[0][0]
+
+    def latest_product_update(self):
+        return _from_epoch(self._query('SELECT MAX(updated_at) FROM products')[0][0])
+
+    def watch_products(self, on_changes, updated_after=None):
+        watch = ProductWatch(self, on_changes)
+        with self.lock:
+            if updated_after is None:
+                rows = self.conn.execute('SELECT * FROM products').fetchall()
+            else:
+                rows = self.conn.execute(
+                    'SELECT * FROM products WHERE updated_at > ?', (_to_epoch(updated_after),)
+                ).fetchall()
+            self.watches.append(watch)
+
+        on_changes([{'type': 'ADDED', 'id': row[0], 'data': self._product_data(row)} for row in rows])
+        return watch
+
+    def add_product(self, name, price):
+        product_id = self.product_id_for(name)
+        now = time.time()
+        try:
+            self._write([(
+                'INSERT INTO products (id, name, price, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+                (product_id, normalize_name(name), price, now, now)
+            )])
+        except sqlite3.IntegrityError:
+            print(f"Error adding product to SQLite: {normalize_name(name)} already exists")
+            return None
+
+        self._notify_products([{'type': 'ADDED', 'id': product_id, 'data': self._product_data(
+            (product_id, normalize_name(name), price, now, now))}])
+        return {'id': product_id, 'name': normalize_name(name), 'price': price}
+
+    def _find_product_id(self, name):
+        rows = self._query('SELECT id FROM products WHERE name = ?', (normalize_name(name),))
+        return rows[0][0] if rows else None
+
+    def update_product(self, name, price, product_id=None):
+        product_id = product_id or self._find_product_id(name)
+        with self.lock:
+            cursor = self.conn.execute(
+                'UPDATE products SET price = ?, updated_at = ? WHERE id = ?', (price, time.time(), product_id)
+            )
+            rows = self.conn.execute('SELECT * FROM products WHERE id = ?', (product_id,)).fetchall()
+        if cursor.rowcount == 0:
+            print(f"Product {name} not found in SQLite")
+            return None
+
+        self._notify_products([{'type': 'MODIFIED', 'id': product_id, 'data': self._product_data(rows[0])}])
+        return {'id': product_id, 'name': normalize_name(name), 'price': price}
+
+    def delete_product(self, name, product_id=None):
+        product_id = product_id or self._find_product_id(name)
+        with self.lock:
+            cursor = self.conn.execute('DELETE FROM products WHERE id = ?', (product_id,))
+        if cursor.rowcount == 0:
+            print(f"Product {name} not found in SQLite")
+            return None
+
+        self._notify_products([{'type': 'REMOVED', 'id': product_id, 'data': None}])
+        return {'id': product_id, 'name': normalize_name(name)}
+
+    def write_products(self, products, max_workers=4):
+        # A single local transaction is faster than any parallel split
+        now = time.time()
+        try:
+            self._write([(
+                '''INSERT INTO products (id, name, price, created_at, updated_at) VALUES (?, ?, ?, ?, ?)
+                   ON CONFLICT (id) DO UPDATE SET name = excluded.name, price = excluded.price,
+                   updated_at = excluded.updated_at''',
+                (product['id'], product['name'], product['price'], now, now)
+            ) for product in products])
+        except sqlite3.Error as e:
+            print(f"Error writing {len(products)} products to SQLite: {e}")
+            return {'written': [], 'failed': {product['id']: str(e) for product in products}}
+
+        ids = [product['id'] for product in products]
+        self._notify_products([{'type': 'MODIFIED', 'id': row[0], 'data': self._product_data(row)}
+                               for row in self._product_rows(ids)])
+        return {'written': ids, 'failed': {}}
+
+    def delete_collection(self, collection_name, page_size=500, max_workers=None, on_progress=None,
+                          should_stop=None):
+        # Rollups are computed from orders here, so there is nothing to delete for them
+        if collection_name not in ('products', 'orders', 'transactions'):
+            return {'deleted_count': 0, 'completed': True}
+
+        with self.lock:
+            removed = [row[0] for row in self.conn.execute('SELECT id FROM products')] \
+                if collection_name == 'products' else []
+            deleted_count = self.conn.execute(f'DELETE FROM {collection_name}').rowcount
+
+        self._notify_products([{'type': 'REMOVED', 'id': product_id, 'data': None} for product_id in removed])
+        if on_progress is not None:
+            on_progress({'collection': collection_name, 'deleted_count': deleted_count})
+        return {'deleted_count': deleted_count, 'completed': True}
+
+    def delete_all_products(self, on_progress=None, page_size=500, max_workers=None):
+        result = self.delete_collection('products', on_progress=on_progress)
+        print(f"Deleted {result['deleted_count']} products from SQLite")
+        return {'deleted_count': result['deleted_count'], 'completed': result['completed']}
+
+    # Transactions
+
+    def _transaction_statements(self, cart, total, checkout_id, timestamp, lane=None):
+        epoch = _to_epoch(timestamp)
+        rollup_key = self.rollup_key(checkout_id, _from_epoch(epoch))
+        items = [{
+            'name': name,
+            'price': details['price'],
+            'quantity': details['quantity'],
+            'subtotal': details['price'] * details['quantity']
+        } for name, details in cart.items()]
+
+        # Replaying a checkout replaces its rows instead of adding to them
+        statements = [('DELETE FROM transactions WHERE checkout_id = ?', (checkout_id,))]
+        transaction_ids = []
+        for index, item in enumerate(items):
+            transaction_id = f"{checkout_id}_{index:03d}"
+            statements.append((
+                '''INSERT INTO transactions (id, checkout_id, name, price, quantity, subtotal, total, timestamp)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+                (transaction_id, checkout_id, item['name'], item['price'], item['quantity'],
+                 item['subtotal'], total, epoch)
+            ))
+            transaction_ids.append(transaction_id)
+
+        statements.append((
+            '''INSERT OR REPLACE INTO orders (checkout_id, items, item_count, total, timestamp, date, hour, lane)
+               VALUES (?, ?, ?, ?, ?, ?, ?, ?)''',
+            (checkout_id, json.dumps(items), sum(item['quantity'] for item in items), total, epoch,
+             rollup_key['date'], rollup_key['hour'], lane)
+        ))
+        return statements, transaction_ids
+
+    def save_transaction(self, cart, total, checkout_id=None, timestamp=None):
+        checkout_id = checkout_id or uuid.uuid4().hex
+        try:
+            statements, transaction_ids = self._transaction_statements(cart, total, checkout_id, timestamp)
+            self._write(statements)
+        except sqlite3.Error as e:
+            print(f"Error saving transaction to SQLite: {e}")
+            return None
+
+        return {
+            'checkout_id': checkout_id,
+            'transaction_ids': transaction_ids,
+            'total': total,
+            'timestamp': datetime.datetime.now()
+        }
+
+    def save_transactions(self, checkouts):
+        self.validate_checkouts(checkouts)
+        statements = []
+        for checkout in checkouts:
+            statements += self._transaction_statements(
+                checkout['cart'], checkout['total'], checkout['checkout_id'],
+                checkout.get('timestamp'), checkout.get('lane')
+            )[0]
+        try:
+            self._write(statements)
+        except sqlite3.Error as e:
+            print(f"Error saving queued transactions to SQLite: {e}")
+            return None
+        return [checkout['checkout_id'] for checkout in checkouts]
+
+    def get_sales_summary(self, start_date, end_date):
+        if isinstance(start_date, datetime.date):
+            start_date = start_date.strftime('%Y-%m-%d')
+        if isinstance(end_date, datetime.date):
+            end_date = end_date.strftime('%Y-%m-%d')
+        dates = (start_date, end_date)
+
+        daily = [{'date': date, 'revenue': revenue, 'units': units, 'orders': orders}
+                 for date, revenue, units, orders in self._query(
+                     '''SELECT date, SUM(total), SUM(item_count), COUNT(*) FROM orders
+                        WHERE date BETWEEN ? AND ? GROUP BY date ORDER BY date''', dates)]
+
+        hours = {hour: {'revenue': 0, 'units': 0, 'orders': 0} for hour in range(24)}
+        for hour, revenue, units, orders in self._query(
+                '''SELECT hour, SUM(total), SUM(item_count), COUNT(*) FROM orders
+                   WHERE date BETWEEN ? AND ? GROUP BY hour''', dates):
+            hours[hour] = {'revenue': revenue, 'units': units, 'orders': orders}
+
+        products = {name: {'revenue': revenue, 'units': units} for name, revenue, units in self._query(
+            '''SELECT t.name, SUM(t.subtotal), SUM(t.quantity) FROM transactions t
+               JOIN orders o ON o.checkout_id = t.checkout_id
+               WHERE o.date BETWEEN ? AND ? GROUP BY t.name''', dates)}
+
+        return {
+            'start_date': start_date,
+            'end_date': end_date,
+            'totals': {
+                'revenue': sum(day['revenue'] for day in daily),
+                'units': sum(day['units'] for day in daily),
+                'orders': sum(day['orders'] for day in daily)
+            },
+            'days': daily,
+            'hours': [dict(hours[hour], hour=hour) for hour in range(24)],
+            'products': products,
+            'documents_read': 0
+        }
+
+    def _order_from_row(self, row):
+        checkout_id, items, total, timestamp = row
+        return {
+            'id': checkout_id,
+            'items': json.loads(items),
+            'total': total,
+            'timestamp': _from_epoch(timestamp)
+        }
+
+    def _order_rows(self, start=None, end=None, start_after=None, limit=None):
+        """Order rows newest first (ties by checkout ID, descending) within [start, end)"""
+        sql = 'SELECT checkout_id, items, total, timestamp FROM orders WHERE 1 = 1'
+        params = []
+        if start is not None and end is not None:
+            sql += ' AND timestamp >= ? AND timestamp < ?'
+            params += [_to_epoch(start), _to_epoch(end)]
+        if start_after is not None:
+            sql += ' AND (timestamp < ? OR (timestamp = ? AND checkout_id < ?))'
+            params += [start_after[0], start_after[0], start_after[1]]
+        sql += ' ORDER BY timestamp DESC, checkout_id DESC'
+        if limit is not None:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        return self._query(sql, params)
+
+    def _orders(self, start=None, end=None, start_after=None, limit=None):
+        return [self._order_from_row(row) for row in self._order_rows(start, end, start_after, limit)]
+
+    def _cursor(self, order_id):
+        rows = self._query('SELECT timestamp, checkout_id FROM orders WHERE checkout_id = ?', (order_id,))
+        return rows[0] if rows else None
+
+    def get_transactions(self, limit=20):
+        return self._orders(limit=limit)
+
+    def get_transactions_page(self, page_size=20, start_after=None, start_date=None, end_date=None):
+        empty_page = {'transactions': [], 'next_page_token': None}
+        try:
+            start, end = self._parse_date_range(start_date, end_date)
+        except ValueError as e:
+            print(f"Invalid date range: {e}")
+            return empty_page
+
+        cursor = None
+        if start_after:
+            cursor = self._cursor(start_after)
+            if cursor is None:
+                print(f"Page token {start_after} no longer exists")
+                return empty_page
+
+        orders = self._orders(start, end, cursor, page_size + 1)
+        transactions = orders[:page_size]
+        return {
+            'transactions': transactions,
+            'next_page_token': transactions[-1]['id'] if len(orders) > page_size else None
+        }
+
+    def iter_transaction_pages(self, page_size=100, start_date=None, end_date=None, start_after=None):
+        start, end = self._parse_date_range(start_date, end_date)
+        cursor = None
+        if isinstance(start_after, (tuple, list)):
+            timestamp, order_id = start_after
+            # Prefer the stored timestamp, which has no float round trip; the pair covers a deleted order
+            cursor = self._cursor(order_id) or (_to_epoch(timestamp), order_id)
+        elif start_after:
+            cursor = self._cursor(start_after)
+            if cursor is None:
+                raise ValueError(f"Cursor order {start_after} no longer exists")
+
+        while True:
+            rows = self._order_rows(start, end, cursor, page_size)
+            if not rows:
+                return
+            yield [self._order_from_row(row) for row in rows]
+            if len(rows) < page_size:
+                return
+            # Continue from the stored values; a round trip through datetime could shift the float
+            cursor = (rows[-1][3], rows[-1][0])
+
+    def get_transactions_by_date_range(self, start_date, end_date):
+        try:
+            start, end = self._parse_date_range(start_date, end_date)
+        except ValueError as e:
+            print(f"Invalid date range: {e}")
+            return []
+        return self._orders(start, end)
+
+    def get_transaction_by_id(self, transaction_id):
+        rows = self._query('SELECT checkout_id, items, total, timestamp FROM orders WHERE checkout_id = ?',
+                           (transaction_id,))
+        if not rows:
+            print(f"Transaction {transaction_id} not found in SQLite")
+            return None
+        return self._order_from_row(rows[0])
+
+    def delete_transaction(self, transaction_id):
+        with self.lock:
+            if self.conn.execute('SELECT 1 FROM orders WHERE checkout_id = ?', (transaction_id,)).fetchone() is None:
+                print(f"Transaction {transaction_id} not found in SQLite")
+                return False
+            self._write([
+                ('DELETE FROM transactions WHERE checkout_id = ?', (transaction_id,)),
+                ('DELETE FROM orders WHERE checkout_id = ?', (transaction_id,))
+            ])
+        return True
+
+    def delete_all_transactions(self, on_progress=None, page_size=500, max_workers=None):
+        deleted_count = self.delete_collection('orders', on_progress=on_progress)['deleted_count']
+        deleted_lines = self.delete_collection('transactions', on_progress=on_progress)['deleted_count']
+        print(f"Deleted {deleted_count} orders ({deleted_lines} lines) from SQLite")
+        return {'deleted_count': deleted_count, 'deleted_lines': deleted_lines}
+
+
+class MemoryStorage(SQLiteStorage):
+    """SQLiteStorage on an in-memory database: nothing survives a restart.
+
+    Meant for tests, benchmarks and demos that must not touch the network
+    or leave files behind.
+    """
+
+    name = 'memory'
+
+    def __init__(self, history_cache_ttl=30.0, history_cache_size=128, rollup_shards=4, bulk_delete_workers=4):
+        super().__init__(':memory:', history_cache_ttl, history_cache_size, rollup_shards, bulk_delete_workers)
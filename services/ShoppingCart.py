@@ -0,0 +1,114 @@
+import threading
+from collections import deque
+
+
+class ShoppingCart:
+    """Versioned cart with a running total and a log of recent changes.
+
+    The total is recomputed from the lines on every change rather than
+    adjusted by each delta, so fractional prices never let it drift from
+    sum(price * quantity) and a checkout always matches its own lines.
+    """
+
+    def __init__(self, max_changes=256):
+        self.items = {}
+        self.lock = threading.Lock()
+        self.version = 0
+        self.total = 0
+        # Recent per-item changes so clients can be sent deltas instead of the whole cart
+        self.changes = deque(maxlen=max_changes)
+        self.changes_floor = 0
+
+    def _record_change(self, name):
+        # A cart holds tens of lines at most, so an exact recompute is cheap
+        self.total = sum(item["price"] * item["quantity"] for item in self.items.values())
+        self.version += 1
+        item = self.items.get(name)
+        self.changes.append({
+            'version': self.version,
+            'item': name,
+            'quantity': item["quantity"] if item else 0,
+            'price': item["price"] if item else 0,
+            'total': self.total
+        })
+
+    def add(self, name, price):
+        with self.lock:
+            if name in self.items:
+                self.items[name]["quantity"] += 1
+            else:
+                self.items[name] = {
+                    "price": price,
+                    "quantity": 1
+                }
+            self._record_change(name)
+
+    def remove(self, name):
+        """Remove one unit of a product. Returns (removed, quantity_left)."""
+        with self.lock:
+            if name not in self.items:
+                return False, 0
+
+            if self.items[name]["quantity"] > 1:
+                self.items[name]["quantity"] -= 1
+                quantity = self.items[name]["quantity"]
+            else:
+                del self.items[name]
+                quantity = 0
+            self._record_change(name)
+            return True, quantity
+
+    def _clear(self):
+        self.items = {}
+        self.total = 0
+        self.version += 1
+        self.changes.clear()
+        self.changes_floor = self.version
+
+    def clear(self):
+        with self.lock:
+            self._clear()
+
+    def _snapshot(self):
+        return {
+            'cart': {name: dict(details) for name, details in self.items.items()},
+            'total': self.total,
+            'version': self.version
+        }
+
+    def snapshot(self):
+        with self.lock:
+            return self._snapshot()
+
+    def take(self):
+        """Snapshot and clear the cart in one step, so no scan lands between the two"""
+        with self.lock:
+            snapshot = self._snapshot()
+            self._clear()
+            return snapshot
+
+    def restore(self, snapshot):
+        """Put back the items of a taken snapshot, on top of anything added since"""
+        with self.lock:
+            for name, details in snapshot['cart'].items():
+                item = self.items.setdefault(name, {"price": details["price"], "quantity": 0})
+                item["quantity"] += details["quantity"]
+                self._record_change(name)
+
+    def changes_since(self, version):
+        """Changes after the given version, or None when the caller needs a full resync"""
+        with self.lock:
+            if version < self.changes_floor:
+                return None
+            if self.changes and version < self.changes[0]['version'] - 1:
+                return None
+            return [change for change in self.changes if change['version'] > version]
+
+    def format_for_display(self):
+        with self.lock:
+            return [{
+                "name": name,
+                "price": details["price"],
+                "quantity": details["quantity"],
+                "subtotal": details["price"] * details["quantity"]
+            } for name, details in self.items.items()]
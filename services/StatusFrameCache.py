@@ -0,0 +1,49 @@
+import cv2
+import threading
+from collections import OrderedDict
+
+
+class StatusFrameCache:
+    """Keeps rendered status frames and their JPEG bytes keyed by (kind, message, resolution)"""
+
+    def __init__(self, max_entries=32, jpeg_quality=85):
+        self.max_entries = max_entries
+        self.encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), jpeg_quality]
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, kind, message, resolution, render):
+        """Return (frame, jpeg_bytes), calling render() only on a cache miss"""
+        key = (kind, message, tuple(resolution))
+
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry
+
+        frame = render()
+        success, buffer = cv2.imencode('.jpg', frame, self.encode_param)
+        entry = (frame, buffer.tobytes() if success else None)
+
+        with self.lock:
+            self.misses += 1
+            self.entries[key] = entry
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def get_stats(self):
+        with self.lock:
+            return {
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses
+            }
@@ -0,0 +1,267 @@
+import datetime
+import hashlib
+import os
+import re
+import zlib
+
+from HistoryCache import HistoryCache
+
+
+def normalize_name(name):
+    """Lowercase and collapse whitespace, the form product names are stored in"""
+    return ' '.join(str(name).split()).lower()
+
+
+class TransientStorageError(Exception):
+    """A storage call failed in a way that may succeed if retried (backend unavailable, deadline exceeded)"""
+
+
+class InvalidCheckoutError(Exception):
+    """Checkouts that can never be written, whatever the state of the backend.
+
+    checkout_ids maps each rejected checkout ID to the reason. When a backend
+    cannot tell which checkout of a batch it rejected, every ID of the batch
+    is listed.
+    """
+
+    def __init__(self, checkout_ids):
+        self.checkout_ids = dict(checkout_ids)
+        super().__init__('; '.join(f"{checkout_id}: {reason}" for checkout_id, reason in self.checkout_ids.items()))
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class StorageBackend:
+    """Persistence interface shared by the Firestore, SQLite and in-memory backends.
+
+    Products are documents keyed by ID with a unique lowercase name. A
+    checkout is one order (keyed by its checkout ID) plus one line per cart
+    item, counted into per-day sales rollups. Read methods return plain
+    dicts and lists; write methods return None or False on failure and print
+    the error, so callers never need backend-specific exception handling.
+    Failures a retry may fix raise TransientStorageError instead, so callers
+    can retry those and nothing else.
+    """
+
+    name = 'base'
+    # Upper bound on writes committed together (Firestore's batch limit)
+    MAX_BATCH_WRITES = 500
+    # Backends whose history reads are network round trips cache them
+    caches_history = True
+
+    def __init__(self, history_cache_ttl=30.0, history_cache_size=128, rollup_shards=4, bulk_delete_workers=4):
+        # Each day's rollup is split over this many shards so busy days don't
+        # contend on a single counter
+        self.rollup_shards = max(1, rollup_shards)
+        self.bulk_delete_workers = max(1, bulk_delete_workers)
+        self.history_cache = HistoryCache(ttl=history_cache_ttl, max_entries=history_cache_size) \
+            if self.caches_history else None
+
+    def is_connected(self):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+    # Products
+
+    def product_id_for(self, name):
+        """Deterministic document ID for a product name: readable slug plus a short hash"""
+        name = normalize_name(name)
+        slug = re.sub(r'[^a-z0-9]+', '-', name).strip('-') or 'product'
+        return f"{slug[:40]}-{hashlib.sha1(name.encode('utf-8')).hexdigest()[:8]}"
+
+    def get_products(self):
+        """Every product as {name: price}"""
+        raise NotImplementedError
+
+    def get_product_documents(self):
+        """Every product document as {'id', 'data'}, or None when the read fails"""
+        raise NotImplementedError
+
+    def iter_product_documents(self, page_size=500):
+        """Yield product documents as {'id', 'data'} a page at a time, ordered by ID"""
+        raise NotImplementedError
+
+    def count_products(self):
+        """Number of product documents, or None when unavailable"""
+        raise NotImplementedError
+
+    def latest_product_update(self):
+        """Most recent updated_at of any product document, or None when empty or unavailable"""
+        raise NotImplementedError
+
+    def watch_products(self, on_changes, updated_after=None):
+        """Report product changes as lists of {'type', 'id', 'data'}.
+
+        type is ADDED, MODIFIED or REMOVED. The first call delivers the current
+        documents (only those modified after updated_after, when given) as
+        ADDED changes. Returns a watch with unsubscribe(), or None on failure.
+        """
+        raise NotImplementedError
+
+    def add_product(self, name, price):
+        """Create a product; fails (returns None) when the name already exists"""
+        raise NotImplementedError
+
+    def update_product(self, name, price, product_id=None):
+        raise NotImplementedError
+
+    def delete_product(self, name, product_id=None):
+        raise NotImplementedError
+
+    def write_products(self, products, max_workers=4):
+        """Upsert [{'id', 'name', 'price', 'created'}]; returns {'written': [ids], 'failed': {id: error}}"""
+        raise NotImplementedError
+
+    def delete_collection(self, collection_name, page_size=500, max_workers=None, on_progress=None,
+                          should_stop=None):
+        """Delete every document of a collection; returns {'deleted_count', 'completed'}"""
+        raise NotImplementedError
+
+    def delete_all_products(self, on_progress=None, page_size=500, max_workers=None):
+        """Delete every product; returns {'deleted_count', 'completed'}, plus 'error' when it failed partway"""
+        raise NotImplementedError
+
+    # Transactions
+
+    def count_checkout_writes(self, cart):
+        # One write per line plus the order and its rollup shard
+        return len(cart) + 2
+
+    def _checkout_error(self, checkout):
+        """Why a checkout can never be written, or None when it is valid"""
+        if not isinstance(checkout.get('checkout_id'), str) or not checkout['checkout_id']:
+            return 'missing checkout ID'
+        cart = checkout.get('cart')
+        if not isinstance(cart, dict) or not cart:
+            return 'cart is empty or not a mapping'
+        for name, details in cart.items():
+            if not isinstance(details, dict):
+                return f"line {name!r} is not a mapping"
+            if not _is_number(details.get('price')) or details['price'] < 0:
+                return f"line {name!r} has an invalid price"
+            if not isinstance(details.get('quantity'), int) or isinstance(details['quantity'], bool) \
+                    or details['quantity'] <= 0:
+                return f"line {name!r} has an invalid quantity"
+        if not _is_number(checkout.get('total')):
+            return 'invalid total'
+        if self.count_checkout_writes(cart) > self.MAX_BATCH_WRITES:
+            return f"{len(cart)} lines need more writes than one batch allows"
+        return None
+
+    def validate_checkouts(self, checkouts):
+        """Raise InvalidCheckoutError for the checkouts that can never be written"""
+        invalid = {}
+        for checkout in checkouts:
+            error = self._checkout_error(checkout)
+            if error is not None:
+                invalid[checkout.get('checkout_id')] = error
+        if invalid:
+            raise InvalidCheckoutError(invalid)
+
+    def rollup_key(self, checkout_id, timestamp):
+        """Day, hour and shard a checkout is counted under (server local time)"""
+        if not isinstance(timestamp, datetime.datetime):
+            # Server timestamps are only known after the commit
+            timestamp = datetime.datetime.now()
+        local_time = timestamp.astimezone() if timestamp.tzinfo else timestamp
+        return {
+            'date': local_time.strftime('%Y-%m-%d'),
+            'hour': local_time.hour,
+            'shard': zlib.crc32(checkout_id.encode()) % self.rollup_shards
+        }
+
+    def _parse_date_range(self, start_date, end_date):
+        """Turn inclusive start/end dates into a [start, end) datetime range"""
+        if not start_date or not end_date:
+            return None, None
+
+        if isinstance(start_date, str):
+            start_date = datetime.datetime.fromisoformat(start_date)
+        if isinstance(end_date, str):
+            end_date = datetime.datetime.fromisoformat(end_date)
+
+        return start_date, end_date + datetime.timedelta(days=1)
+
+    def save_transaction(self, cart, total, checkout_id=None, timestamp=None):
+        """Store one checkout; returns {'checkout_id', 'transaction_ids', 'total', 'timestamp'} or None"""
+        raise NotImplementedError
+
+    def save_transactions(self, checkouts):
+        """Store several {'checkout_id', 'cart', 'total', 'timestamp', 'lane'} checkouts at once.
+
+        Returns the list of checkout IDs written, or None on failure. Writing
+        the same checkout ID twice must not duplicate it. Checkouts that can
+        never be written raise InvalidCheckoutError; every other failure is
+        worth retrying.
+        """
+        raise NotImplementedError
+
+    def get_sales_summary(self, start_date, end_date):
+        """Totals, days, hours and products for an inclusive range of YYYY-MM-DD dates"""
+        raise NotImplementedError
+
+    def get_transactions(self, limit=20):
+        """Latest orders, newest first"""
+        raise NotImplementedError
+
+    def get_transactions_page(self, page_size=20, start_after=None, start_date=None, end_date=None):
+        """One page of orders, newest first, as {'transactions', 'next_page_token'}"""
+        raise NotImplementedError
+
+    def iter_transaction_pages(self, page_size=100, start_date=None, end_date=None, start_after=None):
+        """Yield pages of orders, newest first, until the range is exhausted.
+
+        start_after is an order ID or a (timestamp, order ID) pair. A pair
+        keeps its place even after that order is deleted; a missing order ID
+        raises ValueError rather than ending the listing early.
+        """
+        raise NotImplementedError
+
+    def get_transactions_by_date_range(self, start_date, end_date):
+        raise NotImplementedError
+
+    def get_transaction_by_id(self, transaction_id):
+        raise NotImplementedError
+
+    def delete_transaction(self, transaction_id):
+        raise NotImplementedError
+
+    def delete_all_transactions(self, on_progress=None, page_size=500, max_workers=None):
+        raise NotImplementedError
+
+
+def create_storage(backend, firebase_credentials='firebase-credentials.json', sqlite_path='store.db', **options):
+    """Build the storage backend named by a STORAGE_BACKEND-style value.
+
+    'firestore' (the default) needs Firebase credentials, 'sqlite' keeps
+    everything in a local database file and 'memory' keeps it in process
+    memory only. Backends are imported lazily so the local ones run without
+    firebase_admin installed.
+    """
+    backend = (backend or 'firestore').strip().lower()
+
+    if backend == 'sqlite':
+        from SQLiteStorage import SQLiteStorage
+        return SQLiteStorage(sqlite_path, **options)
+    if backend == 'memory':
+        from SQLiteStorage import MemoryStorage
+        return MemoryStorage(**options)
+    if backend == 'firestore':
+        from FirestoreManager import FirestoreManager
+        return FirestoreManager(firebase_credentials, **options)
+
+    raise ValueError(f"Unknown storage backend {backend}, expected firestore, sqlite or memory")
+
+
+def create_storage_from_env(**options):
+    """create_storage configured by STORAGE_BACKEND, FIREBASE_CREDENTIALS_PATH and SQLITE_STORAGE_PATH"""
+    return create_storage(
+        os.getenv('STORAGE_BACKEND', 'firestore'),
+        firebase_credentials=os.getenv('FIREBASE_CREDENTIALS_PATH', 'firebase-credentials.json'),
+        sqlite_path=os.getenv('SQLITE_STORAGE_PATH', 'store.db'),
+        **options
+    )
@@ -0,0 +1,203 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from Metrics import Histogram
+from StorageBackend import TransientStorageError
+
+
+class StorageRequest:
+    """A storage operation tracked from submission until its single completion callback"""
+
+    def __init__(self, operation, fn, args, kwargs, on_complete, timeout, retries, is_failure):
+        self.request_id = uuid.uuid4().hex[:12]
+        self.operation = operation
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.on_complete = on_complete
+        self.timeout = timeout
+        self.retries = retries
+        self.is_failure = is_failure
+        self.submitted_at = time.monotonic()
+        self.attempts = 0
+        self.status = 'pending'
+        self.future = None
+        self.timer = None
+        self.done = False
+
+
+class StorageExecutor:
+    """Runs blocking storage calls on a bounded worker pool and reports results via callbacks.
+
+    Every request completes exactly once with a status of 'success', 'failed',
+    'unknown', 'cancelled' or 'rejected'. Only TransientStorageError is
+    retried; any other error is final. A timed out call cannot be interrupted
+    and may still take effect, so it completes as 'unknown' rather than
+    'failed'; its worker finishes in the background and the late result is
+    dropped. Such a request still counts against max_pending until its worker
+    returns, so a backend that stops answering cannot pile up unbounded
+    stuck calls behind the pool.
+    """
+
+    LATENCY_BUCKETS_MS = [10, 50, 100, 250, 500, 1000, 2500, 5000, 10000]
+
+    def __init__(self, max_workers=4, max_pending=64, default_timeout=10.0, max_retries=2, backoff=0.5):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.default_timeout = default_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='storage')
+        self.requests = {}
+        # Requests whose worker has not returned yet, including timed out ones
+        self.in_flight = set()
+        self.lock = threading.Lock()
+        self.counters = {
+            'submitted': 0,
+            'success': 0,
+            'failed': 0,
+            'unknown': 0,
+            'cancelled': 0,
+            'rejected': 0,
+            'retries': 0
+        }
+        self.latency_histogram = Histogram(self.LATENCY_BUCKETS_MS)
+
+    def submit(self, operation, fn, *args, on_complete=None, timeout=None, retries=None,
+               is_failure=None, **kwargs):
+        """Queue fn(*args, **kwargs) and return its request ID immediately.
+
+        is_failure lets callers treat a returned value (e.g. None from a
+        manager that swallows its own exceptions) as a failure. Such failures
+        are final: the backend already told us the call did not take effect.
+        """
+        request = StorageRequest(
+            operation, fn, args, kwargs, on_complete,
+            self.default_timeout if timeout is None else timeout,
+            self.max_retries if retries is None else retries,
+            is_failure
+        )
+
+        with self.lock:
+            self.counters['submitted'] += 1
+            if len(self.in_flight) >= self.max_pending:
+                rejected = True
+            else:
+                rejected = False
+                self.requests[request.request_id] = request
+                self.in_flight.add(request.request_id)
+
+        if rejected:
+            print(f"Storage request {operation} rejected: {self.max_pending} requests already in flight")
+            self._complete(request, 'rejected', error='Too many pending storage requests')
+            return request.request_id
+
+        if request.timeout and request.timeout > 0:
+            request.timer = threading.Timer(request.timeout, self._expire, args=(request,))
+            request.timer.daemon = True
+            request.timer.start()
+
+        request.future = self.pool.submit(self._run, request)
+        return request.request_id
+
+    def cancel(self, request_id):
+        with self.lock:
+            request = self.requests.get(request_id)
+        if request is None:
+            return False
+
+        # A queued call is dropped outright; a running one stops before its next retry
+        if request.future is not None and request.future.cancel():
+            self._release(request)
+        return self._complete(request, 'cancelled', error='Cancelled')
+
+    def _release(self, request):
+        with self.lock:
+            self.in_flight.discard(request.request_id)
+
+    def _run(self, request):
+        try:
+            self._attempt(request)
+        finally:
+            self._release(request)
+
+    def _attempt(self, request):
+        while not request.done:
+            request.attempts += 1
+            request.status = 'running'
+            try:
+                result = request.fn(*request.args, **request.kwargs)
+                if request.is_failure is None or not request.is_failure(result):
+                    self._complete(request, 'success', result=result)
+                    return
+                self._complete(request, 'failed', error=f"{request.operation} returned no result")
+                return
+            except TransientStorageError as e:
+                error = str(e)
+            except Exception as e:
+                self._complete(request, 'failed', error=str(e))
+                return
+
+            if request.attempts > request.retries:
+                self._complete(request, 'failed', error=error)
+                return
+
+            with self.lock:
+                self.counters['retries'] += 1
+            delay = self.backoff * (2 ** (request.attempts - 1))
+            print(f"Storage request {request.operation} failed ({error}), retrying in {delay:.1f}s")
+            request.status = 'retrying'
+            time.sleep(delay)
+
+    def _expire(self, request):
+        error = f"Timed out after {request.timeout}s, the operation may still complete"
+        if self._complete(request, 'unknown', error=error):
+            print(f"Storage request {request.operation} timed out after {request.timeout}s, outcome unknown")
+
+    def _complete(self, request, status, result=None, error=None):
+        with self.lock:
+            if request.done:
+                return False
+            request.done = True
+            request.status = status
+            self.requests.pop(request.request_id, None)
+            self.counters[status] += 1
+
+        if request.timer is not None:
+            request.timer.cancel()
+        self.latency_histogram.observe((time.monotonic() - request.submitted_at) * 1000)
+
+        if request.on_complete is not None:
+            try:
+                request.on_complete(request.request_id, status, result, error)
+            except Exception as e:
+                print(f"Storage completion callback error for {request.operation}: {e}")
+        return True
+
+    def get_pending(self):
+        with self.lock:
+            return [{
+                'request_id': request.request_id,
+                'operation': request.operation,
+                'status': request.status,
+                'attempts': request.attempts,
+                'age_ms': round((time.monotonic() - request.submitted_at) * 1000, 1)
+            } for request in self.requests.values()]
+
+    def get_stats(self):
+        with self.lock:
+            stats = dict(self.counters)
+            stats['pending'] = len(self.requests)
+            stats['in_flight'] = len(self.in_flight)
+        stats['max_workers'] = self.max_workers
+        stats['latency_ms'] = self.latency_histogram.snapshot()
+        return stats
+
+    def shutdown(self):
+        with self.lock:
+            requests = list(self.requests.values())
+        for request in requests:
+            self.cancel(request.request_id)
+        self.pool.shutdown(wait=False)
@@ -9,6 +9,7 @@ import io
 class StreamingServer:
     def __init__(self):
         self.frame = None
+        self.jpeg = None
         self.frame_lock = threading.Lock()
         self.output_frame = None
         self.frame_count = 0
@@ -19,7 +20,20 @@ class StreamingServer:
         if frame is not None:
             with self.frame_lock:
                 self.frame = frame.copy()
+                self.jpeg = None
                 self.frame_count += 1
+
+    def update_jpeg(self, jpeg):
+        """Update the current frame with already-encoded JPEG bytes"""
+        if jpeg is not None:
+            with self.frame_lock:
+                self.jpeg = jpeg
+                self.frame_count += 1
+
+    def get_jpeg(self):
+        """Get current passthrough JPEG bytes, if any"""
+        with self.frame_lock:
+            return self.jpeg
     
     def get_frame(self):
         """Get current frame thread-safely"""
@@ -55,31 +69,36 @@ class StreamingServer:
             try:
                 frame_count += 1
                 
-                # Get current frame
-                frame = self.get_frame()
-                
-                if frame is None:
-                    frame = self._create_placeholder_frame()
-                    if frame_count % 50 == 0:
-                        print(f"⚠️ Using placeholder frame (count: {frame_count})")
-                
-                # Encode frame as JPEG with high quality
-                encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), 90]
-                success, encoded_image = cv2.imencode('.jpg', frame, encode_param)
-                
-                if not success:
-                    print(f"❌ Frame encoding failed at frame {frame_count}")
-                    continue
-                
+                frame_bytes = self.get_jpeg()
+
+                if frame_bytes is None:
+                    # Get current frame
+                    frame = self.get_frame()
+
+                    if frame is None:
+                        frame = self._create_placeholder_frame()
+                        if frame_count % 50 == 0:
+                            print(f"⚠️ Using placeholder frame (count: {frame_count})")
+
+                    # Encode frame as JPEG with high quality
+                    encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), 90]
+                    success, encoded_image = cv2.imencode('.jpg', frame, encode_param)
+
+                    if not success:
+                        print(f"❌ Frame encoding failed at frame {frame_count}")
+                        continue
+
+                    frame_bytes = encoded_image.tobytes()
+
                 # Log every 100 frames
                 if frame_count % 100 == 0:
-                    print(f"📡 MJPEG: Sent {frame_count} frames, current size: {len(encoded_image)} bytes")
-                
+                    print(f"📡 MJPEG: Sent {frame_count} frames, current size: {len(frame_bytes)} bytes")
+
                 # Create MJPEG frame
                 yield (b'--frame\r\n'
                        b'Content-Type: image/jpeg\r\n'
-                       b'Content-Length: ' + str(len(encoded_image)) + b'\r\n'
-                       b'\r\n' + encoded_image.tobytes() + b'\r\n')
+                       b'Content-Length: ' + str(len(frame_bytes)).encode() + b'\r\n'
+                       b'\r\n' + frame_bytes + b'\r\n')
                 
                 # Control frame rate - 25 FPS
                 time.sleep(0.04)
@@ -96,6 +115,10 @@ class StreamingServer:
     def generate_single_frame(self):
         """Generate single frame for fallback"""
         try:
+            jpeg = self.get_jpeg()
+            if jpeg is not None:
+                return jpeg
+
             frame = self.get_frame()
             
             if frame is None:
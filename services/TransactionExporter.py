@@ -0,0 +1,249 @@
+import csv
+import datetime
+import io
+import json
+import os
+
+from StorageBackend import normalize_name
+
+
+class TransactionExporter:
+    """Streaming export of transaction lines to CSV or Parquet.
+
+    Orders are read newest first a page at a time through the storage
+    backend's iter_transaction_pages and flattened into one row per cart
+    line, so memory is bounded by the page size (plus one row group for
+    Parquet) whatever the size of the range. A product filter keeps only the
+    matching lines; order_total is still the total of the whole order.
+
+    File exports record a checkpoint after every page (CSV) or part file
+    (Parquet) holding the timestamp and ID of the last exported order, so an
+    interrupted export is resumed from there without duplicating or skipping
+    orders, even if that order has been deleted since.
+    """
+
+    FORMATS = ('csv', 'parquet')
+    COLUMNS = ['checkout_id', 'timestamp', 'product', 'price', 'quantity', 'subtotal', 'order_total']
+    PAGE_SIZE = 500
+    # Rows per Parquet part file in file exports, and per row group in streamed ones
+    PARQUET_PART_ROWS = 100000
+
+    def __init__(self, storage, page_size=PAGE_SIZE):
+        self.storage = storage
+        self.page_size = max(1, page_size)
+
+    def _rows(self, order, products):
+        timestamp = order.get('timestamp')
+        if isinstance(timestamp, datetime.datetime):
+            if timestamp.tzinfo is None:
+                timestamp = timestamp.replace(tzinfo=datetime.timezone.utc)
+        else:
+            timestamp = None
+
+        rows = []
+        for item in order.get('items', []):
+            if products and normalize_name(item.get('name', '')) not in products:
+                continue
+            rows.append({
+                'checkout_id': order['id'],
+                'timestamp': timestamp,
+                'product': item.get('name'),
+                'price': item.get('price'),
+                'quantity': item.get('quantity'),
+                'subtotal': item.get('subtotal', (item.get('price') or 0) * (item.get('quantity') or 0)),
+                'order_total': order.get('total')
+            })
+        return rows
+
+    def _cursor(self, order):
+        """JSON-friendly [timestamp, order ID] of an order, or just its ID without a timestamp"""
+        timestamp = order.get('timestamp')
+        if isinstance(timestamp, datetime.datetime):
+            return [timestamp.isoformat(), order['id']]
+        return order['id']
+
+    def _start_after(self, cursor):
+        if isinstance(cursor, list):
+            return datetime.datetime.fromisoformat(cursor[0]), cursor[1]
+        return cursor
+
+    def iter_pages(self, start_date=None, end_date=None, products=None, start_after=None):
+        """Yield (rows, cursor, orders_read) for each page of orders.
+
+        start_date and end_date are inclusive YYYY-MM-DD dates (both or
+        neither); start_after is the cursor of the last page of an earlier
+        export, or an order ID.
+        """
+        products = {normalize_name(product) for product in products or [] if normalize_name(product)}
+        for page in self.storage.iter_transaction_pages(
+            page_size=self.page_size, start_date=start_date, end_date=end_date,
+            start_after=self._start_after(start_after)
+        ):
+            rows = []
+            for order in page:
+                rows.extend(self._rows(order, products))
+            yield rows, self._cursor(page[-1]), len(page)
+
+    def _csv_text(self, rows, header=False):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if header:
+            writer.writerow(self.COLUMNS)
+        for row in rows:
+            values = dict(row, timestamp=row['timestamp'].isoformat() if row['timestamp'] else '')
+            writer.writerow([values[column] for column in self.COLUMNS])
+        return buffer.getvalue()
+
+    def iter_csv(self, start_date=None, end_date=None, products=None, start_after=None):
+        """Yield the export as CSV text, one chunk per page of orders"""
+        yield self._csv_text([], header=True)
+        for rows, _, _ in self.iter_pages(start_date, end_date, products, start_after):
+            if rows:
+                yield self._csv_text(rows)
+
+    def _pyarrow(self):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise RuntimeError("Parquet export needs pyarrow (pip install pyarrow)")
+        return pyarrow, pyarrow.parquet
+
+    def _schema(self, pa):
+        return pa.schema([
+            ('checkout_id', pa.string()),
+            ('timestamp', pa.timestamp('us', tz='UTC')),
+            ('product', pa.string()),
+            ('price', pa.float64()),
+            ('quantity', pa.int64()),
+            ('subtotal', pa.float64()),
+            ('order_total', pa.float64())
+        ])
+
+    def _table(self, pa, rows):
+        return pa.Table.from_pydict({column: [row[column] for row in rows] for column in self.COLUMNS},
+                                    schema=self._schema(pa))
+
+    def write_parquet(self, output, start_date=None, end_date=None, products=None, start_after=None):
+        """Write a single Parquet file to a path or binary file object, one row group at a time"""
+        pa, pq = self._pyarrow()
+        buffered = []
+        with pq.ParquetWriter(output, self._schema(pa)) as writer:
+            for rows, _, _ in self.iter_pages(start_date, end_date, products, start_after):
+                buffered.extend(rows)
+                if len(buffered) >= self.PARQUET_PART_ROWS:
+                    writer.write_table(self._table(pa, buffered))
+                    buffered = []
+            if buffered:
+                writer.write_table(self._table(pa, buffered))
+
+    def export_file(self, path, fmt='csv', start_date=None, end_date=None, products=None,
+                    checkpoint_path=None, resume=False, on_progress=None):
+        """Export to a CSV file or a directory of Parquet part files, resumable through a checkpoint.
+
+        Returns {'orders', 'rows', 'completed', 'resumed'}. on_progress is
+        called with the same dict after every checkpoint.
+        """
+        if fmt not in self.FORMATS:
+            raise ValueError(f"Unsupported format {fmt}, expected one of {', '.join(self.FORMATS)}")
+        if fmt == 'parquet':
+            self._pyarrow()
+
+        checkpoint_path = checkpoint_path or f"{path}.checkpoint.json"
+        job = {
+            'path': os.path.abspath(path),
+            'format': fmt,
+            'start_date': start_date,
+            'end_date': end_date,
+            'products': sorted({normalize_name(product) for product in products or []})
+        }
+        state = {'cursor': None, 'orders': 0, 'rows': 0, 'offset': 0, 'parts': 0, 'completed': False}
+
+        resumed = False
+        if resume and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as f:
+                saved = json.load(f)
+            if saved.get('job') != job:
+                raise ValueError(f"Checkpoint {checkpoint_path} belongs to a different export")
+            state.update(saved['state'])
+            resumed = True
+            if state['completed']:
+                return self._progress(state, resumed)
+
+        def save_checkpoint():
+            temp_path = f"{checkpoint_path}.tmp"
+            with open(temp_path, 'w') as f:
+                json.dump({'job': job, 'state': state}, f, indent=2)
+            os.replace(temp_path, checkpoint_path)
+            if on_progress:
+                on_progress(self._progress(state, resumed))
+
+        pages = self.iter_pages(start_date, end_date, job['products'], state['cursor'])
+        if fmt == 'csv':
+            self._export_csv(path, pages, state, save_checkpoint)
+        else:
+            self._export_parquet(path, pages, state, save_checkpoint)
+
+        state['completed'] = True
+        save_checkpoint()
+        return self._progress(state, resumed)
+
+    def _progress(self, state, resumed):
+        return {'orders': state['orders'], 'rows': state['rows'], 'completed': state['completed'],
+                'resumed': resumed}
+
+    def _export_csv(self, path, pages, state, save_checkpoint):
+        # Anything after the checkpointed offset was written by the interrupted run
+        # after its last checkpoint and is written again
+        if state['offset'] and (not os.path.exists(path) or os.path.getsize(path) < state['offset']):
+            raise ValueError(f"{path} is shorter than its checkpoint, start the export again without resume")
+
+        with open(path, 'a+' if state['offset'] else 'w', encoding='utf-8', newline='') as f:
+            if state['offset']:
+                f.truncate(state['offset'])
+                f.seek(state['offset'])
+            else:
+                f.write(self._csv_text([], header=True))
+
+            for rows, cursor, orders in pages:
+                f.write(self._csv_text(rows))
+                f.flush()
+                os.fsync(f.fileno())
+                state.update(cursor=cursor, orders=state['orders'] + orders, rows=state['rows'] + len(rows),
+                             offset=f.tell())
+                save_checkpoint()
+
+    def _export_parquet(self, path, pages, state, save_checkpoint):
+        pa, pq = self._pyarrow()
+        os.makedirs(path, exist_ok=True)
+        buffered = []
+        pending = {'cursor': state['cursor'], 'orders': 0}
+
+        def write_part():
+            part_path = os.path.join(path, f"part-{state['parts']:05d}.parquet")
+            temp_path = f"{part_path}.tmp"
+            pq.write_table(self._table(pa, buffered), temp_path)
+            os.replace(temp_path, part_path)
+            state.update(cursor=pending['cursor'], orders=state['orders'] + pending['orders'],
+                         rows=state['rows'] + len(buffered), parts=state['parts'] + 1)
+            save_checkpoint()
+            buffered.clear()
+            pending['orders'] = 0
+
+        for rows, cursor, orders in pages:
+            buffered.extend(rows)
+            pending['cursor'] = cursor
+            pending['orders'] += orders
+            if len(buffered) >= self.PARQUET_PART_ROWS:
+                write_part()
+            elif not buffered:
+                # Nothing waits to be written, so the cursor can move on right away
+                state.update(cursor=cursor, orders=state['orders'] + pending['orders'])
+                pending['orders'] = 0
+                save_checkpoint()
+
+        if buffered:
+            write_part()
+        elif pending['orders']:
+            # Trailing orders without matching lines still move the cursor
+            state.update(cursor=pending['cursor'], orders=state['orders'] + pending['orders'])
@@ -7,6 +7,7 @@ import numpy as np
 class VideoStreamer:
     def __init__(self):
         self.frame = None
+        self.jpeg = None
         self.lock = threading.Lock()
         self.is_active = False
         self.frame_ready = threading.Event()
@@ -19,7 +20,19 @@ class VideoStreamer:
         if frame is not None:
             with self.lock:
                 self.frame = frame.copy()
+                self.jpeg = None
                 self.frame_ready.set()
+
+    def update_jpeg(self, jpeg):
+        """Forward already-encoded JPEG bytes without a decode/re-encode round trip"""
+        if jpeg is not None:
+            with self.lock:
+                self.jpeg = jpeg
+                self.frame_ready.set()
+
+    def get_latest_jpeg(self):
+        with self.lock:
+            return self.jpeg
     
     def get_latest_frame(self):
         with self.lock:
@@ -89,28 +102,31 @@ class VideoStreamer:
         
         while self.is_active:
             try:
-                frame = self.get_latest_frame()
-                
-                if frame is None:
-                    frame = self.default_frame.copy()
-                
                 # Add frame counter for debugging
                 frame_count += 1
                 if frame_count % 100 == 0:
                     print(f"Video streamer: {frame_count} frames sent")
-                
-                # Encode with good quality
-                encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), 85]
-                success, buffer = cv2.imencode('.jpg', frame, encode_param)
-                
-                if not success:
-                    print("Frame encoding failed")
-                    # Create a simple error frame
-                    error_frame = np.zeros((480, 640, 3), dtype=np.uint8)
-                    error_frame[:] = [50, 50, 50]
-                    success, buffer = cv2.imencode('.jpg', error_frame, encode_param)
-                
-                frame_bytes = buffer.tobytes()
+
+                frame_bytes = self.get_latest_jpeg()
+
+                if frame_bytes is None:
+                    frame = self.get_latest_frame()
+
+                    if frame is None:
+                        frame = self.default_frame.copy()
+
+                    # Encode with good quality
+                    encode_param = [int(cv2.IMWRITE_JPEG_QUALITY), 85]
+                    success, buffer = cv2.imencode('.jpg', frame, encode_param)
+
+                    if not success:
+                        print("Frame encoding failed")
+                        # Create a simple error frame
+                        error_frame = np.zeros((480, 640, 3), dtype=np.uint8)
+                        error_frame[:] = [50, 50, 50]
+                        success, buffer = cv2.imencode('.jpg', error_frame, encode_param)
+
+                    frame_bytes = buffer.tobytes()
                 
                 yield (b'--frame\r\n'
                        b'Content-Type: image/jpeg\r\n'
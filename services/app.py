@@ -1,5 +1,5 @@
-from flask import Flask, Response, jsonify
-from flask_socketio import SocketIO
+from flask import Flask, Response, jsonify, request
+from flask_socketio import SocketIO, ConnectionRefusedError, join_room, leave_room
 from flask_cors import CORS
 import threading
 import time
@@ -8,16 +8,25 @@ import os
 import cv2
 import datetime
 import json
+import base64
+import uuid
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
-from CameraHandler import Camera
+from FrameSources import create_camera
 from DetectorManager import DetectorManager
 from ProductManager import ProductManager
-from FirestoreManager import FirestoreManager
+from StorageBackend import TransientStorageError, create_storage_from_env, normalize_name
 from VideoStreamer import VideoStreamer
 from StreamingServer import StreamingServer
+from FrameScheduler import FrameScheduler
+from StatusFrameCache import StatusFrameCache
+from StorageExecutor import StorageExecutor
+from CheckoutQueue import CheckoutQueue
+from ProductImporter import ProductImporter
+from TransactionExporter import TransactionExporter
 
 
 def format_transaction_for_json(transaction):
@@ -55,22 +64,96 @@ class SelfCheckoutApp:
             engineio_logger=False  # Disable engine.io logging
         )
         
-        self.firestore_manager = FirestoreManager(os.getenv('FIREBASE_CREDENTIALS_PATH', 'firebase-credentials.json'))
-        self.product_manager = ProductManager(self.firestore_manager)
-        self.camera = Camera(int(os.getenv('CAMERA_ID', 0)))
+        # STORAGE_BACKEND picks firestore (default), sqlite or memory; the local ones need no Firebase
+        self.storage = create_storage_from_env(
+            history_cache_ttl=float(os.getenv('HISTORY_CACHE_TTL', 30)),
+            history_cache_size=int(os.getenv('HISTORY_CACHE_SIZE', 128)),
+            rollup_shards=int(os.getenv('ROLLUP_SHARDS', 4)),
+            bulk_delete_workers=int(os.getenv('BULK_DELETE_WORKERS', 4))
+        )
+        self.product_manager = ProductManager(
+            self.storage,
+            # Local backends already are a local copy, so only Firestore needs the snapshot
+            snapshot_path=os.getenv('CATALOG_SNAPSHOT_PATH', 'catalog_snapshot.json')
+            if self.storage.name == 'firestore' else None,
+            reconcile_interval=float(os.getenv('CATALOG_RECONCILE_INTERVAL', 300))
+        )
+        # Storage round-trips run here so socket handlers never wait on the network
+        self.storage_executor = StorageExecutor(
+            max_workers=int(os.getenv('STORAGE_MAX_WORKERS', 4)),
+            max_pending=int(os.getenv('STORAGE_MAX_PENDING', 64)),
+            default_timeout=float(os.getenv('STORAGE_TIMEOUT', 10)),
+            max_retries=int(os.getenv('STORAGE_MAX_RETRIES', 2)),
+            backoff=float(os.getenv('STORAGE_RETRY_BACKOFF', 0.5))
+        )
+        self.storage_bulk_timeout = float(os.getenv('STORAGE_BULK_TIMEOUT', 120))
+        # Checkouts are committed locally first and replicated to storage in the background
+        self.checkout_queue = CheckoutQueue(
+            self.storage,
+            path=os.getenv('CHECKOUT_QUEUE_PATH', 'checkout_queue.db'),
+            batch_size=int(os.getenv('CHECKOUT_REPLICATION_BATCH', 50)),
+            max_attempts=int(os.getenv('CHECKOUT_MAX_ATTEMPTS', 5))
+        )
+        self.product_importer = ProductImporter(
+            self.storage, self.product_manager,
+            max_workers=int(os.getenv('PRODUCT_IMPORT_WORKERS', 4))
+        )
+        self.transaction_exporter = TransactionExporter(
+            self.storage,
+            page_size=int(os.getenv('TRANSACTION_EXPORT_PAGE_SIZE', 500))
+        )
+        # Chunked catalog uploads in progress, keyed by upload ID
+        self.product_uploads = {}
+        self.product_uploads_lock = threading.Lock()
+        self.product_upload_max_bytes = int(os.getenv('PRODUCT_IMPORT_MAX_BYTES', 20 * 1024 * 1024))
+        self.camera = create_camera(
+            os.getenv('CAMERA_ID', '0'),
+            fps=float(os.getenv('CAMERA_SOURCE_FPS', 0)) or None,
+            pacing=os.getenv('CAMERA_SOURCE_PACING', 'realtime'),
+            passthrough=os.getenv('CAMERA_PASSTHROUGH', 'False').lower() == 'true',
+            decode_scale=int(os.getenv('CAMERA_DECODE_SCALE', 1))
+        )
         self.detector_manager = DetectorManager(
             model_path=os.getenv('MODEL_PATH', 'models/yolov5s.pt'), 
-            product_manager=self.product_manager
+            product_manager=self.product_manager,
+            inference_batch_size=int(os.getenv('INFERENCE_BATCH_SIZE', 4)),
+            inference_batch_wait_ms=float(os.getenv('INFERENCE_BATCH_WAIT_MS', 10))
         )
         
+        self.camera.on_stall = self._handle_camera_stall
+        self.product_manager.subscribe(self._handle_catalog_change)
+
         self.video_streamer = VideoStreamer()
         self.streaming_server = StreamingServer()
+        self.frame_scheduler = FrameScheduler(self._get_target_fps())
+        self.status_frame_cache = StatusFrameCache()
+        self.published_status = None
+        self.state_changed = threading.Event()
+        # The lane this server's camera scans for; each lane has its own cart and Socket.IO room
+        self.lane_id = os.getenv('LANE_ID', 'default')
+        # Lanes clients may join; carts only exist for these, and only lane_id has a camera
+        self.lanes = {lane.strip() for lane in os.getenv('CHECKOUT_LANES', '').split(',') if lane.strip()}
+        self.lanes.add(self.lane_id)
+        self.client_lanes = {}
+        self.emitted_cart_versions = {}
+        self.cart_emit_lock = threading.Lock()
         self.processing_thread = None
         self.is_processing = False
         self.camera_enabled = False  # Camera starts off by default
+        self.camera_autostart = os.getenv('CAMERA_AUTOSTART', 'False').lower() == 'true'
+
+        # 'metadata' sends detections as data next to the camera's own JPEG bytes
+        # instead of burning the overlay into re-encoded frames
+        self.overlay_mode = os.getenv('VIDEO_OVERLAY_MODE', 'burned').lower()
+        self.inference_interval = 1.0 / max(1.0, float(os.getenv('INFERENCE_FPS', 10)))
+        self.next_inference_time = 0
+        self.overlay_metadata = None
         self.yolo_initialized = False
         self.yolo_initializing = False
-        self.last_transaction_request = 0  # Throttle transaction requests
+        self.history_streams = {}
+        # Bulk deletes running outside the storage executor, operation -> request ID
+        self.bulk_deletes = {}
+        self.bulk_deletes_lock = threading.Lock()
 
         self.register_routes()
         self.register_socket_events()
@@ -93,10 +176,170 @@ class SelfCheckoutApp:
             return jsonify({
                 'status': 'healthy',
                 'camera': self.camera.is_running,
-                'firestore': self.firestore_manager.is_connected(),
-                'products_count': len(self.product_manager.get_products())
+                'firestore': self.storage.is_connected(),
+                'storage_backend': self.storage.name,
+                'checkout_queue_depth': self.checkout_queue.get_depth(),
+                'products_count': len(self.product_manager.get_products()),
+                'catalog_version': self.product_manager.get_version(),
+                'catalog': self.product_manager.get_sync_status()
             })
 
+        @self.app.route('/api/analytics/sales')
+        def sales_analytics():
+            start_date, end_date = self._get_analytics_range(request.args)
+            try:
+                summary = self.storage.get_sales_summary(start_date, end_date)
+            except TransientStorageError:
+                summary = None
+            if summary is None:
+                return jsonify({'error': 'Sales summary unavailable'}), 503
+            return jsonify(summary)
+
+        @self.app.route('/api/products')
+        def list_products():
+            try:
+                return jsonify(self._get_product_page(request.args))
+            except ValueError as e:
+                return jsonify({'error': str(e)}), 400
+
+        @self.app.route('/api/products/import', methods=['POST'])
+        def import_products():
+            """Chunked catalog upload: POST the file in pieces, the last one with final=1.
+
+            The first chunk may omit upload_id; the response carries the ID to
+            send with the following chunks. The final chunk runs the import and
+            returns its report with per-row errors.
+            """
+            fmt = request.args.get('format', 'csv').lower()
+            if fmt not in ProductImporter.FORMATS:
+                return jsonify({'error': f"Unsupported format {fmt}"}), 400
+
+            upload_id, received, error = self._append_product_upload(request.args.get('upload_id'),
+                                                                     request.get_data())
+            if error:
+                return jsonify({'error': error}), 400 if upload_id is None else 413
+
+            if request.args.get('final', '0') not in ('1', 'true'):
+                return jsonify({'upload_id': upload_id, 'received': received})
+
+            with self.product_uploads_lock:
+                upload = self.product_uploads.pop(upload_id, None)
+            if upload is None:
+                # Finished or expired by a concurrent request since the chunk was added
+                return jsonify({'error': f"Unknown upload {upload_id}"}), 400
+            try:
+                upload['file'].seek(0)
+                text = upload['file'].read().decode('utf-8-sig')
+            except UnicodeDecodeError:
+                return jsonify({'upload_id': upload_id, 'error': 'File is not valid UTF-8'}), 400
+            finally:
+                upload['file'].close()
+
+            if not self.storage.is_connected():
+                return jsonify({'upload_id': upload_id, 'error': 'Storage not connected'}), 503
+
+            dry_run = request.args.get('dry_run', '0') in ('1', 'true')
+            report = self.product_importer.import_text(text, fmt, dry_run=dry_run)
+            print(f"Product import {upload_id}: {report['created']} created, {report['updated']} updated, "
+                  f"{report['unchanged']} unchanged, {report['failed']} failed")
+            report['upload_id'] = upload_id
+            return jsonify(report)
+
+        @self.app.route('/api/products/export')
+        def export_products():
+            fmt = request.args.get('format', 'csv').lower()
+            if fmt not in ProductImporter.FORMATS:
+                return jsonify({'error': f"Unsupported format {fmt}"}), 400
+
+            return Response(
+                self.product_importer.iter_export(fmt),
+                mimetype='text/csv' if fmt == 'csv' else 'application/json',
+                headers={'Content-Disposition': f'attachment; filename=products.{fmt}'}
+            )
+
+        @self.app.route('/api/transactions/export')
+        def export_transactions():
+            """Stream transaction lines (newest first) as CSV or Parquet.
+
+            start/end (inclusive YYYY-MM-DD) and repeated product parameters
+            filter the export. An interrupted CSV download can be continued
+            with start_after set to the last checkout_id whose lines were all
+            received.
+            """
+            fmt = request.args.get('format', 'csv').lower()
+            if fmt not in TransactionExporter.FORMATS:
+                return jsonify({'error': f"Unsupported format {fmt}"}), 400
+
+            start_date, end_date = request.args.get('start'), request.args.get('end')
+            if bool(start_date) != bool(end_date):
+                return jsonify({'error': 'start and end must be given together'}), 400
+            try:
+                for value in filter(None, (start_date, end_date)):
+                    datetime.date.fromisoformat(value)
+            except ValueError:
+                return jsonify({'error': 'Dates must be YYYY-MM-DD'}), 400
+
+            if not self.storage.is_connected():
+                return jsonify({'error': 'Storage not connected'}), 503
+
+            options = {
+                'start_date': start_date,
+                'end_date': end_date,
+                'products': request.args.getlist('product'),
+                'start_after': request.args.get('start_after')
+            }
+            filename = f"transactions-{start_date}-{end_date}" if start_date else 'transactions'
+
+            if fmt == 'csv':
+                return Response(
+                    self.transaction_exporter.iter_csv(**options),
+                    mimetype='text/csv',
+                    headers={'Content-Disposition': f'attachment; filename={filename}.csv'}
+                )
+
+            # Parquet needs its footer written last, so it is built in a temporary
+            # file (one row group in memory at a time) and streamed from there
+            output = tempfile.TemporaryFile()
+            try:
+                self.transaction_exporter.write_parquet(output, **options)
+            except RuntimeError as e:
+                output.close()
+                return jsonify({'error': str(e)}), 501
+            except Exception as e:
+                output.close()
+                print(f"Error exporting transactions: {e}")
+                return jsonify({'error': 'Export failed'}), 500
+
+            def stream():
+                with output:
+                    output.seek(0)
+                    while True:
+                        chunk = output.read(1024 * 1024)
+                        if not chunk:
+                            break
+                        yield chunk
+
+            return Response(
+                stream(),
+                mimetype='application/vnd.apache.parquet',
+                headers={'Content-Disposition': f'attachment; filename={filename}.parquet'}
+            )
+
+        @self.app.route('/api/metrics')
+        def metrics():
+            stats = {
+                'inference': self.detector_manager.get_inference_stats(),
+                'camera': self.camera.get_capture_stats(),
+                'processing': self.frame_scheduler.get_stats(),
+                'storage': self.storage_executor.get_stats(),
+                'checkout_queue': self.checkout_queue.get_stats(),
+                'status_frames': self.status_frame_cache.get_stats(),
+                'timestamp': time.time()
+            }
+            if self.storage.history_cache is not None:
+                stats['history_cache'] = self.storage.history_cache.get_stats()
+            return jsonify(stats)
+
         @self.app.route('/video_feed')
         def video_feed():
             try:
@@ -285,23 +528,49 @@ class SelfCheckoutApp:
     def register_socket_events(self):
         @self.socketio.on('connect')
         def handle_connect():
-            print('Client connected')
+            lane_id = request.args.get('lane') or self.lane_id
+            if lane_id not in self.lanes:
+                print(f"Rejected client for unknown lane: {lane_id}")
+                raise ConnectionRefusedError(f"Unknown lane {lane_id}")
+            self._join_lane(lane_id)
+            print(f'Client connected (lane: {lane_id})')
             # Send current states to client
             self.socketio.emit('camera_status', {
                 'enabled': self.camera_enabled,
                 'available': self.camera.is_available()
-            })
+            }, to=request.sid)
             self.socketio.emit('yolo_status', {
                 'initialized': self.yolo_initialized,
                 'initializing': self.yolo_initializing
-            })
+            }, to=request.sid)
+            # Status frames are only broadcast on change, so late joiners need the current one
+            if self.published_status is not None:
+                self._emit_jpeg_via_socket(*self.published_status[1], to=request.sid)
+            self.socketio.emit('cart_sync', self.detector_manager.get_cart_snapshot(lane_id), to=request.sid)
 
         @self.socketio.on('disconnect')
         def handle_disconnect():
+            self.client_lanes.pop(request.sid, None)
             print('Client disconnected')
 
+        @self.socketio.on('join_lane')
+        def handle_join_lane(data):
+            lane_id = data.get('lane') or self.lane_id
+            if lane_id not in self.lanes:
+                return {'error': f"Unknown lane {lane_id}"}
+            self._join_lane(lane_id)
+            self.socketio.emit('cart_sync', self.detector_manager.get_cart_snapshot(lane_id), to=request.sid)
+            print(f"Client moved to lane: {lane_id}")
+
         @self.socketio.on('start_scanning')
         def handle_start_scanning(data):
+            error = self._camera_lane_error('Scanning')
+            if error:
+                # Undo the client's optimistic scanning state
+                self.socketio.emit('scanning_complete', self.detector_manager.get_cart_snapshot(self._client_lane()),
+                                   to=request.sid)
+                return error
+
             zone_start = data.get('zoneStart', 70)
             zone_width = data.get('zoneWidth', 20)
             self.detector_manager.set_zone_parameters(zone_start, zone_width)
@@ -309,218 +578,290 @@ class SelfCheckoutApp:
             if not self.is_processing:
                 self.start_processing()
             
-            self.detector_manager.start_scanning()
+            lane_id = self._client_lane()
+            self.detector_manager.start_scanning(lane_id)
+            self._emit_cart_sync(lane_id)
             print(f"Scanning started with zone start: {zone_start}%, width: {zone_width}%")
 
         @self.socketio.on('stop_scanning')
         def handle_stop_scanning():
+            error = self._camera_lane_error('Scanning')
+            if error:
+                return error
+
+            lane_id = self._client_lane()
             self.detector_manager.stop_scanning()
-            self.socketio.emit('scanning_complete', {
-                'cart': self.detector_manager.get_cart(),
-                'total': self.detector_manager.calculate_total()
-            })
+            self._emit_cart_changes(lane_id)
+            self.socketio.emit('scanning_complete', self.detector_manager.get_cart_snapshot(lane_id),
+                               to=self._lane_room(lane_id))
             print("Scanning stopped")
 
         @self.socketio.on('update_zone')
         def handle_update_zone(data):
+            error = self._camera_lane_error('The counting zone')
+            if error:
+                return error
             self.detector_manager.set_zone_parameters(data['zone_start'], data['zone_width'])
             print(f"Zone updated - start: {data['zone_start']}%, width: {data['zone_width']}%")
 
         @self.socketio.on('clear_cart')
         def handle_clear_cart():
-            self.detector_manager.clear_cart()
-            self.socketio.emit('cart_update', {
-                'cart': {},
-                'total': 0
-            })
+            lane_id = self._client_lane()
+            self.detector_manager.clear_cart(lane_id)
+            self._emit_cart_sync(lane_id)
             print("Cart cleared")
 
         @self.socketio.on('remove_item')
         def handle_remove_item(data):
-            result = self.detector_manager.remove_item(data['name'])
+            lane_id = self._client_lane()
+            result = self.detector_manager.remove_item(data['name'], lane_id)
             if result:
-                self.socketio.emit('cart_update', {
-                    'cart': self.detector_manager.get_cart(),
-                    'total': self.detector_manager.calculate_total()
-                })
+                self._emit_cart_changes(lane_id)
                 self.socketio.emit('item_removed', {
                     'success': True,
                     'name': data['name']
-                })
+                }, to=request.sid)
                 print(f"Removed item: {data['name']} from cart")
             else:
                 self.socketio.emit('item_removed', {
                     'success': False,
                     'name': data['name']
-                })
+                }, to=request.sid)
                 print(f"Failed to remove item: {data['name']} (not found)")
 
         @self.socketio.on('checkout_complete')
         def handle_checkout_complete(data=None):
-            cart = self.detector_manager.get_cart()
-            total = self.detector_manager.calculate_total()
-
-            if self.firestore_manager.is_connected():
-                transaction = self.firestore_manager.save_transaction(cart, total)
-                if transaction:
-                    print(f"Transaction saved to Firestore with IDs: {transaction['transaction_ids']}")
-
-            self.detector_manager.clear_cart()
-            self.socketio.emit('cart_update', {
-                'cart': {},
-                'total': 0
-            })
+            lane_id = self._client_lane()
+            # Taking the cart clears it in the same step, so a scan can't slip in between
+            snapshot = self.detector_manager.take_cart(lane_id)
+
+            if not snapshot['cart']:
+                self._emit_cart_sync(lane_id)
+                return None
+
+            # The local commit is the acknowledgement; storage catches up in the background
+            try:
+                checkout_id = self.checkout_queue.enqueue(snapshot['cart'], snapshot['total'], lane_id)
+            except Exception as e:
+                print(f"Error queueing checkout, cart restored: {e}")
+                self.detector_manager.restore_cart(snapshot, lane_id)
+                self._emit_cart_sync(lane_id)
+                result = {'success': False, 'message': f"Checkout could not be recorded: {e}"}
+                self.socketio.emit('transaction_saved', result, to=request.sid)
+                return result
+
+            self._emit_cart_sync(lane_id)
             print("Checkout completed and cart cleared")
+            result = {
+                'checkout_id': checkout_id,
+                'total': snapshot['total'],
+                'queued': True
+            }
+            self.socketio.emit('transaction_saved', result, to=request.sid)
+            print(f"Checkout {checkout_id} queued for replication")
+            return result
+
+        @self.socketio.on('get_cart')
+        def handle_get_cart():
+            # Full resync for clients that reconnected or missed a cart version
+            self.socketio.emit('cart_sync', self.detector_manager.get_cart_snapshot(self._client_lane()),
+                               to=request.sid)
 
         @self.socketio.on('get_products')
-        def handle_get_products():
-            products = self.product_manager.get_products()
-            self.socketio.emit('products_list', products)
-            print(f"Sent {len(products)} products to client")
+        def handle_get_products(data=None):
+            if data is None:
+                # Legacy full catalog for clients that do not page
+                products = self.product_manager.get_products()
+                self.socketio.emit('products_list', products, to=request.sid)
+                print(f"Sent {len(products)} products to client")
+                return None
+
+            try:
+                page = self._get_product_page(data)
+            except ValueError as e:
+                return {'error': str(e)}
+            page['request'] = data
+            self.socketio.emit('products_page', page, to=request.sid)
+            return {'total': page['total'], 'version': page['version']}
 
         @self.socketio.on('add_product')
         def handle_add_product(data):
-            result = self.product_manager.add_product(data['name'], data['price'])
-            self.socketio.emit('product_added', result)
-            print(f"Added product: {result['name']} - Rp {result['price']}")
+            if self.product_manager.has_product(data['name']):
+                error = f"Product {normalize_name(data['name'])} already exists"
+                self.socketio.emit('storage_complete', {
+                    'request_id': None,
+                    'operation': 'add_product',
+                    'status': 'rejected',
+                    'error': error
+                }, to=request.sid)
+                return {'request_id': None, 'operation': 'add_product', 'error': error}
+
+            return self._submit_storage(
+                'add_product', self.product_manager.add_product, data['name'], data['price'],
+                event='product_added', is_failure=lambda result: result is None
+            )
 
         @self.socketio.on('update_product')
         def handle_update_product(data):
-            result = self.product_manager.update_product(data['name'], data['price'])
-            if result:
-                self.socketio.emit('product_updated', result)
-                print(f"Updated product: {result['name']} - Rp {result['price']}")
+            return self._submit_storage(
+                'update_product', self.product_manager.update_product, data['name'], data['price'],
+                event='product_updated', is_failure=lambda result: result is None
+            )
 
         @self.socketio.on('delete_product')
         def handle_delete_product(data):
-            result = self.product_manager.delete_product(data['name'])
-            if result:
-                self.socketio.emit('product_deleted', result)
-                print(f"Deleted product: {result['name']}")
+            return self._submit_storage(
+                'delete_product', self.product_manager.delete_product, data['name'],
+                event='product_deleted', is_failure=lambda result: result is None
+            )
 
         @self.socketio.on('delete_all_products')
         def handle_delete_all_products():
-            result = self.product_manager.delete_all_products()
-            self.socketio.emit('all_products_deleted', result)
-            print(f"Deleted all products: {result['deleted_count']} products removed")
+            return self._start_bulk_delete(
+                'delete_all_products', self.product_manager.delete_all_products,
+                event='all_products_deleted'
+            )
 
         @self.socketio.on('get_transaction_history')
         def handle_get_transaction_history(data=None):
-            # Throttle requests - only allow one every 2 seconds
-            current_time = time.time()
-            if current_time - self.last_transaction_request < 2.0:
-                print("Transaction history request throttled")
-                return
-            
-            self.last_transaction_request = current_time
-            
-            if not self.firestore_manager.is_connected():
-                self.socketio.emit('transaction_history', [])
-                return
+            # Repeated Firestore requests are served from its history cache
+            if not self.storage.is_connected():
+                self.socketio.emit('transaction_history', [], to=request.sid)
+                return None
 
             limit = data.get('limit', 20) if data else 20
-            transactions = self.firestore_manager.get_transactions(limit=limit)
-
-            formatted_transactions = []
-            for transaction in transactions:
-                formatted_transaction = format_transaction_for_json(transaction)
-
-                if formatted_transaction.get('timestamp'):
-                    timestamp = transaction.get('timestamp')
-                    if hasattr(timestamp, 'strftime'):
-                        formatted_transaction['formatted_date'] = timestamp.strftime('%Y-%m-%d %H:%M:%S')
-                    else:
-                        formatted_transaction['formatted_date'] = str(timestamp)
-
-                formatted_transactions.append(formatted_transaction)
-
-            self.socketio.emit('transaction_history', formatted_transactions)
-            print(f"Sent {len(formatted_transactions)} transactions to client")
+            return self._submit_storage(
+                'get_transactions', self.storage.get_transactions, limit=limit,
+                event='transaction_history', format_result=self._format_transactions
+            )
 
         @self.socketio.on('get_transactions_by_date')
         def handle_get_transactions_by_date(data):
-            if not self.firestore_manager.is_connected():
-                self.socketio.emit('transaction_history', [])
-                return
+            if not self.storage.is_connected():
+                self.socketio.emit('transaction_history', [], to=request.sid)
+                return None
 
             start_date = data.get('start_date')
             end_date = data.get('end_date')
 
             if not start_date or not end_date:
-                transactions = self.firestore_manager.get_transactions()
-            else:
-                transactions = self.firestore_manager.get_transactions_by_date_range(start_date, end_date)
-
-            formatted_transactions = []
-            for transaction in transactions:
-                formatted_transaction = format_transaction_for_json(transaction)
-
-                if formatted_transaction.get('timestamp'):
-                    timestamp = transaction.get('timestamp')
-                    if hasattr(timestamp, 'strftime'):
-                        formatted_transaction['formatted_date'] = timestamp.strftime('%Y-%m-%d %H:%M:%S')
-                    else:
-                        formatted_transaction['formatted_date'] = str(timestamp)
+                return self._submit_storage(
+                    'get_transactions', self.storage.get_transactions,
+                    event='transaction_history', format_result=self._format_transactions
+                )
 
-                formatted_transactions.append(formatted_transaction)
+            # Date ranges can hold thousands of orders, so they are pushed page by page
+            stream_id = uuid.uuid4().hex[:12]
+            cancelled = threading.Event()
+            self.history_streams[stream_id] = cancelled
+            ack = self._submit_storage(
+                'stream_transactions', self._stream_transaction_pages,
+                request.sid, stream_id, cancelled, start_date, end_date,
+                int(data.get('page_size', 50)),
+                timeout=self.storage_bulk_timeout,
+                retries=0  # a retry would resend pages the client already has
+            )
+            ack['stream_id'] = stream_id
+            return ack
+
+        @self.socketio.on('get_transaction_page')
+        def handle_get_transaction_page(data=None):
+            data = data or {}
+            if not self.storage.is_connected():
+                self.socketio.emit('transaction_page', {'transactions': [], 'next_page_token': None},
+                                   to=request.sid)
+                return None
+
+            return self._submit_storage(
+                'get_transactions_page', self.storage.get_transactions_page,
+                page_size=int(data.get('page_size', 20)),
+                start_after=data.get('start_after'),
+                start_date=data.get('start_date'),
+                end_date=data.get('end_date'),
+                event='transaction_page',
+                format_result=lambda page: {
+                    'transactions': self._format_transactions(page['transactions']),
+                    'next_page_token': page['next_page_token']
+                }
+            )
 
-            self.socketio.emit('transaction_history', formatted_transactions)
-            print(f"Sent {len(formatted_transactions)} transactions by date range to client")
+        @self.socketio.on('cancel_transaction_stream')
+        def handle_cancel_transaction_stream(data):
+            cancelled = self.history_streams.get(data.get('stream_id'))
+            if cancelled is not None:
+                cancelled.set()
+            return {'stream_id': data.get('stream_id'), 'cancelled': cancelled is not None}
 
         @self.socketio.on('delete_transaction')
         def handle_delete_transaction(data):
-            if not self.firestore_manager.is_connected():
+            if not self.storage.is_connected():
                 self.socketio.emit('transaction_deleted', {
                     'success': False,
-                    'message': 'Firestore not connected'
-                })
-                return
+                    'message': 'Storage not connected'
+                }, to=request.sid)
+                return None
 
             transaction_id = data.get('id')
             if not transaction_id:
                 self.socketio.emit('transaction_deleted', {
                     'success': False,
                     'message': 'No transaction ID provided'
-                })
-                return
+                }, to=request.sid)
+                return None
 
-            result = self.firestore_manager.delete_transaction(transaction_id)
-            if result:
-                self.socketio.emit('transaction_deleted', {
+            return self._submit_storage(
+                'delete_transaction', self.storage.delete_transaction, transaction_id,
+                event='transaction_deleted',
+                format_result=lambda deleted: {
                     'success': True,
                     'id': transaction_id
-                })
-                print(f"Deleted transaction with ID: {transaction_id}")
-            else:
-                self.socketio.emit('transaction_deleted', {
+                } if deleted else {
                     'success': False,
                     'message': 'Failed to delete transaction'
-                })
+                },
+                failure_event=True
+            )
 
         @self.socketio.on('delete_all_transactions')
         def handle_delete_all_transactions():
-            if not self.firestore_manager.is_connected():
+            if not self.storage.is_connected():
                 self.socketio.emit('all_transactions_deleted', {
                     'success': False,
-                    'message': 'Firestore not connected'
-                })
-                return
+                    'message': 'Storage not connected'
+                }, to=request.sid)
+                return None
+
+            return self._start_bulk_delete(
+                'delete_all_transactions', self.storage.delete_all_transactions,
+                event='all_transactions_deleted',
+                format_result=lambda result: {
+                    'success': True,
+                    'deleted_count': result['deleted_count']
+                }
+            )
 
-            result = self.firestore_manager.delete_all_transactions()
-            self.socketio.emit('all_transactions_deleted', {
-                'success': True,
-                'deleted_count': result['deleted_count']
-            })
-            print(f"Deleted all transactions: {result['deleted_count']} transactions removed")
+        @self.socketio.on('get_sales_summary')
+        def handle_get_sales_summary(data=None):
+            start_date, end_date = self._get_analytics_range(data or {})
+            return self._submit_storage(
+                'get_sales_summary', self.storage.get_sales_summary, start_date, end_date,
+                event='sales_summary'
+            )
+
+        @self.socketio.on('cancel_storage_request')
+        def handle_cancel_storage_request(data):
+            cancelled = self.storage_executor.cancel(data.get('request_id'))
+            return {'request_id': data.get('request_id'), 'cancelled': cancelled}
 
         @self.socketio.on('toggle_simulation')
         def handle_toggle_simulation(data):
             enabled = data.get('enabled', False)
             self.detector_manager.toggle_simulation_mode(enabled)
+            self._notify_state_change()
             self.socketio.emit('simulation_toggled', {
                 'enabled': enabled,
                 'message': 'Simulation mode enabled' if enabled else 'Real detection mode enabled'
-            })
+            }, to=self._lane_room())
             print(f"Simulation mode: {'ON' if enabled else 'OFF'}")
 
         @self.socketio.on('add_simulated_object')
@@ -541,7 +882,7 @@ class SelfCheckoutApp:
                 'y': y,
                 'width': width,
                 'height': height
-            })
+            }, to=self._lane_room())
             print(f"Added simulated object: {label} at ({x}, {y})")
 
         @self.socketio.on('update_simulated_object')
@@ -560,7 +901,7 @@ class SelfCheckoutApp:
             self.socketio.emit('simulated_object_updated', {
                 'success': success,
                 'obj_id': obj_id
-            })
+            }, to=self._lane_room())
 
             if success:
                 print(f"Updated simulated object {obj_id}")
@@ -573,7 +914,7 @@ class SelfCheckoutApp:
             self.socketio.emit('simulated_object_removed', {
                 'success': success,
                 'obj_id': obj_id
-            })
+            }, to=self._lane_room())
 
             if success:
                 print(f"Removed simulated object {obj_id}")
@@ -581,7 +922,7 @@ class SelfCheckoutApp:
         @self.socketio.on('get_simulated_objects')
         def handle_get_simulated_objects():
             objects = self.detector_manager.get_simulated_objects()
-            self.socketio.emit('simulated_objects_list', objects)
+            self.socketio.emit('simulated_objects_list', objects, to=request.sid)
 
         @self.socketio.on('move_simulated_object')
         def handle_move_simulated_object(data):
@@ -610,7 +951,7 @@ class SelfCheckoutApp:
                     'obj_id': obj_id,
                     'x': x,
                     'y': y
-                })
+                }, to=self._lane_room())
 
         @self.socketio.on('preset_move_to_zone')
         def handle_preset_move_to_zone(data):
@@ -635,7 +976,7 @@ class SelfCheckoutApp:
                 'obj_id': obj_id,
                 'x': zone_center_x - 50,
                 'y': y_pos
-            })
+            }, to=self._lane_room())
 
             if success:
                 print(f"Moved simulated object {obj_id} to counting zone")
@@ -648,7 +989,7 @@ class SelfCheckoutApp:
             self.socketio.emit('conveyor_simulation_started', {
                 'obj_id': obj_id,
                 'speed': speed
-            })
+            }, to=self._lane_room())
 
             print(f"Started conveyor simulation for {obj_id}")
 
@@ -659,7 +1000,7 @@ class SelfCheckoutApp:
                 'success': success,
                 'type': 'detection',
                 'config': data
-            })
+            }, to=request.sid)
             if success:
                 print(f"Updated detection config: {data}")
 
@@ -670,7 +1011,7 @@ class SelfCheckoutApp:
                 'success': success,
                 'type': 'visual',
                 'config': data
-            })
+            }, to=request.sid)
             if success:
                 print(f"Updated visual config: {data}")
 
@@ -681,7 +1022,7 @@ class SelfCheckoutApp:
                 'success': success,
                 'type': 'advanced',
                 'config': data
-            })
+            }, to=request.sid)
             if success:
                 print(f"Updated advanced config: {data}")
 
@@ -692,7 +1033,7 @@ class SelfCheckoutApp:
             self.socketio.emit('config_applied', {
                 'success': success,
                 'preset': preset
-            })
+            }, to=request.sid)
             if success:
                 print(f"Applied preset config: {preset}")
 
@@ -702,7 +1043,7 @@ class SelfCheckoutApp:
             self.socketio.emit('config_applied', {
                 'success': success,
                 'config': data
-            })
+            }, to=request.sid)
             if success:
                 print(f"Applied full configuration")
 
@@ -711,7 +1052,7 @@ class SelfCheckoutApp:
             success = self.detector_manager.save_config(data)
             self.socketio.emit('config_saved', {
                 'success': success
-            })
+            }, to=request.sid)
             if success:
                 print("Configuration saved")
 
@@ -721,7 +1062,7 @@ class SelfCheckoutApp:
             self.socketio.emit('config_loaded', {
                 'success': config is not None,
                 'config': config
-            })
+            }, to=request.sid)
             print("Configuration loaded")
 
         @self.socketio.on('reset_config')
@@ -729,14 +1070,24 @@ class SelfCheckoutApp:
             success = self.detector_manager.reset_config()
             self.socketio.emit('config_reset', {
                 'success': success
-            })
+            }, to=request.sid)
             if success:
                 print("Configuration reset to defaults")
 
         @self.socketio.on('toggle_camera')
         def handle_toggle_camera(data):
+            error = self._camera_lane_error('The camera')
+            if error:
+                self.socketio.emit('camera_status', {
+                    'enabled': self.camera_enabled,
+                    'available': self.camera.is_available(),
+                    'message': error['error']
+                }, to=request.sid)
+                return error
+
             enabled = data.get('enabled', False)
             self.camera_enabled = enabled
+            self._notify_state_change()
             
             if enabled:
                 if not self.yolo_initialized and not self.yolo_initializing:
@@ -750,7 +1101,7 @@ class SelfCheckoutApp:
                     self.socketio.emit('camera_status', {
                         'enabled': True,
                         'available': camera_started
-                    })
+                    }, to=self._lane_room())
                     
                     if camera_started:
                         print("Camera enabled and started")
@@ -761,13 +1112,13 @@ class SelfCheckoutApp:
                         'enabled': False,
                         'available': False,
                         'message': 'YOLO not initialized yet'
-                    })
+                    }, to=self._lane_room())
             else:
                 self.camera.stop()
                 self.socketio.emit('camera_status', {
                     'enabled': False,
                     'available': False
-                })
+                }, to=self._lane_room())
                 print("Camera disabled")
 
         @self.socketio.on('initialize_yolo')
@@ -780,50 +1131,61 @@ class SelfCheckoutApp:
         while self.is_processing:
             try:
                 frame_count += 1
+                self.frame_scheduler.set_target_fps(self._get_target_fps())
+                self.frame_scheduler.begin_frame()
                 
                 # Debug log every 100 frames
                 if frame_count % 100 == 0:
                     print(f"Processing loop: frame {frame_count}, camera available: {self.camera.is_available()}")
                 
                 processed_frame = None
+                idle_timeout = None
                 
                 # Always update video streamer with a frame, even if camera is not available
-                if self.camera_enabled and self.camera.is_available():
-                    success, frame = self.camera.read()
+                if self.camera_enabled and self.camera.is_available() and self._use_passthrough():
+                    self.published_status = None
+                    if not self._process_passthrough_frame():
+                        self._publish_status_frame('error', "Camera read failed - check connection")
+                elif self.camera_enabled and self.camera.is_available():
+                    with self.frame_scheduler.stage('capture'):
+                        success, frame = self.camera.read()
                     
                     if success and frame is not None:
+                        self.published_status = None
                         if frame_count % 100 == 0:
                             print(f"Camera frame read successful, shape: {frame.shape}")
                         
                         frame_width, frame_height = self.camera.get_dimensions()
-                        processed_frame = self.detector_manager.process_frame(frame, frame_width, frame_height)
-                        self.video_streamer.update_frame(processed_frame)
-                        self.streaming_server.update_frame(processed_frame)  # Feed to streaming server
+                        with self.frame_scheduler.stage('detect'):
+                            if self.camera.is_stale:
+                                # Camera is reconnecting in the background - show the last good frame
+                                processed_frame = self._mark_stale_frame(frame)
+                            else:
+                                processed_frame = self.detector_manager.process_frame(
+                                    frame, frame_width, frame_height, lane_id=self.lane_id
+                                )
+                        with self.frame_scheduler.stage('publish'):
+                            self.video_streamer.update_frame(processed_frame)
+                            self.streaming_server.update_frame(processed_frame)  # Feed to streaming server
                         
-                        if self.detector_manager.is_scanning:
-                            self.socketio.emit('cart_update', {
-                                'cart': self.detector_manager.get_cart(),
-                                'total': self.detector_manager.calculate_total()
-                            })
                     else:
                         # Camera available but read failed
                         print(f"Camera read failed at frame {frame_count}")
-                        processed_frame = self._create_error_frame("Camera read failed - check connection")
-                        self.video_streamer.update_frame(processed_frame)
-                        self.streaming_server.update_frame(processed_frame)
+                        self._publish_status_frame('error', "Camera read failed - check connection")
                         
                 else:
                     # Camera disabled or not available
                     if not self.camera_enabled:
                         if not self.yolo_initialized:
                             if self.yolo_initializing:
-                                processed_frame = self._create_loading_frame("Initializing YOLO model...")
+                                # Wake up twice a second to advance the loading dots
+                                self._publish_status_frame('loading', "Initializing YOLO model...")
+                                idle_timeout = 0.5
                             else:
-                                processed_frame = self._create_info_frame("Camera disabled", "Press camera button to enable")
+                                self._publish_status_frame('info', "Press camera button to enable")
                         else:
-                            processed_frame = self._create_info_frame("Camera disabled", "YOLO ready. Press camera button to enable")
-                        self.video_streamer.update_frame(processed_frame)
-                        self.streaming_server.update_frame(processed_frame)
+                            self._publish_status_frame('info', "YOLO ready. Press camera button to enable")
+                        idle_timeout = idle_timeout or 5.0
                     else:
                         # Camera enabled but not available - try to start it
                         if frame_count % 100 == 0:
@@ -834,24 +1196,35 @@ class SelfCheckoutApp:
                         else:
                             # Show simulation mode available message
                             if self.detector_manager.simulation_mode:
-                                processed_frame = self._create_simulation_frame()
-                                self.video_streamer.update_frame(processed_frame)
-                                self.streaming_server.update_frame(processed_frame)
+                                self._publish_status_frame('simulation', None)
                             else:
-                                processed_frame = self._create_error_frame("Camera not available - Enable simulation mode for testing")
-                                self.video_streamer.update_frame(processed_frame)
-                                self.streaming_server.update_frame(processed_frame)
+                                self._publish_status_frame('error', "Camera not available - Enable simulation mode for testing")
+                            # Retry the camera periodically, or as soon as the state changes
+                            idle_timeout = 1.0
                 
+                # Only cart changes are sent, not the whole cart every frame
+                if self.detector_manager.is_scanning:
+                    self._emit_cart_changes(self.lane_id)
+
                 # Emit frame via Socket.IO for real-time streaming
                 if processed_frame is not None:
-                    self._emit_frame_via_socket(processed_frame)
+                    with self.frame_scheduler.stage('emit'):
+                        self._emit_frame_via_socket(processed_frame)
                 
-                time.sleep(0.033)  # 30 FPS for real-time feel
+                if idle_timeout is not None:
+                    # Nothing live to stream - sleep until something changes
+                    self.frame_scheduler.reset()
+                    self.state_changed.wait(idle_timeout)
+                    self.state_changed.clear()
+                else:
+                    # Sleep only for what is left of this frame's budget
+                    self.frame_scheduler.wait_for_next_frame()
                 
             except Exception as e:
                 print(f"Processing error: {e}")
                 error_frame = self._create_error_frame(f"Processing Error: {str(e)}")
                 self.video_streamer.update_frame(error_frame)
+                self.published_status = None
                 time.sleep(0.1)
 
     def _create_error_frame(self, message):
@@ -932,7 +1305,7 @@ class SelfCheckoutApp:
         
         return frame
     
-    def _create_loading_frame(self, message):
+    def _create_loading_frame(self, message, dots=None):
         frame = np.zeros((480, 640, 3), dtype=np.uint8)
         frame[:] = [30, 30, 60]  # Dark blue background
         
@@ -951,8 +1324,8 @@ class SelfCheckoutApp:
         cv2.putText(frame, message, (msg_x, 220), font, 0.7, (200, 200, 255), 2)
         
         # Loading animation
-        import time
-        dots = int((time.time() * 2) % 4)
+        if dots is None:
+            dots = int((time.time() * 2) % 4)
         loading_text = "Please wait" + "." * dots
         loading_size = cv2.getTextSize(loading_text, font, 0.6, 1)[0]
         loading_x = (640 - loading_size[0]) // 2
@@ -984,6 +1357,336 @@ class SelfCheckoutApp:
         
         return frame
     
+    def _get_target_fps(self):
+        # Benchmark sources paced as fast as possible must not be throttled here
+        if getattr(self.camera, 'pacing', 'realtime') != 'realtime':
+            return 0
+        return self.detector_manager.detector.target_fps
+
+    def _submit_storage(self, operation, fn, *args, event=None, format_result=None,
+                        failure_event=False, **kwargs):
+        """Run a storage call on the executor and report back to the requesting client.
+
+        Returns the ack payload with the request ID. On success the result is
+        sent as `event` (as the synchronous handlers used to); every request
+        also ends with a storage_complete event carrying its final status. A
+        timed out call may still take effect, so it only gets storage_complete
+        with status 'unknown' and no failure event.
+        """
+        sid = request.sid
+
+        def on_complete(request_id, status, result, error):
+            if status == 'success' and event is not None and result is not None:
+                payload = format_result(result) if format_result else result
+                self.socketio.emit(event, payload, to=sid)
+            elif status not in ('success', 'unknown') and failure_event:
+                self.socketio.emit(event, {
+                    'success': False,
+                    'message': error
+                }, to=sid)
+
+            self.socketio.emit('storage_complete', {
+                'request_id': request_id,
+                'operation': operation,
+                'status': status,
+                'error': error
+            }, to=sid)
+            print(f"Storage request {operation} ({request_id}): {status}")
+
+        request_id = self.storage_executor.submit(operation, fn, *args, on_complete=on_complete, **kwargs)
+        return {'request_id': request_id, 'operation': operation}
+
+    def _get_product_page(self, params):
+        """Page of the catalog from query/sort/page_size/page_token parameters"""
+        try:
+            page_size = int(params.get('page_size') or 50)
+        except (TypeError, ValueError):
+            raise ValueError('page_size must be a number')
+        return self.product_manager.list_products(
+            query=params.get('query'),
+            sort=params.get('sort') or 'name',
+            page_size=page_size,
+            page_token=params.get('page_token')
+        )
+
+    def _append_product_upload(self, upload_id, chunk):
+        """Add a chunk to an upload; returns (upload_id, bytes received so far, error)"""
+        now = time.time()
+        with self.product_uploads_lock:
+            # Uploads abandoned for ten minutes are dropped
+            for stale_id in [key for key, upload in self.product_uploads.items() if now - upload['updated'] > 600]:
+                self.product_uploads.pop(stale_id)['file'].close()
+
+            if upload_id is None:
+                upload_id = uuid.uuid4().hex[:12]
+                self.product_uploads[upload_id] = {
+                    'file': tempfile.SpooledTemporaryFile(max_size=1024 * 1024),
+                    'size': 0,
+                    'updated': now
+                }
+
+            upload = self.product_uploads.get(upload_id)
+            if upload is None:
+                return None, 0, f"Unknown upload {upload_id}"
+
+            if upload['size'] + len(chunk) > self.product_upload_max_bytes:
+                self.product_uploads.pop(upload_id)['file'].close()
+                return upload_id, 0, f"Upload exceeds {self.product_upload_max_bytes} bytes"
+
+            upload['file'].write(chunk)
+            upload['size'] += len(chunk)
+            upload['updated'] = now
+            return upload_id, upload['size'], None
+
+    def _bulk_delete_progress(self, sid, operation, request_id):
+        """Progress callback that streams bulk delete counts to the requesting client"""
+        def on_progress(progress):
+            self.socketio.emit('bulk_delete_progress', {
+                'request_id': request_id,
+                'operation': operation,
+                'collection': progress['collection'],
+                'deleted_count': progress['deleted_count']
+            }, to=sid)
+        return on_progress
+
+    def _start_bulk_delete(self, operation, fn, event, format_result=None):
+        """Run a bulk delete on its own thread, outside the storage executor and its timeout.
+
+        A bulk delete keeps going once started however long it takes, so a
+        timeout would only misreport it. Progress is sent as
+        bulk_delete_progress and the end as `event` plus bulk_delete_complete.
+        Only one run of each operation at a time.
+        """
+        sid = request.sid
+        with self.bulk_deletes_lock:
+            running = self.bulk_deletes.get(operation)
+            if running is None:
+                request_id = uuid.uuid4().hex[:12]
+                self.bulk_deletes[operation] = request_id
+        if running is not None:
+            return {'request_id': running, 'operation': operation, 'error': f'{operation} is already running'}
+
+        def run():
+            started = time.monotonic()
+            result = None
+            error = None
+            try:
+                result = fn(on_progress=self._bulk_delete_progress(sid, operation, request_id))
+                # A delete that stopped partway returns what it managed plus the error
+                error = result.get('error') if isinstance(result, dict) else None
+            except Exception as e:
+                error = str(e)
+                print(f"Bulk delete {operation} ({request_id}) failed: {e}")
+            finally:
+                with self.bulk_deletes_lock:
+                    self.bulk_deletes.pop(operation, None)
+
+            if error is None:
+                self.socketio.emit(event, format_result(result) if format_result else result, to=sid)
+            else:
+                self.socketio.emit(event, {'success': False, 'message': error}, to=sid)
+            self.socketio.emit('bulk_delete_complete', {
+                'request_id': request_id,
+                'operation': operation,
+                'status': 'success' if error is None else 'failed',
+                'deleted_count': result['deleted_count'] if result else 0,
+                'duration_ms': round((time.monotonic() - started) * 1000, 1),
+                'error': error
+            }, to=sid)
+            print(f"Bulk delete {operation} ({request_id}): {'success' if error is None else 'failed'}")
+
+        threading.Thread(target=run, name=f"bulk-{operation}", daemon=True).start()
+        return {'request_id': request_id, 'operation': operation}
+
+    def _stream_transaction_pages(self, sid, stream_id, cancelled, start_date, end_date, page_size):
+        """Push a date range to one client as transaction_history_page events"""
+        page_index = 0
+        sent = 0
+        try:
+            pages = self.storage.iter_transaction_pages(
+                page_size=page_size, start_date=start_date, end_date=end_date
+            )
+            for page in pages:
+                if cancelled.is_set():
+                    break
+                self.socketio.emit('transaction_history_page', {
+                    'stream_id': stream_id,
+                    'page': page_index,
+                    'transactions': self._format_transactions(page),
+                    'done': False
+                }, to=sid)
+                page_index += 1
+                sent += len(page)
+
+            self.socketio.emit('transaction_history_page', {
+                'stream_id': stream_id,
+                'page': page_index,
+                'transactions': [],
+                'done': True,
+                'cancelled': cancelled.is_set()
+            }, to=sid)
+            return {'pages': page_index, 'transactions': sent}
+        finally:
+            self.history_streams.pop(stream_id, None)
+
+    def _get_analytics_range(self, params):
+        """Inclusive YYYY-MM-DD range from start/end parameters, defaulting to the last 30 days"""
+        today = datetime.date.today()
+        end_date = params.get('end') or today.isoformat()
+        start_date = params.get('start') or (today - datetime.timedelta(days=29)).isoformat()
+        return start_date, end_date
+
+    def _format_transactions(self, transactions):
+        formatted_transactions = []
+        for transaction in transactions:
+            formatted_transaction = format_transaction_for_json(transaction)
+
+            if formatted_transaction.get('timestamp'):
+                timestamp = transaction.get('timestamp')
+                if hasattr(timestamp, 'strftime'):
+                    formatted_transaction['formatted_date'] = timestamp.strftime('%Y-%m-%d %H:%M:%S')
+                else:
+                    formatted_transaction['formatted_date'] = str(timestamp)
+
+            formatted_transactions.append(formatted_transaction)
+        return formatted_transactions
+
+    def _lane_room(self, lane_id=None):
+        return f"lane:{lane_id or self.lane_id}"
+
+    def _client_lane(self):
+        return self.client_lanes.get(request.sid, self.lane_id)
+
+    def _camera_lane_error(self, action):
+        """Error ack for camera controls sent from a lane this server's camera does not scan"""
+        lane_id = self._client_lane()
+        if lane_id == self.lane_id:
+            return None
+        print(f"Rejected camera control from lane {lane_id}")
+        return {'error': f"{action} is only controlled from lane {self.lane_id}, not {lane_id}"}
+
+    def _join_lane(self, lane_id):
+        previous = self.client_lanes.get(request.sid)
+        if previous is not None and previous != lane_id:
+            leave_room(self._lane_room(previous))
+        join_room(self._lane_room(lane_id))
+        self.client_lanes[request.sid] = lane_id
+
+    def _emit_cart_changes(self, lane_id=None):
+        """Emit a cart_update delta to the lane's room for every cart change since the last emit"""
+        lane_id = lane_id or self.lane_id
+        room = self._lane_room(lane_id)
+        with self.cart_emit_lock:
+            emitted_version = self.emitted_cart_versions.get(lane_id, 0)
+            version = self.detector_manager.get_cart_version(lane_id)
+            if version == emitted_version:
+                return
+
+            changes = self.detector_manager.get_cart_changes_since(emitted_version, lane_id)
+            if changes is None:
+                snapshot = self.detector_manager.get_cart_snapshot(lane_id)
+                self.socketio.emit('cart_sync', snapshot, to=room)
+                self.emitted_cart_versions[lane_id] = snapshot['version']
+                return
+
+            for change in changes:
+                self.socketio.emit('cart_update', change, to=room)
+                self.emitted_cart_versions[lane_id] = change['version']
+
+    def _emit_cart_sync(self, lane_id=None):
+        lane_id = lane_id or self.lane_id
+        with self.cart_emit_lock:
+            snapshot = self.detector_manager.get_cart_snapshot(lane_id)
+            self.socketio.emit('cart_sync', snapshot, to=self._lane_room(lane_id))
+            self.emitted_cart_versions[lane_id] = snapshot['version']
+
+    def _notify_state_change(self):
+        self.state_changed.set()
+
+    def _render_status_frame(self, kind, message, dots=0):
+        if kind == 'loading':
+            return self._create_loading_frame(message, dots)
+        if kind == 'info':
+            return self._create_info_frame("Camera disabled", message)
+        if kind == 'simulation':
+            return self._create_simulation_frame()
+        return self._create_error_frame(message)
+
+    def _publish_status_frame(self, kind, message):
+        """Publish a status frame, rendering and encoding it only once per distinct state"""
+        dots = int((time.monotonic() * 2) % 4) if kind == 'loading' else 0
+        key = (kind, message, dots)
+        if self.published_status is not None and self.published_status[0] == key:
+            return
+
+        frame, jpeg = self.status_frame_cache.get(
+            kind, f"{message}|{dots}", (640, 480),
+            lambda: self._render_status_frame(kind, message, dots)
+        )
+        if jpeg is None:
+            return
+
+        height, width = frame.shape[:2]
+        self.published_status = (key, (jpeg, width, height))
+        self.video_streamer.update_jpeg(jpeg)
+        self.streaming_server.update_jpeg(jpeg)
+        self._emit_jpeg_via_socket(jpeg, width, height)
+
+    def _use_passthrough(self):
+        return self.overlay_mode == 'metadata' and getattr(self.camera, 'passthrough_active', False)
+
+    def _process_passthrough_frame(self):
+        """Forward the camera's JPEG untouched and decode only at the inference rate"""
+        with self.frame_scheduler.stage('capture'):
+            success, jpeg = self.camera.read_jpeg()
+        if not success:
+            return False
+
+        frame_width, frame_height = self.camera.get_dimensions()
+        now = time.monotonic()
+        if now >= self.next_inference_time and not self.camera.is_stale:
+            self.next_inference_time = now + self.inference_interval
+            with self.frame_scheduler.stage('detect'):
+                frame = self.camera.decode_jpeg(jpeg)
+                if frame is not None:
+                    decoded_height, decoded_width = frame.shape[:2]
+                    self.detector_manager.process_frame(
+                        frame, decoded_width, decoded_height, lane_id=self.lane_id
+                    )
+                    self.overlay_metadata = self.detector_manager.get_overlay_metadata(
+                        scale=frame_width / decoded_width
+                    )
+                    # The web UI draws this over the MJPEG feed, which carries no overlay here
+                    self.socketio.emit('detection_overlay', dict(
+                        self.overlay_metadata, width=frame_width, height=frame_height, timestamp=time.time()
+                    ), to=self._lane_room())
+
+        with self.frame_scheduler.stage('publish'):
+            self.video_streamer.update_jpeg(jpeg)
+            self.streaming_server.update_jpeg(jpeg)
+            self._emit_jpeg_via_socket(jpeg, frame_width, frame_height, self.overlay_metadata)
+        return True
+
+    def _handle_catalog_change(self, products, version, changes):
+        # Every lane prices from the same catalog, so deltas go to all clients
+        self.socketio.emit('catalog_changed', {
+            'version': version,
+            'changes': changes
+        })
+
+    def _handle_camera_stall(self, reason, stats):
+        self.socketio.emit('camera_stall', {
+            'reason': reason,
+            'stats': stats,
+            'timestamp': time.time()
+        }, to=self._lane_room())
+
+    def _mark_stale_frame(self, frame):
+        frame[:40] = (frame[:40] * 0.4).astype(np.uint8)
+        cv2.putText(frame, "Camera reconnecting - showing last frame", (10, 27),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 200, 255), 2)
+        return frame
+
     def _emit_frame_via_socket(self, frame):
         """Emit frame via Socket.IO as base64 encoded JPEG"""
         try:
@@ -992,30 +1695,42 @@ class SelfCheckoutApp:
             success, buffer = cv2.imencode('.jpg', frame, encode_param)
             
             if success:
-                # Convert to base64 string
-                import base64
-                frame_base64 = base64.b64encode(buffer).decode('utf-8')
-                
-                # Emit to all connected clients
-                self.socketio.emit('video_frame', {
-                    'frame': frame_base64,
-                    'timestamp': time.time(),
-                    'width': frame.shape[1],
-                    'height': frame.shape[0]
-                })
+                self._emit_jpeg_via_socket(buffer.tobytes(), frame.shape[1], frame.shape[0])
             
         except Exception as e:
             print(f"Error emitting frame via socket: {e}")
 
+    def _emit_jpeg_via_socket(self, jpeg, width, height, overlay=None, to=None):
+        """Emit already-encoded JPEG bytes via Socket.IO, with optional overlay metadata"""
+        try:
+            # Convert to base64 string
+            frame_base64 = base64.b64encode(jpeg).decode('utf-8')
+
+            payload = {
+                'frame': frame_base64,
+                'timestamp': time.time(),
+                'width': width,
+                'height': height
+            }
+            if overlay is not None:
+                payload['overlay'] = overlay
+
+            # Emit to the camera's lane unless a single recipient is given
+            self.socketio.emit('video_frame', payload, to=to or self._lane_room())
+
+        except Exception as e:
+            print(f"Error emitting frame via socket: {e}")
+
     def _initialize_yolo(self):
         """Initialize YOLO model in a separate thread"""
         def init_yolo():
             try:
                 self.yolo_initializing = True
+                self._notify_state_change()
                 self.socketio.emit('yolo_status', {
                     'initialized': False,
                     'initializing': True
-                })
+                }, to=self._lane_room())
                 
                 print("Initializing YOLO model...")
                 # The detector manager initialization includes YOLO loading
@@ -1030,11 +1745,12 @@ class SelfCheckoutApp:
                 
                 self.yolo_initialized = success
                 self.yolo_initializing = False
+                self._notify_state_change()
                 
                 self.socketio.emit('yolo_status', {
                     'initialized': success,
                     'initializing': False
-                })
+                }, to=self._lane_room())
                 
                 if success:
                     print("✅ YOLO ready for detection")
@@ -1045,11 +1761,12 @@ class SelfCheckoutApp:
                 print(f"Error initializing YOLO: {e}")
                 self.yolo_initialized = False
                 self.yolo_initializing = False
+                self._notify_state_change()
                 self.socketio.emit('yolo_status', {
                     'initialized': False,
                     'initializing': False,
                     'error': str(e)
-                })
+                }, to=self._lane_room())
         
         # Run initialization in background thread
         init_thread = threading.Thread(target=init_yolo)
@@ -1068,10 +1785,12 @@ class SelfCheckoutApp:
 
     def stop_processing(self):
         self.is_processing = False
+        self._notify_state_change()
         if self.processing_thread:
             self.processing_thread.join(timeout=1.0)
             self.processing_thread = None
         self.camera.stop()
+        self.detector_manager.inference_scheduler.stop()
         self.video_streamer.stop()
 
     def run(self):
@@ -1092,6 +1811,14 @@ class SelfCheckoutApp:
         info_frame = self._create_info_frame("Camera disabled", "Press camera button to enable")
         self.video_streamer.update_frame(info_frame)
         
+        # Headless runs (load tests, benchmarks) enable the camera without a client
+        if self.camera_autostart:
+            self.camera_enabled = True
+            self._notify_state_change()
+            print("Camera autostart enabled")
+
+        self.checkout_queue.start()
+
         # Start processing loop
         self.start_processing()
         
@@ -1107,6 +1834,9 @@ class SelfCheckoutApp:
             )
         finally:
             self.stop_processing()
+            self.checkout_queue.stop()
+            self.product_manager.stop_sync()
+            self.storage.close()
 
 
 if __name__ == '__main__':
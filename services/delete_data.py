@@ -1,87 +1,179 @@
 #!/usr/bin/env python3
 """
-Delete script to remove products and/or transactions from Firestore
+Delete script to remove products and/or transactions from storage
+
+Collections are deleted in parallel batches. Progress is written to a
+checkpoint file, so an interrupted non-interactive run can be picked up
+again with --resume, skipping collections that were already emptied.
 """
 
+import argparse
+import json
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from FirestoreManager import FirestoreManager
+from StorageBackend import create_storage_from_env
 
-def delete_all_products(firestore_manager):
-    """Delete all products from Firestore"""
-    print("\n=== Deleting All Products ===")
-    
-    confirm = input("⚠️  Are you sure you want to delete ALL products? (yes/no): ")
-    if confirm.lower() != 'yes':
+PRODUCT_COLLECTIONS = ['products']
+TRANSACTION_COLLECTIONS = ['orders', 'transactions', 'sales_rollups']
+
+
+class Checkpoint:
+    """Per-collection progress of a bulk delete, saved after every batch"""
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.collections = {}
+        self.base_counts = {}
+        if resume and os.path.exists(path):
+            with open(path) as f:
+                self.collections = json.load(f).get('collections', {})
+
+    def is_completed(self, collection):
+        return self.collections.get(collection, {}).get('completed', False)
+
+    def start(self, collection):
+        # A resumed collection keeps counting from where the earlier run stopped
+        self.collections.setdefault(collection, {'deleted_count': 0})
+        self.collections[collection]['completed'] = False
+        self.base_counts[collection] = self.collections[collection]['deleted_count']
+        self.save()
+
+    def update(self, collection, deleted_count, completed=False):
+        self.collections[collection] = {
+            'deleted_count': self.base_counts.get(collection, 0) + deleted_count,
+            'completed': completed
+        }
+        self.save()
+
+    def save(self):
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({'collections': self.collections}, f, indent=2)
+        os.replace(temp_path, self.path)
+
+    def clear(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def confirm(message, assume_yes):
+    if assume_yes:
+        return True
+
+    answer = input(f"⚠️  Are you sure you want to delete ALL {message}? (yes/no): ")
+    if answer.lower() != 'yes':
         print("Operation cancelled.")
+        return False
+    return True
+
+
+def delete_collections(storage, collections, checkpoint, page_size, workers):
+    deleted = {}
+    for collection in collections:
+        if checkpoint.is_completed(collection):
+            print(f"⏭️  {collection}: already deleted in a previous run")
+            continue
+
+        checkpoint.start(collection)
+
+        def on_progress(progress):
+            checkpoint.update(collection, progress['deleted_count'])
+            print(f"   {collection}: {progress['deleted_count']} deleted", end='\r')
+
+        result = storage.delete_collection(
+            collection, page_size=page_size, max_workers=workers, on_progress=on_progress
+        )
+        checkpoint.update(collection, result['deleted_count'], completed=result['completed'])
+        deleted[collection] = result['deleted_count']
+        print(f"✅ {collection}: deleted {result['deleted_count']} documents")
+    return deleted
+
+
+def delete_all_products(storage, checkpoint, assume_yes=False, page_size=500, workers=None):
+    """Delete all products from storage"""
+    print("\n=== Deleting All Products ===")
+
+    if not confirm("products", assume_yes):
         return
-    
-    result = firestore_manager.delete_all_products()
-    print(f"✅ Deleted {result['deleted_count']} products from Firestore")
 
-def delete_all_transactions(firestore_manager):
-    """Delete all transactions from Firestore"""
+    delete_collections(storage, PRODUCT_COLLECTIONS, checkpoint, page_size, workers)
+
+
+def delete_all_transactions(storage, checkpoint, assume_yes=False, page_size=500, workers=None):
+    """Delete all transactions (orders, lines and sales rollups) from storage"""
     print("\n=== Deleting All Transactions ===")
-    
-    confirm = input("⚠️  Are you sure you want to delete ALL transactions? (yes/no): ")
-    if confirm.lower() != 'yes':
-        print("Operation cancelled.")
+
+    if not confirm("transactions", assume_yes):
         return
-    
-    result = firestore_manager.delete_all_transactions()
-    print(f"✅ Deleted {result['deleted_count']} transactions from Firestore")
+
+    delete_collections(storage, TRANSACTION_COLLECTIONS, checkpoint, page_size, workers)
+
 
 def main():
     """Main delete function"""
-    print("🗑️  Firestore Data Deletion Script")
+    parser = argparse.ArgumentParser(description="Remove products and/or transactions from storage")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--products', action='store_true', help="Delete all products")
+    target.add_argument('--transactions', '--history', action='store_true', help="Delete all transactions")
+    target.add_argument('--all', action='store_true', help="Delete products and transactions")
+    parser.add_argument('--yes', '-y', action='store_true', help="Do not ask for confirmation")
+    parser.add_argument('--resume', action='store_true', help="Skip collections finished by an earlier run")
+    parser.add_argument('--checkpoint', default='.delete_checkpoint.json', help="Progress file used by --resume")
+    parser.add_argument('--page-size', type=int, default=500, help="Documents per delete batch (max 500)")
+    parser.add_argument('--workers', type=int, default=int(os.getenv('BULK_DELETE_WORKERS', 4)),
+                        help="Delete batches committed in parallel")
+    args = parser.parse_args()
+    if args.yes and not (args.products or args.transactions or args.all):
+        parser.error("--yes needs one of --products, --transactions or --all")
+
+    print("🗑️  Data Deletion Script")
     print("=" * 50)
-    
-    # Initialize Firestore
-    firestore_manager = FirestoreManager()
-    
-    if not firestore_manager.is_connected():
-        print("❌ Failed to connect to Firestore. Please check your credentials.")
+
+    # Initialize storage (STORAGE_BACKEND selects Firestore, SQLite or memory)
+    storage = create_storage_from_env()
+
+    if not storage.is_connected():
+        print(f"❌ Failed to connect to {storage.name} storage. Please check your configuration.")
         return
-    
-    print("✅ Connected to Firestore")
-    
-    # Check command line arguments
-    if len(sys.argv) > 1:
-        if sys.argv[1] == '--products':
-            delete_all_products(firestore_manager)
-        elif sys.argv[1] == '--transactions' or sys.argv[1] == '--history':
-            delete_all_transactions(firestore_manager)
-        elif sys.argv[1] == '--all':
-            delete_all_products(firestore_manager)
-            delete_all_transactions(firestore_manager)
-        else:
-            print(f"Unknown option: {sys.argv[1]}")
-            print("Usage: python delete_data.py [--products|--transactions|--history|--all]")
-    else:
+
+    print(f"✅ Connected to {storage.name} storage")
+
+    checkpoint = Checkpoint(args.checkpoint, resume=args.resume)
+    options = {'assume_yes': args.yes, 'page_size': args.page_size, 'workers': args.workers}
+
+    if args.products or args.all:
+        delete_all_products(storage, checkpoint, **options)
+    if args.transactions or args.all:
+        delete_all_transactions(storage, checkpoint, **options)
+
+    if not (args.products or args.transactions or args.all):
         # Interactive mode
         print("\nWhat would you like to delete?")
         print("1. Products only")
-        print("2. Transactions only") 
+        print("2. Transactions only")
         print("3. Both products and transactions")
         print("4. Exit")
-        
+
         choice = input("\nEnter your choice (1-4): ")
-        
+
         if choice == "1":
-            delete_all_products(firestore_manager)
+            delete_all_products(storage, checkpoint, **options)
         elif choice == "2":
-            delete_all_transactions(firestore_manager)
+            delete_all_transactions(storage, checkpoint, **options)
         elif choice == "3":
-            delete_all_products(firestore_manager)
-            delete_all_transactions(firestore_manager)
+            delete_all_products(storage, checkpoint, **options)
+            delete_all_transactions(storage, checkpoint, **options)
         elif choice == "4":
             print("Exiting...")
         else:
             print("Invalid choice")
-    
+
+    if checkpoint.collections and all(entry.get('completed') for entry in checkpoint.collections.values()):
+        checkpoint.clear()
+
     print("\n✨ Operation complete!")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
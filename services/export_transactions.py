@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Streaming export of transactions to CSV or Parquet, one row per cart line
+
+Orders are read a page at a time, so memory stays flat however large the
+range. Progress is checkpointed; rerun an interrupted export with --resume to
+continue after the last exported order. Parquet output is a directory of
+part files (readable as one dataset) and needs pyarrow.
+
+    python export_transactions.py sales-2026-09.csv --month 2026-09
+    python export_transactions.py sales-q3 --format parquet --start 2026-07-01 --end 2026-09-30
+    python export_transactions.py cola.csv --product "coca cola" --product "pepsi" --resume
+"""
+
+import argparse
+import calendar
+import datetime
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from StorageBackend import create_storage_from_env
+from TransactionExporter import TransactionExporter
+
+
+def month_range(month):
+    """Inclusive first and last date of a YYYY-MM month"""
+    try:
+        first = datetime.datetime.strptime(month, '%Y-%m').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid month {month}, expected YYYY-MM")
+    last = first.replace(day=calendar.monthrange(first.year, first.month)[1])
+    return first.isoformat(), last.isoformat()
+
+
+def iso_date(value):
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date {value}, expected YYYY-MM-DD")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export transactions to CSV or Parquet")
+    parser.add_argument('path', help="CSV file, or directory of part files for Parquet")
+    parser.add_argument('--format', choices=TransactionExporter.FORMATS,
+                        help="Defaults to parquet for a .parquet path, csv otherwise")
+    parser.add_argument('--month', type=month_range, help="Export one month (YYYY-MM)")
+    parser.add_argument('--start', type=iso_date, help="First date to export (YYYY-MM-DD)")
+    parser.add_argument('--end', type=iso_date, help="Last date to export (YYYY-MM-DD, inclusive)")
+    parser.add_argument('--product', action='append', default=[],
+                        help="Only export lines for this product (repeatable)")
+    parser.add_argument('--page-size', type=int, default=TransactionExporter.PAGE_SIZE,
+                        help="Orders read per page")
+    parser.add_argument('--checkpoint', help="Checkpoint file (default: <path>.checkpoint.json)")
+    parser.add_argument('--resume', action='store_true', help="Continue an interrupted export")
+    args = parser.parse_args()
+
+    start_date, end_date = args.month or (args.start, args.end)
+    if args.month and (args.start or args.end):
+        parser.error("use either --month or --start/--end")
+    if bool(start_date) != bool(end_date):
+        parser.error("--start and --end must be given together")
+
+    fmt = args.format or ('parquet' if args.path.lower().endswith('.parquet') else 'csv')
+
+    print("📤 Transaction Export")
+    print("=" * 50)
+
+    storage = create_storage_from_env()
+    if not storage.is_connected():
+        print(f"❌ Failed to connect to {storage.name} storage. Please check your configuration.")
+        return
+
+    print(f"✅ Connected to {storage.name} storage")
+    period = f"{start_date} to {end_date}" if start_date else "all dates"
+    products = f" for {', '.join(args.product)}" if args.product else ''
+    print(f"\n=== Exporting Transactions ({period}{products}) to {args.path} as {fmt} ===")
+
+    def on_progress(progress):
+        print(f"\r   {progress['orders']:,} orders, {progress['rows']:,} rows", end='', flush=True)
+
+    exporter = TransactionExporter(storage, page_size=args.page_size)
+    try:
+        result = exporter.export_file(
+            args.path, fmt, start_date, end_date, args.product,
+            checkpoint_path=args.checkpoint, resume=args.resume, on_progress=on_progress
+        )
+    except (ValueError, RuntimeError) as e:
+        print(f"❌ {e}")
+        return
+    except KeyboardInterrupt:
+        print("\n⏸️  Export interrupted, run again with --resume to continue")
+        return
+    finally:
+        storage.close()
+
+    resumed = " (resumed)" if result['resumed'] else ''
+    print(f"\n✅ Exported {result['rows']:,} rows from {result['orders']:,} orders{resumed}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Non-interactive generator of large product catalogs and transaction histories
+
+Builds data sets for load and query benchmarks (history pages, rollups,
+pagination) on any storage backend, including the Firestore emulator
+(set FIRESTORE_EMULATOR_HOST). Checkouts are generated in chunks from the
+seed and the chunk number, so a run is reproducible regardless of how the
+parallel workers are scheduled, and rerunning the same seed and --end-date
+writes the same checkouts instead of adding new ones. --end-date defaults to
+today and is recorded in the report, so pass it to repeat an earlier run.
+
+    python generate_data.py --products 5000 --transactions 1000000 --days 365 --seed 7 --end-date 2026-09-30
+    python generate_data.py --backend sqlite --transactions 2000000 --basket poisson:4
+    python generate_data.py --backend memory --transactions 200000 --workers 1
+"""
+
+import argparse
+import bisect
+import datetime
+import itertools
+import json
+import math
+import random
+import sys
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from StorageBackend import create_storage
+
+BRANDS = ['indo', 'sari', 'maju', 'segar', 'nusa', 'prima', 'royal', 'alam', 'mega', 'surya']
+ITEMS = ['cola', 'teh', 'kopi', 'susu', 'mie', 'roti', 'keripik', 'biskuit', 'cokelat', 'jus',
+         'air mineral', 'sabun', 'sampo', 'permen', 'wafer', 'yogurt', 'sosis', 'kacang', 'sereal', 'es krim']
+SIZES = ['mini', 'reguler', 'besar', 'jumbo', 'hemat']
+
+
+class BasketSize:
+    """Number of distinct lines per checkout, from a 'kind:parameters' spec.
+
+    uniform:1-5 (default), poisson:<mean>, geometric:<p> and fixed:<n>. Sizes
+    are at least one and at most max_size.
+    """
+
+    def __init__(self, spec, max_size):
+        self.max_size = max(1, max_size)
+        kind, _, params = spec.partition(':')
+        self.kind = kind.strip().lower()
+
+        try:
+            if self.kind == 'uniform':
+                low, _, high = (params or '1-5').partition('-')
+                self.low, self.high = int(low), int(high or low)
+            elif self.kind == 'poisson':
+                self.mean = float(params or 3)
+            elif self.kind == 'geometric':
+                self.p = float(params or 0.35)
+                if not 0 < self.p <= 1:
+                    raise ValueError
+            elif self.kind == 'fixed':
+                self.size = int(params or 3)
+            else:
+                raise ValueError
+        except ValueError:
+            raise argparse.ArgumentTypeError(
+                f"Invalid basket size '{spec}', expected uniform:1-5, poisson:3, geometric:0.35 or fixed:3"
+            )
+
+    def sample(self, rng):
+        if self.kind == 'uniform':
+            size = rng.randint(self.low, self.high)
+        elif self.kind == 'poisson':
+            # Knuth's method; basket means are small
+            limit, size, product = math.exp(-self.mean), 0, rng.random()
+            while product > limit:
+                size += 1
+                product *= rng.random()
+        elif self.kind == 'geometric':
+            size = 1
+            while rng.random() > self.p and size < self.max_size:
+                size += 1
+        else:
+            size = self.size
+        return min(max(size, 1), self.max_size)
+
+
+def product_names(count, rng):
+    """Distinct, readable product names; a numeric suffix keeps large catalogs unique"""
+    combinations = [f"{brand} {item} {size}" for brand in BRANDS for item in ITEMS for size in SIZES]
+    rng.shuffle(combinations)
+    if count <= len(combinations):
+        return combinations[:count]
+    return [f"{combinations[index % len(combinations)]} {index // len(combinations)}" for index in range(count)]
+
+
+def generate_products(storage, count, rng, workers):
+    print(f"\n=== Generating {count} Products ===")
+
+    products = [{
+        'id': storage.product_id_for(name),
+        'name': name,
+        # Rupiah prices in steps of 500
+        'price': rng.randint(1, 200) * 500,
+        'created': True
+    } for name in product_names(count, rng)]
+
+    started = time.monotonic()
+    result = storage.write_products(products, max_workers=workers)
+    elapsed = time.monotonic() - started
+
+    print(f"✅ Wrote {len(result['written'])} products in {elapsed:.2f}s "
+          f"({len(result['written']) / elapsed if elapsed else 0:,.0f} products/s), "
+          f"{len(result['failed'])} failed")
+    return {product['name']: product['price'] for product in products if product['id'] not in result['failed']}
+
+
+class TransactionGenerator:
+    """Builds deterministic checkouts: chunk n always yields the same checkouts for a given seed"""
+
+    def __init__(self, storage, products, args):
+        self.storage = storage
+        self.seed = args.seed
+        self.chunk_size = args.chunk_size
+        self.max_quantity = args.max_quantity
+        self.basket = BasketSize(args.basket, min(args.max_basket, len(products)))
+
+        # Checkouts fall in the N days up to the end of end_date (UTC), never relative to now
+        end = datetime.datetime.combine(args.end_date + datetime.timedelta(days=1), datetime.time(),
+                                        tzinfo=datetime.timezone.utc)
+        self.end_time = end.timestamp()
+        self.span_seconds = args.days * 86400
+
+        # Zipf-like popularity: a few products sell far more often than the long tail
+        ranked = list(products.items())
+        random.Random(f"{self.seed}:popularity").shuffle(ranked)
+        self.products = ranked
+        weights = [1.0 / (rank + 1) ** args.skew for rank in range(len(ranked))]
+        self.cumulative = list(itertools.accumulate(weights))
+
+    def _pick(self, rng):
+        return self.products[bisect.bisect_left(self.cumulative, rng.random() * self.cumulative[-1])]
+
+    def chunk(self, index, count):
+        rng = random.Random(f"{self.seed}:{index}")
+        checkouts = []
+        for _ in range(count):
+            size = self.basket.sample(rng)
+            cart = {}
+            attempts = 0
+            while len(cart) < size and attempts < size * 10:
+                name, price = self._pick(rng)
+                attempts += 1
+                if name not in cart:
+                    cart[name] = {'price': price, 'quantity': rng.randint(1, self.max_quantity)}
+
+            timestamp = datetime.datetime.fromtimestamp(
+                self.end_time - rng.random() * self.span_seconds, tz=datetime.timezone.utc
+            )
+            checkouts.append({
+                'checkout_id': f"{rng.getrandbits(128):032x}",
+                'cart': cart,
+                'total': sum(line['price'] * line['quantity'] for line in cart.values()),
+                'timestamp': timestamp,
+                'lane': 'generator'
+            })
+        return checkouts
+
+    def write_chunk(self, index, count):
+        """Generate one chunk and write it in batches that fit the write limit"""
+        checkouts = self.chunk(index, count)
+        written = failed = writes = 0
+        batch = []
+        batch_writes = 0
+
+        def flush():
+            nonlocal written, failed, writes
+            result = self.storage.save_transactions(batch)
+            if result is None:
+                failed += len(batch)
+            else:
+                written += len(result)
+                writes += batch_writes
+
+        for checkout in checkouts:
+            checkout_writes = self.storage.count_checkout_writes(checkout['cart'])
+            if batch and batch_writes + checkout_writes > self.storage.MAX_BATCH_WRITES:
+                flush()
+                batch, batch_writes = [], 0
+            batch.append(checkout)
+            batch_writes += checkout_writes
+        if batch:
+            flush()
+
+        return {'written': written, 'failed': failed, 'writes': writes}
+
+
+def generate_transactions(storage, products, args):
+    print(f"\n=== Generating {args.transactions} Transactions over {args.days} days up to {args.end_date} ===")
+
+    if not products:
+        print("No products found. Generate products first (--products N).")
+        return None
+
+    generator = TransactionGenerator(storage, products, args)
+    chunks = math.ceil(args.transactions / args.chunk_size)
+    totals = {'written': 0, 'failed': 0, 'writes': 0}
+    lock = threading.Lock()
+    started = time.monotonic()
+    last_report = started
+
+    def collect(done):
+        nonlocal last_report
+        for future in done:
+            result = future.result()
+            with lock:
+                for key in totals:
+                    totals[key] += result[key]
+
+        now = time.monotonic()
+        if now - last_report >= args.report_interval:
+            last_report = now
+            elapsed = now - started
+            print(f"   {totals['written']:,}/{args.transactions:,} checkouts, "
+                  f"{totals['written'] / elapsed:,.0f} checkouts/s, {totals['writes'] / elapsed:,.0f} writes/s")
+
+    in_flight = set()
+    with ThreadPoolExecutor(max_workers=args.workers) as pool:
+        for index in range(chunks):
+            count = min(args.chunk_size, args.transactions - index * args.chunk_size)
+            in_flight.add(pool.submit(generator.write_chunk, index, count))
+            # Keep a bounded number of chunks generated ahead of the writers
+            if len(in_flight) >= args.workers * 2:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+        done, in_flight = wait(in_flight)
+        collect(done)
+
+    elapsed = time.monotonic() - started
+    report = {
+        'checkouts_written': totals['written'],
+        'checkouts_failed': totals['failed'],
+        'writes': totals['writes'],
+        'seconds': round(elapsed, 3),
+        'checkouts_per_second': round(totals['written'] / elapsed, 1) if elapsed else 0.0,
+        'writes_per_second': round(totals['writes'] / elapsed, 1) if elapsed else 0.0
+    }
+    print(f"✅ Wrote {report['checkouts_written']:,} checkouts ({report['writes']:,} writes) in {elapsed:.2f}s: "
+          f"{report['checkouts_per_second']:,.0f} checkouts/s, {report['writes_per_second']:,.0f} writes/s, "
+          f"{report['checkouts_failed']:,} failed")
+    return report
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"{value} must not be negative")
+    return number
+
+
+def iso_date(value):
+    try:
+        return datetime.date.fromisoformat(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Invalid date {value}, expected YYYY-MM-DD")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate products and transactions for benchmarks")
+    parser.add_argument('--products', type=positive_int, default=0,
+                        help="Products to create (0 uses the existing catalog)")
+    parser.add_argument('--transactions', type=positive_int, default=0, help="Checkouts to create")
+    parser.add_argument('--days', type=positive_int, default=30, help="Spread checkouts over N days")
+    parser.add_argument('--end-date', type=iso_date, default=datetime.datetime.now(datetime.timezone.utc).date(),
+                        help="Last day (UTC) checkouts fall on, YYYY-MM-DD (default: today)")
+    parser.add_argument('--basket', default='uniform:1-5',
+                        help="Lines per checkout: uniform:1-5, poisson:3, geometric:0.35 or fixed:3")
+    parser.add_argument('--max-basket', type=positive_int, default=20, help="Upper bound on lines per checkout")
+    parser.add_argument('--max-quantity', type=positive_int, default=3, help="Units per line, from 1 to N")
+    parser.add_argument('--skew', type=float, default=1.0,
+                        help="Product popularity skew (0 = uniform, 1 = Zipf)")
+    parser.add_argument('--seed', type=int, default=42, help="Random seed; the same seed gives the same data")
+    parser.add_argument('--workers', type=positive_int, default=4, help="Parallel write workers")
+    parser.add_argument('--chunk-size', type=positive_int, default=500, help="Checkouts generated per task")
+    parser.add_argument('--backend', choices=['firestore', 'sqlite', 'memory'],
+                        default=os.getenv('STORAGE_BACKEND', 'firestore'), help="Storage backend to write to")
+    parser.add_argument('--sqlite-path', default=os.getenv('SQLITE_STORAGE_PATH', 'store.db'))
+    parser.add_argument('--report-interval', type=float, default=5.0, help="Seconds between progress lines")
+    parser.add_argument('--report-json', help="Also write the throughput report to this file")
+    args = parser.parse_args()
+
+    if not args.products and not args.transactions:
+        parser.error("nothing to do, pass --products and/or --transactions")
+    args.workers = max(1, args.workers)
+    args.chunk_size = max(1, args.chunk_size)
+    args.max_quantity = max(1, args.max_quantity)
+    BasketSize(args.basket, args.max_basket)
+
+    print("🏭 Benchmark Data Generator")
+    print("=" * 50)
+
+    storage = create_storage(
+        args.backend,
+        firebase_credentials=os.getenv('FIREBASE_CREDENTIALS_PATH', 'firebase-credentials.json'),
+        sqlite_path=args.sqlite_path
+    )
+    if not storage.is_connected():
+        print(f"❌ Failed to connect to {storage.name} storage. Please check your configuration.")
+        return
+
+    print(f"✅ Connected to {storage.name} storage (seed {args.seed})")
+    rng = random.Random(args.seed)
+    report = {'backend': storage.name, 'seed': args.seed, 'end_date': args.end_date.isoformat(), 'days': args.days}
+
+    if args.products:
+        started = time.monotonic()
+        products = generate_products(storage, args.products, rng, args.workers)
+        report['products_written'] = len(products)
+        report['products_seconds'] = round(time.monotonic() - started, 3)
+    else:
+        products = storage.get_products()
+
+    if args.transactions:
+        report['transactions'] = generate_transactions(storage, products, args)
+
+    if args.report_json:
+        with open(args.report_json, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Report written to {args.report_json}")
+
+    storage.close()
+    print("\n✨ Generation complete!")
+
+
+if __name__ == "__main__":
+    main()
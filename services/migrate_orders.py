@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+One-off migration that builds order documents for existing transaction lines.
+
+Older checkouts were stored only as line documents and grouped into orders
+by timestamp and total at read time. This script assigns each such group a
+checkout_id, stamps it on the lines and writes the matching document in the
+'orders' collection. Lines that already carry a checkout_id but have no
+order document (e.g. written by an older build) get their order too.
+Running it again is safe: groups that already have an order are skipped.
+
+With --rollups the sales rollups are rebuilt from the order documents,
+e.g. after migrating or to correct counters.
+"""
+
+import argparse
+import sys
+import os
+import uuid
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from FirestoreManager import FirestoreManager
+
+
+def group_lines(firestore_manager):
+    """Group line documents into orders keyed by checkout_id or timestamp/total"""
+    groups = {}
+
+    for doc in firestore_manager.db.collection('transactions').stream():
+        data = doc.to_dict()
+        timestamp = data.get('timestamp')
+        checkout_id = data.get('checkout_id')
+
+        if checkout_id:
+            key = ('checkout', checkout_id)
+        elif timestamp:
+            # Legacy heuristic; two checkouts with the same timestamp and total stay merged
+            key = ('legacy', f"{timestamp}_{data.get('total', 0)}")
+        else:
+            print(f"Skipping line {doc.id}: no timestamp")
+            continue
+
+        group = groups.setdefault(key, {
+            'checkout_id': checkout_id,
+            'total': data.get('total', 0),
+            'timestamp': timestamp,
+            'lines': []
+        })
+        group['lines'].append((doc.reference, data))
+
+    return groups
+
+
+def migrate(firestore_manager, dry_run=False):
+    print("\n=== Migrating Transactions to Orders ===")
+
+    existing_orders = {doc.id for doc in firestore_manager.db.collection('orders').stream()}
+    groups = group_lines(firestore_manager)
+
+    batch = firestore_manager.db.batch()
+    pending_writes = 0
+    migrated = 0
+    skipped = 0
+
+    for group in groups.values():
+        if group['checkout_id'] and group['checkout_id'] in existing_orders:
+            skipped += 1
+            continue
+
+        checkout_id = group['checkout_id'] or uuid.uuid4().hex
+        items = [{
+            'name': data.get('name', ''),
+            'price': data.get('price', 0),
+            'quantity': data.get('quantity', 0),
+            'subtotal': data.get('subtotal', 0)
+        } for _, data in group['lines']]
+
+        writes = len(group['lines']) + 1
+        if pending_writes + writes > firestore_manager.MAX_BATCH_WRITES and pending_writes:
+            if not dry_run:
+                batch.commit()
+            batch = firestore_manager.db.batch()
+            pending_writes = 0
+
+        for reference, data in group['lines']:
+            if not data.get('checkout_id'):
+                batch.update(reference, {'checkout_id': checkout_id})
+        batch.set(firestore_manager.db.collection('orders').document(checkout_id), {
+            'checkout_id': checkout_id,
+            'items': items,
+            'item_count': sum(item['quantity'] for item in items),
+            'total': group['total'],
+            'timestamp': group['timestamp']
+        })
+        pending_writes += writes
+        migrated += 1
+
+    if pending_writes and not dry_run:
+        batch.commit()
+
+    prefix = "[dry run] Would migrate" if dry_run else "✅ Migrated"
+    print(f"{prefix} {migrated} orders ({skipped} already had an order document)")
+    return migrated
+
+
+def rebuild_rollups(firestore_manager, dry_run=False):
+    print("\n=== Rebuilding Sales Rollups ===")
+
+    rollups = {}
+    order_updates = []
+    for doc in firestore_manager.db.collection('orders').stream():
+        data = doc.to_dict()
+        key = firestore_manager.rollup_key(doc.id, data.get('timestamp'))
+        items = data.get('items', [])
+        units = sum(item.get('quantity', 0) for item in items)
+        total = data.get('total', 0)
+
+        rollup = rollups.setdefault((key['date'], key['shard']), {
+            'date': key['date'],
+            'shard': key['shard'],
+            'revenue': 0,
+            'units': 0,
+            'orders': 0,
+            'hours': {},
+            'products': {}
+        })
+        rollup['revenue'] += total
+        rollup['units'] += units
+        rollup['orders'] += 1
+
+        hour = rollup['hours'].setdefault(str(key['hour']), {'revenue': 0, 'units': 0, 'orders': 0})
+        hour['revenue'] += total
+        hour['units'] += units
+        hour['orders'] += 1
+
+        for item in items:
+            product = rollup['products'].setdefault(item.get('name', ''), {'revenue': 0, 'units': 0})
+            product['revenue'] += item.get('subtotal', 0)
+            product['units'] += item.get('quantity', 0)
+
+        # Orders remember their rollup slot so deletes can subtract from it
+        order_updates.append((doc.reference, key))
+
+    if dry_run:
+        print(f"[dry run] Would write {len(rollups)} rollup documents for {len(order_updates)} orders")
+        return len(rollups)
+
+    for doc in firestore_manager.db.collection('sales_rollups').stream():
+        doc.reference.delete()
+
+    writes = [('set', firestore_manager.db.collection('sales_rollups').document(f"{date}_{shard}"), rollup)
+              for (date, shard), rollup in rollups.items()]
+    writes += [('update', reference, {'rollup': key}) for reference, key in order_updates]
+
+    for start in range(0, len(writes), firestore_manager.MAX_BATCH_WRITES):
+        batch = firestore_manager.db.batch()
+        for operation, reference, data in writes[start:start + firestore_manager.MAX_BATCH_WRITES]:
+            if operation == 'set':
+                batch.set(reference, data)
+            else:
+                batch.update(reference, data)
+        batch.commit()
+
+    print(f"✅ Wrote {len(rollups)} rollup documents for {len(order_updates)} orders")
+    return len(rollups)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build order documents for existing transaction lines")
+    parser.add_argument('--dry-run', action='store_true', help="Report what would be migrated without writing")
+    parser.add_argument('--rollups', action='store_true', help="Also rebuild sales rollups from the orders")
+    args = parser.parse_args()
+
+    print("🔁 Firestore Order Migration Script")
+    print("=" * 50)
+
+    firestore_manager = FirestoreManager()
+
+    if not firestore_manager.is_connected():
+        print("❌ Failed to connect to Firestore. Please check your credentials.")
+        return
+
+    print("✅ Connected to Firestore")
+    migrate(firestore_manager, dry_run=args.dry_run)
+    if args.rollups:
+        rebuild_rollups(firestore_manager, dry_run=args.dry_run)
+
+
+if __name__ == "__main__":
+    main()
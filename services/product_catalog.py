@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Bulk import and export of the product catalog as CSV or JSON
+
+Import validates every row, de-duplicates by normalized name and upserts the
+products in parallel batches; rows that are rejected are listed with their
+row number. Running the same file again only writes what changed.
+
+    python product_catalog.py import products.csv
+    python product_catalog.py import products.json --dry-run
+    python product_catalog.py export products.csv
+"""
+
+import argparse
+import contextlib
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from StorageBackend import create_storage_from_env
+from ProductImporter import ProductImporter
+
+
+def detect_format(path, fmt):
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lower().lstrip('.')
+    return extension if extension in ProductImporter.FORMATS else 'csv'
+
+
+def import_products(importer, path, fmt, dry_run=False):
+    print(f"\n=== Importing Products from {path} ===")
+
+    with open(path, encoding='utf-8-sig') as f:
+        text = f.read()
+
+    report = importer.import_text(text, fmt, dry_run=dry_run)
+    for error in report['errors']:
+        name = f" ({error['name']})" if error['name'] else ''
+        print(f"✗ Row {error['row']}{name}: {error['error']}")
+
+    prefix = "[dry run] Would import" if dry_run else "✅ Imported"
+    print(f"\n{prefix} {report['rows']} rows: {report['created']} created, {report['updated']} updated, "
+          f"{report['unchanged']} unchanged, {report['failed']} failed")
+    return report
+
+
+def export_products(importer, path, fmt, log=sys.stdout):
+    print(f"\n=== Exporting Products to {path} ===", file=log)
+
+    output = sys.stdout if path == '-' else open(path, 'w', encoding='utf-8', newline='')
+    try:
+        for chunk in importer.iter_export(fmt):
+            output.write(chunk)
+    finally:
+        if output is not sys.stdout:
+            output.close()
+
+    if path != '-':
+        print(f"✅ Exported products to {path}", file=log)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Import or export the product catalog")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    import_parser = subparsers.add_parser('import', help="Import products from a CSV or JSON file")
+    import_parser.add_argument('path', help="File with name and price columns/fields")
+    import_parser.add_argument('--format', choices=ProductImporter.FORMATS, help="Defaults to the file extension")
+    import_parser.add_argument('--dry-run', action='store_true', help="Validate and report without writing")
+    import_parser.add_argument('--workers', type=int, default=int(os.getenv('PRODUCT_IMPORT_WORKERS', 4)),
+                               help="Write batches committed in parallel")
+
+    export_parser = subparsers.add_parser('export', help="Export products to a CSV or JSON file")
+    export_parser.add_argument('path', help="Output file, or - for stdout")
+    export_parser.add_argument('--format', choices=ProductImporter.FORMATS, help="Defaults to the file extension")
+
+    args = parser.parse_args()
+
+    # Keep stdout clean when exporting to it
+    log = sys.stderr if args.command == 'export' and args.path == '-' else sys.stdout
+    print("📦 Product Catalog Import/Export", file=log)
+    print("=" * 50, file=log)
+
+    # Backends announce themselves on stdout when they connect
+    with contextlib.redirect_stdout(log):
+        storage = create_storage_from_env()
+
+    if not storage.is_connected():
+        print(f"❌ Failed to connect to {storage.name} storage. Please check your configuration.", file=log)
+        return
+
+    print(f"✅ Connected to {storage.name} storage", file=log)
+
+    fmt = detect_format(args.path, args.format)
+    if args.command == 'import':
+        importer = ProductImporter(storage, max_workers=args.workers)
+        import_products(importer, args.path, fmt, dry_run=args.dry_run)
+    else:
+        export_products(ProductImporter(storage), args.path, fmt, log=log)
+
+
+if __name__ == "__main__":
+    main()
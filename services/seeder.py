@@ -1,16 +1,15 @@
 #!/usr/bin/env python3
 """
-Seeder script to populate Firestore with sample products and transactions
+Seeder script to populate storage with sample products and transactions
 """
 
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from FirestoreManager import FirestoreManager
+from StorageBackend import TransientStorageError, create_storage_from_env
 import random
 from datetime import datetime, timedelta
-import uuid
 
 # Sample product data
 SAMPLE_PRODUCTS = [
@@ -36,13 +35,17 @@ SAMPLE_PRODUCTS = [
     {"name": "nutrisari", "price": 2000}
 ]
 
-def seed_products(firestore_manager):
-    """Seed products to Firestore"""
+def seed_products(storage):
+    """Seed products to storage"""
     print("\n=== Seeding Products ===")
     
     success_count = 0
     for product in SAMPLE_PRODUCTS:
-        result = firestore_manager.add_product(product["name"], product["price"])
+        try:
+            result = storage.add_product(product["name"], product["price"])
+        except TransientStorageError as e:
+            print(f"✗ Failed to add product: {product['name']} ({e})")
+            continue
         if result:
             print(f"✓ Added product: {product['name']} - Rp {product['price']:,}")
             success_count += 1
@@ -52,12 +55,12 @@ def seed_products(firestore_manager):
     print(f"\nSuccessfully added {success_count}/{len(SAMPLE_PRODUCTS)} products")
     return success_count
 
-def generate_random_transactions(firestore_manager, num_transactions=20):
+def generate_random_transactions(storage, num_transactions=20):
     """Generate random transactions with sample products"""
     print(f"\n=== Generating {num_transactions} Sample Transactions ===")
     
     # Get all products
-    products = firestore_manager.get_products()
+    products = storage.get_products()
     if not products:
         print("No products found. Please seed products first.")
         return 0
@@ -86,47 +89,29 @@ def generate_random_transactions(firestore_manager, num_transactions=20):
             total += price * quantity
         
         # Save transaction with custom timestamp
-        try:
-            # Create transaction documents
-            transaction_ids = []
-            for product_name, details in cart.items():
-                transaction_id = str(uuid.uuid4())
-                transaction_ref = firestore_manager.db.collection('transactions').document(transaction_id)
-                
-                transaction_data = {
-                    'name': product_name,
-                    'price': details['price'],
-                    'quantity': details['quantity'],
-                    'subtotal': details['price'] * details['quantity'],
-                    'total': total,
-                    'timestamp': transaction_date
-                }
-                
-                transaction_ref.set(transaction_data)
-                transaction_ids.append(transaction_id)
-            
+        result = storage.save_transaction(cart, total, timestamp=transaction_date)
+        if result:
             print(f"✓ Transaction {i+1}: {len(cart)} items, Total: Rp {total:,}")
             success_count += 1
-            
-        except Exception as e:
-            print(f"✗ Failed to create transaction {i+1}: {e}")
+        else:
+            print(f"✗ Failed to create transaction {i+1}")
     
     print(f"\nSuccessfully created {success_count}/{num_transactions} transactions")
     return success_count
 
 def main():
     """Main seeder function"""
-    print("🌱 Firestore Seeder Script")
+    print("🌱 Storage Seeder Script")
     print("=" * 50)
     
-    # Initialize Firestore
-    firestore_manager = FirestoreManager()
+    # Initialize storage (STORAGE_BACKEND selects Firestore, SQLite or memory)
+    storage = create_storage_from_env()
     
-    if not firestore_manager.is_connected():
-        print("❌ Failed to connect to Firestore. Please check your credentials.")
+    if not storage.is_connected():
+        print(f"❌ Failed to connect to {storage.name} storage. Please check your configuration.")
         return
     
-    print("✅ Connected to Firestore")
+    print(f"✅ Connected to {storage.name} storage")
     
     # Ask user what to seed
     print("\nWhat would you like to seed?")
@@ -138,16 +123,16 @@ def main():
     choice = input("\nEnter your choice (1-4): ")
     
     if choice == "1":
-        seed_products(firestore_manager)
+        seed_products(storage)
     elif choice == "2":
         num = input("How many transactions to generate? (default: 20): ")
         num_transactions = int(num) if num.isdigit() else 20
-        generate_random_transactions(firestore_manager, num_transactions)
+        generate_random_transactions(storage, num_transactions)
     elif choice == "3":
-        seed_products(firestore_manager)
+        seed_products(storage)
         num = input("How many transactions to generate? (default: 20): ")
         num_transactions = int(num) if num.isdigit() else 20
-        generate_random_transactions(firestore_manager, num_transactions)
+        generate_random_transactions(storage, num_transactions)
     elif choice == "4":
         print("Exiting...")
     else:
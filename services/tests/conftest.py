@@ -0,0 +1,33 @@
+import datetime
+import os
+import sys
+
+import pytest
+
+# The services are plain modules run from this directory, not an installed package
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from SQLiteStorage import MemoryStorage  # noqa: E402
+
+
+BASE_TIME = datetime.datetime(2026, 9, 1, 12, 0, tzinfo=datetime.timezone.utc)
+
+
+def make_checkouts(count, per_second=2, start=0):
+    """Checkouts c000, c001, ... with several sharing each timestamp, to exercise tie-breaking"""
+    return [{
+        'checkout_id': f"c{index:03d}",
+        'cart': {
+            'indomie': {'price': 3500, 'quantity': 1 + index % 3},
+            'aqua': {'price': 4000, 'quantity': 1}
+        },
+        'total': 3500 * (1 + index % 3) + 4000,
+        'timestamp': BASE_TIME + datetime.timedelta(seconds=index // per_second)
+    } for index in range(start, start + count)]
+
+
+@pytest.fixture
+def storage():
+    storage = MemoryStorage()
+    yield storage
+    storage.close()
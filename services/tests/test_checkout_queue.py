@@ -0,0 +1,122 @@
+import time
+
+import pytest
+
+from CheckoutQueue import CheckoutQueue
+from StorageBackend import InvalidCheckoutError
+
+VALID_CART = {'indomie': {'price': 3500, 'quantity': 2}}
+INVALID_CART = {'indomie': {'price': 3500, 'quantity': 0}}
+
+
+class BatchRejectingStorage:
+    """Rejects a whole batch without saying which checkout is bad, like a Firestore InvalidArgument"""
+
+    def __init__(self, storage):
+        self.storage = storage
+        self.batches = []
+
+    def __getattr__(self, name):
+        return getattr(self.storage, name)
+
+    def save_transactions(self, checkouts):
+        self.batches.append(len(checkouts))
+        try:
+            self.storage.validate_checkouts(checkouts)
+        except InvalidCheckoutError as e:
+            raise InvalidCheckoutError({checkout['checkout_id']: str(e) for checkout in checkouts})
+        return self.storage.save_transactions(checkouts)
+
+
+class UnhealthyStorage:
+    """A backend that is down in a way that is not a TransientStorageError"""
+
+    MAX_BATCH_WRITES = 500
+
+    def __init__(self, failure):
+        self.failure = failure
+        self.calls = 0
+
+    def is_connected(self):
+        return True
+
+    def count_checkout_writes(self, cart):
+        return len(cart) + 2
+
+    def save_transactions(self, checkouts):
+        self.calls += 1
+        if self.failure is None:
+            return None
+        raise self.failure
+
+
+class PermissionDenied(Exception):
+    pass
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out waiting for the checkout queue'
+        time.sleep(0.01)
+
+
+def make_queue(storage, **kwargs):
+    queue = CheckoutQueue(storage, path=':memory:', retry_interval=0.01, max_retry_interval=0.02, **kwargs)
+    queue.start()
+    return queue
+
+
+def test_invalid_checkout_is_isolated_and_dead_lettered(storage):
+    backend = BatchRejectingStorage(storage)
+    queue = CheckoutQueue(backend, path=':memory:', batch_size=8, retry_interval=0.01,
+                          max_retry_interval=0.02, max_attempts=2)
+    valid = [queue.enqueue(VALID_CART, 7000) for _ in range(3)]
+    bad = queue.enqueue(INVALID_CART, 0)
+    valid += [queue.enqueue(VALID_CART, 7000) for _ in range(4)]
+
+    queue.start()
+    try:
+        wait_for(lambda: queue.get_depth() == 0)
+    finally:
+        queue.stop()
+
+    stats = queue.get_stats()
+    assert stats['dead_letters'] == 1
+    assert stats['replicated'] == len(valid)
+    assert 1 in backend.batches
+    assert storage.get_transaction_by_id(bad) is None
+    assert all(storage.get_transaction_by_id(checkout_id) for checkout_id in valid)
+    assert queue.conn.execute('SELECT checkout_id FROM dead_letters').fetchall() == [(bad,)]
+
+
+def test_storage_names_the_invalid_checkout(storage):
+    queue = make_queue(storage, max_attempts=1)
+    try:
+        bad = queue.enqueue({'indomie': {'price': -1, 'quantity': 1}}, -1)
+        good = queue.enqueue(VALID_CART, 7000)
+        wait_for(lambda: queue.get_depth() == 0)
+    finally:
+        queue.stop()
+
+    assert storage.get_transaction_by_id(good)['total'] == 7000
+    assert queue.conn.execute('SELECT checkout_id FROM dead_letters').fetchall() == [(bad,)]
+
+
+@pytest.mark.parametrize('failure', [None, PermissionDenied('403 missing permission'),
+                                     RuntimeError('database is locked')])
+def test_backend_failures_are_retried_and_never_dead_lettered(failure):
+    backend = UnhealthyStorage(failure)
+    queue = make_queue(backend, max_attempts=1)
+    try:
+        queue.enqueue(VALID_CART, 7000)
+        queue.enqueue(VALID_CART, 7000)
+        wait_for(lambda: backend.calls >= 5)
+    finally:
+        queue.stop()
+
+    stats = queue.get_stats()
+    assert stats['depth'] == 2
+    assert stats['dead_letters'] == 0
+    assert stats['last_error']
+    assert queue.batch_limit == queue.batch_size
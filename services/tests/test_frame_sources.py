@@ -0,0 +1,26 @@
+import pytest
+
+from FrameSources import SyntheticSource, create_camera, parse_synthetic_spec
+
+
+def test_synthetic_spec_sets_frame_size_and_fps():
+    camera = create_camera('synthetic:1280x720@15', fps=30)
+
+    assert isinstance(camera, SyntheticSource)
+    assert (camera.frame_width, camera.frame_height, camera.fps) == (1280, 720, 15)
+    assert camera._next_frame().shape == (720, 1280, 3)
+
+
+def test_synthetic_spec_parts_are_optional():
+    assert parse_synthetic_spec('800x600') == ((800, 600), None)
+    assert parse_synthetic_spec('@12.5') == (None, 12.5)
+
+    camera = create_camera('synthetic', fps=20)
+    assert (camera.frame_width, camera.frame_height, camera.fps) == (640, 480, 20)
+
+
+@pytest.mark.parametrize('spec', ['synthetic:', 'synthetic:fast', 'synthetic:1280*720', 'synthetic:0x720',
+                                  'synthetic:@0'])
+def test_unrecognized_synthetic_spec_is_rejected(spec):
+    with pytest.raises(ValueError):
+        create_camera(spec)
@@ -0,0 +1,89 @@
+import datetime
+import threading
+import time
+
+from HistoryCache import HistoryCache
+
+DAY = datetime.datetime(2026, 9, 1, tzinfo=datetime.timezone.utc)
+NEXT_DAY = DAY + datetime.timedelta(days=1)
+
+
+def loader(value, order_ids=()):
+    calls = []
+
+    def load():
+        calls.append(1)
+        return value, list(order_ids)
+    return load, calls
+
+
+def test_hits_skip_the_loader():
+    cache = HistoryCache()
+    load, calls = loader('page')
+
+    assert cache.get_or_load('key', load) == 'page'
+    assert cache.get_or_load('key', load) == 'page'
+    assert len(calls) == 1
+    assert cache.get_stats()['hits'] == 1
+
+
+def test_new_order_evicts_only_ranges_covering_it():
+    cache = HistoryCache()
+    cache.get_or_load('latest', loader('latest')[0])
+    cache.get_or_load('today', loader('today')[0], start_date=DAY, end_date=NEXT_DAY)
+    cache.get_or_load('tomorrow', loader('tomorrow')[0], start_date=NEXT_DAY,
+                      end_date=NEXT_DAY + datetime.timedelta(days=1))
+
+    assert cache.invalidate_order_added(DAY + datetime.timedelta(hours=12)) == 2
+    assert list(cache.entries) == ['tomorrow']
+
+
+def test_removed_order_evicts_pages_holding_it_or_starting_after_it():
+    cache = HistoryCache()
+    cache.get_or_load('first', loader('first', ['c001', 'c002'])[0])
+    cache.get_or_load('second', loader('second', ['c003'])[0], start_after='c002')
+    cache.get_or_load('third', loader('third', ['c004'])[0], start_after='c003')
+
+    assert cache.invalidate_order_removed('c002') == 2
+    assert list(cache.entries) == ['third']
+
+
+def test_load_racing_an_invalidation_is_not_stored():
+    cache = HistoryCache()
+
+    def load():
+        cache.invalidate_order_added(DAY)
+        return 'stale', []
+
+    assert cache.get_or_load('key', load) == 'stale'
+    assert cache.get_stats()['entries'] == 0
+
+
+def test_concurrent_misses_share_one_load():
+    cache = HistoryCache()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def load():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return 'page', []
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('key', load))) for _ in range(4)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    deadline = time.monotonic() + 5
+    while cache.get_stats()['coalesced'] < 3 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert results == ['page'] * 4
+    assert len(calls) == 1
+    assert cache.get_stats()['coalesced'] == 3
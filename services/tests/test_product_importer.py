@@ -0,0 +1,67 @@
+from ProductImporter import ProductImporter
+
+
+CSV = """Name,Price
+Indomie Goreng,3500
+  indomie   GORENG ,4000
+Aqua,abc
+,2000
+Teh Botol,-1
+Coca Cola,5000.0
+"""
+
+
+def test_import_deduplicates_and_reports_rejected_rows(storage):
+    report = ProductImporter(storage).import_text(CSV, 'csv')
+
+    assert storage.get_products() == {'indomie goreng': 3500, 'coca cola': 5000}
+    assert (report['rows'], report['created'], report['updated'], report['failed']) == (6, 2, 0, 4)
+    assert [(error['row'], error['name']) for error in report['errors']] == [
+        (3, 'indomie goreng'), (4, 'aqua'), (5, None), (6, 'teh botol')
+    ]
+    assert report['errors'][0]['error'] == 'Duplicate of row 2'
+
+
+def test_reimport_only_writes_what_changed(storage):
+    importer = ProductImporter(storage)
+    importer.import_text(CSV, 'csv')
+
+    report = importer.import_text("name,price\nindomie goreng,3500\ncoca cola,5500\npepsi,4500\n", 'csv')
+
+    assert (report['created'], report['updated'], report['unchanged']) == (1, 1, 1)
+    assert storage.get_products() == {'indomie goreng': 3500, 'coca cola': 5500, 'pepsi': 4500}
+
+
+def test_dry_run_validates_without_writing(storage):
+    report = ProductImporter(storage).import_text(CSV, 'csv', dry_run=True)
+
+    assert report['dry_run'] and report['created'] == 2
+    assert storage.get_products() == {}
+
+
+def test_missing_columns_reject_the_file(storage):
+    report = ProductImporter(storage).import_text("name,cost\naqua,3000\n", 'csv')
+
+    assert report['created'] == 0
+    assert report['errors'][0]['error'] == 'Missing column(s): price'
+
+
+def test_json_lines_report_invalid_lines(storage):
+    text = '{"name": "aqua", "price": 3000}\n{not json}\n{"name": "pepsi", "price": "4500"}\n'
+
+    report = ProductImporter(storage).import_text(text, 'json')
+
+    assert storage.get_products() == {'aqua': 3000, 'pepsi': 4500}
+    assert [error['row'] for error in report['errors']] == [2]
+
+
+def test_export_round_trips_through_import(storage):
+    ProductImporter(storage).import_text(CSV, 'csv')
+    exported = ''.join(ProductImporter(storage).iter_export('json'))
+
+    other = type(storage)()
+    report = ProductImporter(other).import_text(exported, 'json')
+
+    assert report['failed'] == 0
+    assert other.get_products() == storage.get_products()
+    other.close()
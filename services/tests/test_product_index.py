@@ -0,0 +1,72 @@
+import pytest
+
+from ProductIndex import ProductIndex
+
+
+def catalog(count=25):
+    return {f"product {index:02d}": 1000 + (index * 7) % 10 * 100 for index in range(count)}
+
+
+def all_pages(index, **kwargs):
+    products = []
+    token = None
+    while True:
+        page = index.page(page_token=token, **kwargs)
+        products += page['products']
+        token = page['next_page_token']
+        if token is None:
+            return products
+
+
+@pytest.mark.parametrize('sort', ProductIndex.SORTS)
+def test_pages_cover_every_product_once_in_order(sort):
+    products = catalog()
+    index = ProductIndex()
+    index.rebuild(products)
+
+    listed = all_pages(index, sort=sort, page_size=4)
+
+    if sort.startswith('price'):
+        expected = sorted(products.items(), key=lambda item: (item[1], item[0]), reverse=sort.endswith('_desc'))
+    else:
+        expected = sorted(products.items(), reverse=sort.endswith('_desc'))
+    assert [(product['name'], product['price']) for product in listed] == expected
+
+
+def test_page_token_stays_consistent_when_catalog_changes():
+    index = ProductIndex()
+    index.rebuild(catalog(10))
+
+    first = index.page(page_size=5)
+    # Changes before the cursor must not repeat or skip anything after it
+    index.apply([
+        {'type': 'upserted', 'name': 'product 00a', 'price': 500},
+        {'type': 'removed', 'name': 'product 01'}
+    ])
+    second = index.page(page_size=5, page_token=first['next_page_token'])
+
+    assert [product['name'] for product in first['products']][-1] == 'product 04'
+    assert [product['name'] for product in second['products']] == [f"product {index:02d}" for index in range(5, 10)]
+    assert second['next_page_token'] is None
+
+
+def test_query_matches_prefix_and_substring():
+    index = ProductIndex()
+    index.rebuild({'coca cola': 5000, 'pepsi cola': 4500, 'aqua': 3000, 'cocoa': 8000})
+
+    assert {product['name'] for product in index.page(query='co')['products']} == {'coca cola', 'cocoa'}
+    assert {product['name'] for product in index.page(query='Cola')['products']} == {'coca cola', 'pepsi cola'}
+    assert index.page(query='cola')['total'] == 2
+
+
+def test_page_token_is_bound_to_its_query_and_sort():
+    index = ProductIndex()
+    index.rebuild(catalog())
+    token = index.page(page_size=5)['next_page_token']
+
+    with pytest.raises(ValueError):
+        index.page(sort='price', page_token=token)
+    with pytest.raises(ValueError):
+        index.page(query='product', page_token=token)
+    with pytest.raises(ValueError):
+        index.page(page_token='not a token')
@@ -0,0 +1,42 @@
+import pytest
+
+from ProductManager import ProductManager
+
+
+@pytest.fixture
+def manager(storage):
+    manager = ProductManager(storage, snapshot_path=None, reconcile_interval=3600)
+    yield manager
+    manager.stop_sync()
+
+
+def test_names_are_normalized_like_imports(manager):
+    assert manager.add_product('  Indomie   GORENG ', 3500) == {'name': 'indomie goreng', 'price': 3500}
+
+    assert manager.has_product('indomie  goreng')
+    assert manager.add_product('INDOMIE GORENG', 4000) is None
+    assert manager.update_product(' indomie\tgoreng', 4000) == {'name': 'indomie goreng', 'price': 4000}
+    assert manager.delete_product('Indomie Goreng ') == {'name': 'indomie goreng'}
+    assert manager.get_products() == {}
+
+
+def test_incomplete_delete_all_keeps_the_surviving_products(storage, manager):
+    for name in ('aqua', 'pepsi', 'teh botol'):
+        manager.add_product(name, 3000)
+
+    def delete_one(on_progress=None):
+        storage.delete_product('aqua')
+        return {'deleted_count': 1, 'completed': False, 'error': 'deadline exceeded'}
+
+    storage.delete_all_products = delete_one
+    result = manager.delete_all_products()
+
+    assert result == {'deleted_count': 1, 'error': 'deadline exceeded'}
+    assert manager.get_products() == {'pepsi': 3000, 'teh botol': 3000}
+
+
+def test_delete_all_clears_the_catalog(manager):
+    manager.add_product('aqua', 3000)
+
+    assert manager.delete_all_products() == {'deleted_count': 1}
+    assert manager.get_products() == {}
@@ -0,0 +1,64 @@
+from ShoppingCart import ShoppingCart
+
+
+def test_changes_since_returns_versioned_deltas():
+    cart = ShoppingCart()
+    cart.add('indomie', 3500)
+    version = cart.version
+    cart.add('indomie', 3500)
+    cart.add('aqua', 4000)
+    cart.remove('indomie')
+
+    changes = cart.changes_since(version)
+
+    assert [(change['item'], change['quantity'], change['total']) for change in changes] == [
+        ('indomie', 2, 7000), ('aqua', 1, 11000), ('indomie', 1, 7500)
+    ]
+    assert [change['version'] for change in changes] == list(range(version + 1, cart.version + 1))
+    assert cart.changes_since(cart.version) == []
+
+
+def test_clients_behind_a_clear_or_the_log_need_a_resync():
+    cart = ShoppingCart(max_changes=3)
+    cart.add('aqua', 4000)
+    before_clear = cart.version
+    cart.clear()
+    assert cart.changes_since(before_clear) is None
+
+    for _ in range(5):
+        cart.add('aqua', 4000)
+    assert cart.changes_since(cart.version - 5) is None
+    assert len(cart.changes_since(cart.version - 3)) == 3
+
+
+def test_take_clears_atomically_and_restore_merges_back():
+    cart = ShoppingCart()
+    cart.add('indomie', 3500)
+    cart.add('indomie', 3500)
+    cart.add('aqua', 4000)
+
+    taken = cart.take()
+    assert taken['cart'] == {'indomie': {'price': 3500, 'quantity': 2}, 'aqua': {'price': 4000, 'quantity': 1}}
+    assert taken['total'] == 11000
+    assert cart.snapshot()['cart'] == {} and cart.total == 0
+
+    cart.add('aqua', 4000)
+    cart.restore(taken)
+
+    snapshot = cart.snapshot()
+    assert snapshot['cart'] == {'aqua': {'price': 4000, 'quantity': 2}, 'indomie': {'price': 3500, 'quantity': 2}}
+    assert snapshot['total'] == 15000
+
+
+def test_total_matches_the_lines_after_many_fractional_edits():
+    cart = ShoppingCart()
+    for _ in range(1000):
+        cart.add('permen', 0.1)
+        cart.add('gula', 0.7)
+        cart.remove('gula')
+
+    snapshot = cart.snapshot()
+    assert snapshot['total'] == sum(item['price'] * item['quantity'] for item in snapshot['cart'].values())
+    for _ in range(1000):
+        cart.remove('permen')
+    assert cart.total == 0
@@ -0,0 +1,41 @@
+from conftest import make_checkouts
+
+
+def line_count(storage):
+    return sum(len(order['items']) for order in storage.get_transactions(limit=1000))
+
+
+def test_products_are_unique_by_name(storage):
+    created = storage.add_product('Aqua', 3000)
+
+    assert created['name'] == 'aqua'
+    assert storage.add_product('aqua', 3500) is None
+    assert storage.update_product('aqua', 3500)['price'] == 3500
+    assert storage.get_products() == {'aqua': 3500}
+    assert storage.delete_product('aqua')['id'] == created['id']
+    assert storage.count_products() == 0
+
+
+def test_date_range_reads_stay_inside_the_range(storage):
+    storage.save_transactions(make_checkouts(10))
+
+    assert len(storage.get_transactions_by_date_range('2026-09-01', '2026-09-01')) == 10
+    assert storage.get_transactions_by_date_range('2026-09-02', '2026-09-03') == []
+
+
+def test_replaying_save_transactions_is_idempotent(storage):
+    checkouts = make_checkouts(12)
+    assert storage.save_transactions(checkouts) == [checkout['checkout_id'] for checkout in checkouts]
+    summary = storage.get_sales_summary('2026-09-01', '2026-09-01')
+    lines = line_count(storage)
+
+    # A crash after the write but before the queue row was removed replays the batch
+    assert storage.save_transactions(checkouts[4:] + make_checkouts(2, start=12)) is not None
+
+    replayed = storage.get_sales_summary('2026-09-01', '2026-09-01')
+    assert len(storage.get_transactions(limit=100)) == 14
+    assert line_count(storage) == lines + 4
+    assert replayed['totals']['orders'] == summary['totals']['orders'] + 2
+    assert replayed['totals']['revenue'] == summary['totals']['revenue'] + sum(
+        checkout['total'] for checkout in make_checkouts(2, start=12))
+    assert storage.get_transaction_by_id('c003')['total'] == checkouts[3]['total']
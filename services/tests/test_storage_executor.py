@@ -0,0 +1,89 @@
+import threading
+
+import pytest
+
+from StorageBackend import TransientStorageError
+from StorageExecutor import StorageExecutor
+
+
+@pytest.fixture
+def executor():
+    executor = StorageExecutor(max_workers=2, max_pending=2, default_timeout=5, max_retries=2, backoff=0.01)
+    yield executor
+    executor.shutdown()
+
+
+def submit(executor, fn, **kwargs):
+    done = threading.Event()
+    outcome = {}
+
+    def on_complete(request_id, status, result, error):
+        outcome.update(status=status, result=result, error=error)
+        done.set()
+
+    executor.submit('test', fn, on_complete=on_complete, **kwargs)
+    return done, outcome
+
+
+def test_transient_errors_are_retried(executor):
+    calls = []
+
+    def flaky():
+        calls.append(1)
+        if len(calls) < 3:
+            raise TransientStorageError('unavailable')
+        return 'saved'
+
+    done, outcome = submit(executor, flaky)
+
+    assert done.wait(2)
+    assert outcome['status'] == 'success' and outcome['result'] == 'saved'
+    assert len(calls) == 3 and executor.get_stats()['retries'] == 2
+
+
+def test_permanent_failures_are_not_retried(executor):
+    calls = []
+
+    def duplicate():
+        calls.append(1)
+        return None
+
+    done, outcome = submit(executor, duplicate, is_failure=lambda result: result is None)
+    assert done.wait(2)
+    assert outcome['status'] == 'failed' and len(calls) == 1
+
+    done, outcome = submit(executor, lambda: 1 / 0)
+    assert done.wait(2)
+    assert outcome['status'] == 'failed' and 'division' in outcome['error']
+
+
+def test_timeout_reports_unknown_but_keeps_the_call_counted(executor):
+    release = threading.Event()
+    done, outcome = submit(executor, release.wait, timeout=0.05)
+
+    assert done.wait(2)
+    assert outcome['status'] == 'unknown'
+    stats = executor.get_stats()
+    assert stats['pending'] == 0 and stats['in_flight'] == 1
+
+    # The stuck call still occupies a slot, so only one more fits
+    blocked = submit(executor, release.wait, timeout=0.05)
+    rejected_done, rejected = submit(executor, lambda: None)
+    assert rejected_done.wait(2) and rejected['status'] == 'rejected'
+
+    release.set()
+    assert blocked[0].wait(2)
+    executor.pool.shutdown(wait=True)
+    assert executor.get_stats()['in_flight'] == 0
+
+
+def test_cancelling_a_queued_request_frees_its_slot():
+    executor = StorageExecutor(max_workers=1, max_pending=2, default_timeout=0)
+    release = threading.Event()
+    executor.submit('busy', release.wait)
+    queued = executor.submit('queued', lambda: None)
+
+    assert executor.cancel(queued)
+    assert executor.get_stats()['in_flight'] == 1
+    release.set()
+    executor.pool.shutdown(wait=True)
@@ -0,0 +1,82 @@
+import csv
+import json
+
+import pytest
+
+from TransactionExporter import TransactionExporter
+from conftest import make_checkouts
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_after(checkpoints):
+    calls = []
+
+    def on_progress(progress):
+        calls.append(progress)
+        if len(calls) == checkpoints:
+            raise Interrupted()
+    return on_progress
+
+
+def read_rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_csv_resume_matches_an_uninterrupted_export(storage, tmp_path):
+    storage.save_transactions(make_checkouts(40))
+    exporter = TransactionExporter(storage, page_size=7)
+
+    full = exporter.export_file(str(tmp_path / 'full.csv'))
+    with pytest.raises(Interrupted):
+        exporter.export_file(str(tmp_path / 'resumed.csv'), on_progress=interrupt_after(3))
+    resumed = exporter.export_file(str(tmp_path / 'resumed.csv'), resume=True)
+
+    assert full == {'orders': 40, 'rows': 80, 'completed': True, 'resumed': False}
+    assert resumed == {'orders': 40, 'rows': 80, 'completed': True, 'resumed': True}
+    assert (tmp_path / 'resumed.csv').read_bytes() == (tmp_path / 'full.csv').read_bytes()
+
+
+def test_resume_continues_after_the_checkpointed_order_is_deleted(storage, tmp_path):
+    storage.save_transactions(make_checkouts(30))
+    exporter = TransactionExporter(storage, page_size=5)
+    path = tmp_path / 'sales.csv'
+
+    with pytest.raises(Interrupted):
+        exporter.export_file(str(path), on_progress=interrupt_after(2))
+    with open(f"{path}.checkpoint.json") as f:
+        cursor = json.load(f)['state']['cursor']
+    storage.delete_transaction(cursor[1])
+    result = exporter.export_file(str(path), resume=True)
+
+    checkout_ids = {row['checkout_id'] for row in read_rows(path)}
+    assert result['orders'] == 30
+    assert len(checkout_ids) == 30
+
+
+def test_product_filter_keeps_matching_lines_and_order_totals(storage, tmp_path):
+    checkouts = make_checkouts(6)
+    storage.save_transactions(checkouts)
+    path = tmp_path / 'aqua.csv'
+
+    result = TransactionExporter(storage).export_file(str(path), products=['  AQUA '])
+
+    rows = read_rows(path)
+    totals = {checkout['checkout_id']: checkout['total'] for checkout in checkouts}
+    assert result['rows'] == 6
+    assert {row['product'] for row in rows} == {'aqua'}
+    assert all(float(row['order_total']) == totals[row['checkout_id']] for row in rows)
+
+
+def test_resume_refuses_a_checkpoint_from_another_export(storage, tmp_path):
+    storage.save_transactions(make_checkouts(10))
+    exporter = TransactionExporter(storage, page_size=3)
+    path = str(tmp_path / 'sales.csv')
+
+    with pytest.raises(Interrupted):
+        exporter.export_file(path, on_progress=interrupt_after(1))
+    with pytest.raises(ValueError):
+        exporter.export_file(path, start_date='2026-09-01', end_date='2026-09-30', resume=True)
@@ -0,0 +1,51 @@
+import pytest
+
+from conftest import make_checkouts
+
+
+def test_keyset_pages_return_every_order_once_newest_first(storage):
+    storage.save_transactions(make_checkouts(23, per_second=3))
+
+    orders = []
+    token = None
+    while True:
+        page = storage.get_transactions_page(page_size=5, start_after=token)
+        orders += page['transactions']
+        token = page['next_page_token']
+        if token is None:
+            break
+
+    keys = [(order['timestamp'], order['id']) for order in orders]
+    assert len(keys) == 23
+    assert keys == sorted(keys, reverse=True)
+
+
+def test_iter_transaction_pages_resumes_after_a_cursor(storage):
+    storage.save_transactions(make_checkouts(20))
+    pages = list(storage.iter_transaction_pages(page_size=6))
+    first, rest = pages[0], [order for page in pages[1:] for order in page]
+
+    resumed = [order for page in storage.iter_transaction_pages(page_size=6, start_after=first[-1]['id'])
+               for order in page]
+
+    assert [len(page) for page in pages] == [6, 6, 6, 2]
+    assert [order['id'] for order in resumed] == [order['id'] for order in rest]
+
+
+def test_timestamp_cursor_survives_deleting_its_order(storage):
+    storage.save_transactions(make_checkouts(20))
+    orders = [order for page in storage.iter_transaction_pages(page_size=20) for order in page]
+    cursor = orders[7]
+    assert storage.delete_transaction(cursor['id'])
+
+    resumed = [order for page in storage.iter_transaction_pages(start_after=(cursor['timestamp'], cursor['id']))
+               for order in page]
+
+    assert [order['id'] for order in resumed] == [order['id'] for order in orders[8:]]
+
+
+def test_missing_order_cursor_raises(storage):
+    storage.save_transactions(make_checkouts(5))
+
+    with pytest.raises(ValueError):
+        list(storage.iter_transaction_pages(start_after='deleted-order'))